@@ -0,0 +1,177 @@
+import pygame
+import os
+import mmap
+import struct
+import hashlib
+
+# Header of an on-disk pixel file: magic, version, bytes per pixel, width, height
+_HEADER = struct.Struct('<4sHHII')
+_MAGIC = b'PGAC'
+_VERSION = 1
+
+
+class AssetCache:
+    """Deduplicated image/sound loading with an on-disk cache of decoded, scaled pixels"""
+    def __init__(self, base_dir=None, cache_dir=None, use_disk=True):
+        self.base_dir = base_dir or os.path.dirname(os.path.abspath(__file__))
+        self.cache_dir = cache_dir or os.path.join(self.base_dir, ".asset_cache")
+        self.use_disk = use_disk
+        self.images = {}  # (path, size, fmt, smooth) -> Surface
+        self.frame_lists = {}  # (folder, size) -> [Surface]
+        self.sounds = {}  # (path, volume) -> Sound
+        self.decoded = {}  # path -> first decoded Sound, shared sample source
+        self.disk_hits = 0
+        self.decodes = 0
+
+    def resolve(self, name):
+        return name if os.path.isabs(name) else os.path.join(self.base_dir, name)
+
+    # Images
+    def image_key(self, name, size=None, alpha=True, smooth=True):
+        return (self.resolve(name), tuple(size) if size else None, 'RGBA' if alpha else 'RGB', smooth)
+
+    def image(self, name, size=None, alpha=True, smooth=True):
+        """Return a display-format surface, loading it at most once per process"""
+        key = self.image_key(name, size, alpha, smooth)
+        surface = self.images.get(key)
+        if surface is None:
+            surface = self.store_image(key, self.decode_image(key))
+        return surface
+
+    def decode_image(self, key):
+        """Produce the scaled pixels for a key without touching the display (thread safe)"""
+        path, size, fmt, smooth = key
+        if not os.path.exists(path):
+            raise FileNotFoundError(path)
+        disk_path = self._disk_path(key, path)
+        surface = self._read_disk(disk_path, fmt) if self.use_disk else None
+        if surface is None:
+            surface = self._decode(path, size, smooth)
+            if self.use_disk:
+                self._write_disk(disk_path, surface, fmt)
+        else:
+            self.disk_hits += 1
+        return surface
+
+    def store_image(self, key, surface):
+        """Convert decoded pixels to display format and keep them (main thread only)"""
+        surface = self._to_display(surface, key[2] == 'RGBA')
+        self.images[key] = surface
+        return surface
+
+    def frames(self, folder, size=None):
+        """Return every .png in folder (sorted) as a list of surfaces"""
+        key = (self.resolve(folder), tuple(size) if size else None)
+        frames = self.frame_lists.get(key)
+        if frames is None:
+            names = sorted(f for f in os.listdir(key[0]) if f.endswith('.png'))
+            frames = [self.image(os.path.join(key[0], f), size) for f in names]
+            self.frame_lists[key] = frames
+        return frames
+
+    def _decode(self, path, size, smooth):
+        self.decodes += 1
+        surface = pygame.image.load(path)
+        if size:
+            if smooth:
+                # smoothscale needs 24/32-bit surfaces, palettized PNGs have to be widened first
+                if surface.get_bitsize() not in (24, 32):
+                    surface = surface.convert(32, pygame.SRCALPHA)
+                surface = pygame.transform.smoothscale(surface, size)
+            else:
+                surface = pygame.transform.scale(surface, size)
+        return surface
+
+    @staticmethod
+    def _has_display():
+        return pygame.display.get_init() and pygame.display.get_surface() is not None
+
+    def _to_display(self, surface, alpha):
+        if not self._has_display():
+            return surface  # Headless, keep whatever pixel format we have
+        return surface.convert_alpha() if alpha else surface.convert()
+
+    # On-disk pixel cache
+    def _disk_path(self, key, path):
+        stat = os.stat(path)
+        key_hash = hashlib.sha1(repr(key).encode()).hexdigest()[:16]
+        # Source mtime and size make stale entries miss automatically
+        state_hash = hashlib.sha1(f"{stat.st_mtime_ns}:{stat.st_size}".encode()).hexdigest()[:8]
+        return os.path.join(self.cache_dir, f"{key_hash}-{state_hash}.raw")
+
+    def _read_disk(self, disk_path, fmt):
+        try:
+            with open(disk_path, 'rb') as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        try:
+            magic, version, bpp, width, height = _HEADER.unpack_from(mm, 0)
+            if magic != _MAGIC or version != _VERSION or bpp != len(fmt):
+                return None
+            view = memoryview(mm)[_HEADER.size:_HEADER.size + width * height * bpp]
+            try:
+                # frombuffer wraps the mapped pixels, copy before the mapping goes away
+                surface = pygame.image.frombuffer(view, (width, height), fmt).copy()
+            finally:
+                view.release()
+            return surface
+        except (struct.error, ValueError):
+            return None
+        finally:
+            mm.close()
+
+    def _write_disk(self, disk_path, surface, fmt):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Drop older versions of the same asset key
+            prefix = os.path.basename(disk_path).split('-')[0] + '-'
+            for name in os.listdir(self.cache_dir):
+                if name.startswith(prefix):
+                    os.remove(os.path.join(self.cache_dir, name))
+            tmp_path = disk_path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(_HEADER.pack(_MAGIC, _VERSION, len(fmt), *surface.get_size()))
+                f.write(pygame.image.tobytes(surface, fmt))
+            os.replace(tmp_path, disk_path)
+        except OSError as e:
+            print(f"Could not write asset cache: {e}")
+
+    # Sounds
+    def sound(self, name, volume=None):
+        """Return a Sound for name at volume, decoding each file only once"""
+        path = self.resolve(name)
+        key = (path, volume)
+        sound = self.sounds.get(key)
+        if sound is None:
+            base = self.decoded.get(path)
+            if base is None:
+                base = self.store_sound(path, self.decode_sound(path))
+                sound = base
+            else:
+                # Separate Sound so volumes stay independent, samples are not re-decoded
+                sound = pygame.mixer.Sound(buffer=base.get_raw())
+            if volume is not None:
+                sound.set_volume(volume)
+            self.sounds[key] = sound
+        return sound
+
+    def decode_sound(self, path):
+        """Decode a sound file (thread safe)"""
+        self.decodes += 1
+        return pygame.mixer.Sound(self.resolve(path))
+
+    def store_sound(self, path, sound):
+        """Keep a decoded sound as the sample source for path (main thread only)"""
+        return self.decoded.setdefault(self.resolve(path), sound)
+
+    def clear(self):
+        """Forget every in-process asset (the disk cache is kept)"""
+        self.images.clear()
+        self.frame_lists.clear()
+        self.sounds.clear()
+        self.decoded.clear()
+
+
+# Shared by every module that loads assets
+assets = AssetCache()
@@ -0,0 +1,73 @@
+import os
+from concurrent.futures import ThreadPoolExecutor, wait
+from asset_cache import assets
+
+class AssetLoader:
+    """Decodes game assets on worker threads while the menu is showing"""
+    def __init__(self, cache=assets, max_workers=4):
+        self.cache = cache
+        self.max_workers = max_workers
+        self.executor = None
+        self.pending = []  # (kind, key, future) not yet handed to the cache
+        self.total = 0
+        self.finished = 0
+
+    def start(self, images=(), folders=(), sounds=()):
+        """Queue decoding of images [(name, size, smooth)], folders [(folder, size)] and sounds [name]"""
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                               thread_name_prefix="asset-loader")
+        jobs = [self.cache.image_key(name, size, smooth=smooth) for name, size, smooth in images]
+        for folder, size in folders:
+            path = self.cache.resolve(folder)
+            if os.path.isdir(path):
+                jobs.extend(self.cache.image_key(os.path.join(path, f), size)
+                            for f in sorted(os.listdir(path)) if f.endswith('.png'))
+
+        for key in jobs:
+            if key not in self.cache.images:
+                # pygame releases the GIL while decoding, so workers run in parallel
+                self.pending.append(('image', key, self.executor.submit(self.cache.decode_image, key)))
+        for name in sounds:
+            path = self.cache.resolve(name)
+            if path not in self.cache.decoded:
+                self.pending.append(('sound', path, self.executor.submit(self.cache.decode_sound, path)))
+        self.total = len(self.pending) + self.finished
+
+    def progress(self):
+        """Fraction of queued assets whose decoding has finished (0.0 to 1.0)"""
+        if self.total == 0:
+            return 1.0
+        done = self.finished + sum(1 for _, _, future in self.pending if future.done())
+        return done / self.total
+
+    def is_done(self):
+        return not self.pending
+
+    def pump(self):
+        """Hand finished decodes to the cache on the main thread (convert_alpha happens here)"""
+        still_pending = []
+        for kind, key, future in self.pending:
+            if not future.done():
+                still_pending.append((kind, key, future))
+                continue
+            self.finished += 1
+            try:
+                result = future.result()
+            except Exception as e:
+                # The synchronous loaders will report the problem and fall back later
+                print(f"Background load failed for {key}: {e}")
+                continue
+            if kind == 'image':
+                self.cache.store_image(key, result)
+            else:
+                self.cache.store_sound(key, result)
+        self.pending = still_pending
+
+    def wait(self):
+        """Block until every queued asset is decoded and stored"""
+        wait([future for _, _, future in self.pending])
+        self.pump()
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+            self.executor = None
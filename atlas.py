@@ -0,0 +1,86 @@
+import pygame
+
+def blit_source(surface):
+    """Return (source, area) to blit a surface, unwrapping atlas subsurfaces"""
+    parent = surface.get_parent()
+    if parent is None:
+        return surface, None
+    return parent, pygame.Rect(surface.get_offset(), surface.get_size())
+
+
+class TextureAtlas:
+    """Packs many small surfaces into a few large pages with a name -> sub-rect index"""
+    def __init__(self, page_size=(1024, 1024), padding=1):
+        self.page_size = page_size
+        self.padding = padding
+        self.pages = []
+        self.regions = {}  # name -> (page index, Rect)
+        self.frames = {}  # name -> subsurface of its page
+
+    def pack(self, surfaces):
+        """Shelf-pack a {name: surface} dict into pages, replacing any previous contents"""
+        self.pages = []
+        self.regions = {}
+        self.frames = {}
+        page_w, page_h = self.page_size
+        pad = self.padding
+
+        # Tallest first keeps shelves tight, name breaks ties so packing is deterministic
+        items = sorted(surfaces.items(), key=lambda item: (-item[1].get_height(), item[0]))
+        placements = []  # (name, surface, page index, x, y)
+        page_sizes = []
+        x = y = shelf_h = 0
+        page = -1
+        for name, surface in items:
+            w, h = surface.get_size()
+            if w + pad > page_w or h + pad > page_h:
+                # Oversized sprites get a page of their own
+                page_sizes.append((w, h))
+                placements.append((name, surface, len(page_sizes) - 1, 0, 0))
+                page = -1
+                continue
+            if page < 0 or x + w + pad > page_w:
+                x, y, shelf_h = 0, y + shelf_h, 0
+            if page < 0 or y + h + pad > page_h:
+                page_sizes.append([0, 0])
+                page = len(page_sizes) - 1
+                x = y = shelf_h = 0
+            placements.append((name, surface, page, x, y))
+            page_sizes[page][0] = max(page_sizes[page][0], x + w)
+            page_sizes[page][1] = max(page_sizes[page][1], y + h)
+            x += w + pad
+            shelf_h = max(shelf_h, h + pad)
+
+        for size in page_sizes:
+            page_surface = pygame.Surface(tuple(size), pygame.SRCALPHA)
+            if pygame.display.get_init() and pygame.display.get_surface() is not None:
+                page_surface = page_surface.convert_alpha()
+            page_surface.fill((0, 0, 0, 0))
+            self.pages.append(page_surface)
+
+        for name, surface, page, x, y in placements:
+            # RGBA_MAX onto a cleared page copies pixels and alpha unchanged
+            self.pages[page].blit(surface, (x, y), special_flags=pygame.BLEND_RGBA_MAX)
+            rect = pygame.Rect(x, y, *surface.get_size())
+            self.regions[name] = (page, rect)
+            self.frames[name] = self.pages[page].subsurface(rect)
+        return self
+
+    def region(self, name):
+        """Return (page surface, sub-rect) for a frame name"""
+        page, rect = self.regions[name]
+        return self.pages[page], rect
+
+    def frame(self, name):
+        """Return a subsurface view of a frame, it blits straight from the atlas page"""
+        return self.frames[name]
+
+    def blit(self, target, name, dest):
+        page, rect = self.region(name)
+        return target.blit(page, dest, rect)
+
+    def __contains__(self, name):
+        return name in self.regions
+
+    def __len__(self):
+        return len(self.regions)
@@ -1,20 +1,79 @@
 import pygame
 import os
+import numpy as np
+from asset_cache import assets
+
+# Channels reserved per sound category; a category never plays on another's channels
+DEFAULT_GROUPS = {'weapon': 2, 'combat': 4, 'pickup': 2}
+
+
+class SoundEffect:
+    """A registered effect: shared decoded sample plus how it is mixed"""
+    __slots__ = ('sound', 'category', 'priority', 'volume')
+
+    def __init__(self, sound, category, priority, volume):
+        self.sound = sound
+        self.category = category
+        self.priority = priority  # Higher priority voices may steal channels from lower ones
+        self.volume = volume
+
 
 class AudioManager:
-    def __init__(self):
-        pygame.mixer.init()
+    def __init__(self, groups=None, audible_radius=900, pan_width=400):
+        self.enabled = self._init_mixer()
         self.current_music = None
         self.music_volume = 0.5
         self.sound_volume = 0.7
-        self.sounds = {}
+        self.sounds = {}  # name -> SoundEffect
+        self.groups = dict(DEFAULT_GROUPS if groups is None else groups)
+        self.channels = {}  # category -> [channel index], reserved so pygame never hands them out itself
+        self.voices = {}  # channel index -> (priority, start order) of the voice last played on it
+        self.frame_sounds = set()  # Names already played this frame
+        self.order = 0
+        self.played = 0
+        self.deduped = 0  # Same sound again within one frame
+        self.dropped = 0  # Every channel of the category busy with equal or higher priority voices
+        self.stolen = 0  # Lower priority voices cut off for a new one
+        self.culled = 0  # Positional sounds too far from the listener to be heard
+
+        # Positional audio: volume falls off linearly to zero at audible_radius, sources pan fully
+        # left or right pan_width pixels to the side; per channel columns are updated in one pass a frame
+        self.audible_radius = audible_radius
+        self.pan_width = pan_width
+        self.listener = np.zeros(2)
+        total = sum(self.groups.values())
+        self.voice_pos = np.zeros((total, 2))  # World position of each channel's voice
+        self.voice_gain = np.zeros(total)  # Effect volume of each channel's voice
+        self.positional = np.zeros(total, dtype=bool)  # Channels whose voice follows the listener
+        if self.enabled:
+            self._reserve_channels()
+
+    @staticmethod
+    def _init_mixer():
+        try:
+            if not pygame.mixer.get_init():
+                pygame.mixer.init()
+            return True
+        except pygame.error as e:
+            print(f"Audio disabled: {e}")
+            return False
+
+    def _reserve_channels(self):
+        total = sum(self.groups.values())
+        pygame.mixer.set_num_channels(max(pygame.mixer.get_num_channels(), total))
+        pygame.mixer.set_reserved(total)
+        index = 0
+        for category, count in self.groups.items():
+            self.channels[category] = list(range(index, index + count))
+            index += count
 
     def load_music(self, filepath):
-        """Load background music file"""
+        """Load background music file (relative paths resolve like every other asset)"""
         try:
-            if os.path.exists(filepath):
+            path = assets.resolve(filepath)
+            if os.path.exists(path):
                 self.current_music = filepath
-                pygame.mixer.music.load(filepath)
+                pygame.mixer.music.load(path)
                 pygame.mixer.music.set_volume(self.music_volume)
                 return True
             else:
@@ -31,19 +90,25 @@ class AudioManager:
 
     def stop_music(self, fadeout=1000):
         """Stop music with optional fadeout in milliseconds"""
-        pygame.mixer.music.fadeout(fadeout)
+        if self.enabled:
+            pygame.mixer.music.fadeout(fadeout)
 
     def set_music_volume(self, volume):
         """Set music volume (0.0 to 1.0)"""
         self.music_volume = max(0.0, min(1.0, volume))
-        pygame.mixer.music.set_volume(self.music_volume)
+        if self.enabled:
+            pygame.mixer.music.set_volume(self.music_volume)
 
-    def load_sound(self, name, filepath):
-        """Load a sound effect"""
+    def load_sound(self, name, filepath, category='pickup', priority=0, volume=1.0):
+        """Register a sound effect; samples come decoded (and preloaded) from the asset cache"""
+        if not self.enabled:
+            return False
+        if category not in self.channels:
+            print(f"Unknown sound category: {category}")
+            return False
         try:
-            if os.path.exists(filepath):
-                self.sounds[name] = pygame.mixer.Sound(filepath)
-                self.sounds[name].set_volume(self.sound_volume)
+            if os.path.exists(assets.resolve(filepath)):
+                self.sounds[name] = SoundEffect(assets.sound(filepath), category, priority, volume)
                 return True
             else:
                 print(f"Sound file not found: {filepath}")
@@ -52,13 +117,103 @@ class AudioManager:
             print(f"Error loading sound: {e}")
             return False
 
-    def play_sound(self, name):
-        """Play a loaded sound effect"""
-        if name in self.sounds:
-            self.sounds[name].play()
+    def play_sound(self, name, pos=None):
+        """Play a loaded sound effect, at a world position if given; returns its Channel or None"""
+        effect = self.sounds.get(name)
+        if effect is None:
+            return None
+        if pos is not None and ((pos[0] - self.listener[0]) ** 2 + (pos[1] - self.listener[1]) ** 2
+                                >= self.audible_radius ** 2):
+            # Off-screen fights never take a channel
+            self.culled += 1
+            return None
+        if name in self.frame_sounds:
+            # One swing hitting many enemies should not stack copies of the same sample
+            self.deduped += 1
+            return None
+
+        index = self._free_channel(effect)
+        if index is None:
+            self.dropped += 1
+            return None
+        self.frame_sounds.add(name)
+        channel = pygame.mixer.Channel(index)
+        channel.play(effect.sound)
+        self.order += 1
+        self.voices[index] = (effect.priority, self.order)
+        self.voice_gain[index] = effect.volume
+        self.positional[index] = pos is not None
+        if pos is None:
+            channel.set_volume(effect.volume * self.sound_volume)
+        else:
+            self.voice_pos[index] = pos
+            # Panned right away, the batched pass takes over from the next frame
+            left, right = self._stereo_volumes(self.voice_pos[index:index + 1], self.voice_gain[index:index + 1])
+            channel.set_volume(left[0], right[0])
+        self.played += 1
+        return channel
+
+    def _free_channel(self, effect):
+        """An idle channel of the effect's category, else the one to steal (lowest priority, then oldest)"""
+        victim = None
+        for index in self.channels[effect.category]:
+            if not pygame.mixer.Channel(index).get_busy():
+                return index
+            if victim is None or self.voices[index] < self.voices[victim]:
+                victim = index
+        if self.voices[victim][0] > effect.priority:
+            return None
+        pygame.mixer.Channel(victim).stop()
+        self.stolen += 1
+        return victim
+
+    def _stereo_volumes(self, positions, gains):
+        """Left and right channel volumes of voices at (n, 2) world positions, heard from the listener"""
+        offset = positions - self.listener
+        distance = np.sqrt(np.einsum('ij,ij->i', offset, offset))
+        volume = gains * self.sound_volume * np.clip(1 - distance / self.audible_radius, 0, 1)
+        pan = np.clip(offset[:, 0] / self.pan_width, -1, 1)
+        return volume * np.minimum(1, 1 - pan), volume * np.minimum(1, 1 + pan)
+
+    def update_listener(self, pos):
+        """Move the listener and re-pan every playing positional voice in one batched pass"""
+        self.listener[:] = pos
+        if not self.enabled:
+            return
+        indices = np.flatnonzero(self.positional)
+        if not indices.size:
+            return
+        left, right = self._stereo_volumes(self.voice_pos[indices], self.voice_gain[indices])
+        for index, left_volume, right_volume in zip(indices.tolist(), left.tolist(), right.tolist()):
+            channel = pygame.mixer.Channel(index)
+            if not channel.get_busy():
+                self.positional[index] = False  # Finished, stop tracking it
+            elif left_volume == 0 and right_volume == 0:
+                channel.stop()  # Walked out of earshot, free the channel
+                self.positional[index] = False
+            else:
+                channel.set_volume(left_volume, right_volume)
+
+    def end_frame(self, listener=None):
+        """Call once per frame; sounds may repeat from the next frame
+
+        Set the listener with update_listener before the frame plays sounds, passing it here only
+        moves it for the voices already playing."""
+        if listener is not None:
+            self.update_listener(listener)
+        self.frame_sounds.clear()
 
     def set_sound_volume(self, volume):
         """Set sound effects volume (0.0 to 1.0)"""
         self.sound_volume = max(0.0, min(1.0, volume))
-        for sound in self.sounds.values():
-            sound.set_volume(self.sound_volume)
+        for index in self.voices:
+            if not self.positional[index]:
+                pygame.mixer.Channel(index).set_volume(self.voice_gain[index] * self.sound_volume)
+        self.update_listener(self.listener)
+
+    def stats(self):
+        return {'played': self.played, 'deduped': self.deduped, 'dropped': self.dropped, 'stolen': self.stolen,
+                'culled': self.culled}
+
+
+audio = AudioManager()  # Shared by the game, the weapon and the boss fight
@@ -0,0 +1,74 @@
+import pygame
+from collections import OrderedDict
+
+class ChunkedBackground:
+    """Tiled world background that upscales fixed-size chunks on demand"""
+    def __init__(self, source, scale=4, chunk_size=256, max_bytes=24 * 1024 * 1024):
+        if chunk_size % scale:
+            raise ValueError("chunk_size must be a multiple of scale")
+        self.source = source  # Only the unscaled image is kept around
+        self.scale = scale
+        self.chunk_size = chunk_size
+        self.max_bytes = max_bytes
+        self.tile_width = source.get_width() * scale
+        self.tile_height = source.get_height() * scale
+        self.cols = -(-self.tile_width // chunk_size)
+        self.rows = -(-self.tile_height // chunk_size)
+        self.chunks = OrderedDict()  # (col, row) -> scaled surface, in LRU order
+        self.used_bytes = 0
+        self.chunks_built = 0
+
+    def get_chunk(self, col, row):
+        """Return the scaled chunk at (col, row) of the tile, building it if needed"""
+        key = (col, row)
+        chunk = self.chunks.get(key)
+        if chunk is not None:
+            self.chunks.move_to_end(key)
+            return chunk
+
+        src_size = self.chunk_size // self.scale
+        src_rect = pygame.Rect(col * src_size, row * src_size, src_size, src_size)
+        src_rect = src_rect.clip(self.source.get_rect())  # Edge chunks are smaller
+        chunk = pygame.transform.scale(self.source.subsurface(src_rect),
+                                       (src_rect.width * self.scale, src_rect.height * self.scale))
+        self.chunks[key] = chunk
+        self.used_bytes += chunk.get_width() * chunk.get_height() * chunk.get_bytesize()
+        self.chunks_built += 1
+
+        # Evict least recently drawn chunks, never the one we just built
+        while self.used_bytes > self.max_bytes and len(self.chunks) > 1:
+            _, old = self.chunks.popitem(last=False)
+            self.used_bytes -= old.get_width() * old.get_height() * old.get_bytesize()
+        return chunk
+
+    def visible_chunks(self, camera_offset, view_size):
+        """Yield (col, row, screen_x, screen_y) for every chunk inside the view"""
+        cam_x, cam_y = int(camera_offset[0]), int(camera_offset[1])
+        view_w, view_h = view_size
+        cs = self.chunk_size
+
+        # Walk world space in chunk steps, wrapping into tile-local coordinates
+        tile_x0 = cam_x // self.tile_width * self.tile_width
+        tile_y0 = cam_y // self.tile_height * self.tile_height
+        for tile_x in range(tile_x0, cam_x + view_w, self.tile_width):
+            col0 = max(0, (cam_x - tile_x) // cs)
+            col1 = min(self.cols - 1, (cam_x + view_w - 1 - tile_x) // cs)
+            for tile_y in range(tile_y0, cam_y + view_h, self.tile_height):
+                row0 = max(0, (cam_y - tile_y) // cs)
+                row1 = min(self.rows - 1, (cam_y + view_h - 1 - tile_y) // cs)
+                for col in range(col0, col1 + 1):
+                    for row in range(row0, row1 + 1):
+                        yield col, row, tile_x + col * cs - cam_x, tile_y + row * cs - cam_y
+
+    def draw(self, surface, camera_offset):
+        """Draw every visible chunk with one batched blit"""
+        batch = [(self.get_chunk(col, row), (x, y))
+                 for col, row, x, y in self.visible_chunks(camera_offset, surface.get_size())]
+        if hasattr(surface, 'fblits'):
+            surface.fblits(batch)
+        else:
+            surface.blits(batch, doreturn=False)
+
+    def clear(self):
+        self.chunks.clear()
+        self.used_bytes = 0
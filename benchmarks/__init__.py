@@ -0,0 +1,5 @@
+import os
+
+# Benchmarks never open a window or an audio device, set before main is imported
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
@@ -0,0 +1,216 @@
+import os
+import gc
+import sys
+import json
+import time
+import platform
+import argparse
+import statistics
+import numpy as np
+import pygame
+from benchmarks.scenarios import SCENARIOS
+from benchmarks.stages import STAGES
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+RESULTS_VERSION = 2
+ITERATIONS = 200
+WARMUP = 20
+RETRIES = 2
+
+
+def _iqm(samples):
+    """Mean of the middle half of the samples: ignores both the lucky and the preempted runs"""
+    samples = sorted(samples)
+    quarter = len(samples) // 4
+    return statistics.fmean(samples[quarter:len(samples) - quarter])
+
+
+_reference_data = np.linspace(0.0, 1.0, 4096)
+_reference_surfaces = None
+
+
+def reference_ms(runs=1):
+    """Time a fixed mix of Python, NumPy and blit work: a yardstick for how fast the machine is right now
+
+    Virtual machines and laptops change speed every few dozen milliseconds, so it runs right before
+    every timed iteration and stage times are compared relative to it."""
+    global _reference_surfaces
+    if _reference_surfaces is None:
+        _reference_surfaces = (pygame.Surface((256, 256)), pygame.Surface((64, 64), pygame.SRCALPHA))
+    target, sprite = _reference_surfaces
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter_ns()
+        total = 0
+        for i in range(500):
+            total += i * i
+        for _ in range(20):
+            np.minimum.accumulate(_reference_data * 1.5 - _reference_data[::-1])
+        target.blits([(sprite, (i * 3 % 192, i * 7 % 192)) for i in range(100)], doreturn=False)
+        samples.append((time.perf_counter_ns() - start) / 1e6)
+    return _iqm(samples)
+
+
+def time_stage(scenario, setup, run, iterations=ITERATIONS, warmup=WARMUP):
+    """Time one stage on a scenario and return per-call statistics in milliseconds"""
+    game_state = scenario.game_state
+    samples = []
+    references = []
+    # A collection landing inside one timed run is the biggest single source of outliers
+    gc.collect()
+    gc.disable()
+    try:
+        for i in range(warmup + iterations):
+            reference = reference_ms()
+            setup(game_state)
+            start = time.perf_counter_ns()
+            run(game_state)
+            elapsed = time.perf_counter_ns() - start
+            scenario.restore()
+            if i >= warmup:
+                samples.append(elapsed / 1e6)
+                references.append(reference)
+    finally:
+        gc.enable()
+    relative = [sample / reference for sample, reference in zip(samples, references)]
+    samples.sort()
+    return {
+        'median_ms': statistics.median(samples),
+        'mean_ms': statistics.fmean(samples),
+        'iqm_ms': _iqm(samples),
+        'min_ms': samples[0],
+        'p95_ms': samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+        'relative_iqm': _iqm(relative),  # In units of the reference workload timed beside each run
+        'reference_ms': _iqm(references),
+        'iterations': iterations,
+    }
+
+
+def run_benchmarks(scenarios=SCENARIOS, stages=STAGES, iterations=ITERATIONS, warmup=WARMUP, log=None):
+    """Run every stage on every scenario and return a JSON-serializable results dict"""
+    results = {}
+    for scenario in scenarios:
+        scenario.build()
+        results[scenario.name] = {}
+        for name, (setup, run) in stages.items():
+            results[scenario.name][name] = time_stage(scenario, setup, run, iterations, warmup)
+            if log:
+                log(f"{scenario.name:<16} {name:<18} {results[scenario.name][name]['median_ms']:9.3f} ms")
+    return {
+        'version': RESULTS_VERSION,
+        'meta': {
+            'python': platform.python_version(),
+            'pygame': pygame.version.ver,
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'system': platform.system(),
+            'iterations': iterations,
+            'warmup': warmup,
+        },
+        'results': results,
+    }
+
+
+def compare(current, baseline, tolerance=0.25, metric='relative_iqm', min_delta_ms=0.05):
+    """Return (scenario, stage, message) for every stage whose metric got slower than the baseline allows
+
+    Both sides are put in today's milliseconds using the reference workload, so a busy host doesn't
+    show up as a slowdown of every stage."""
+    regressions = []
+    for scenario, stages in current['results'].items():
+        for stage, stats in stages.items():
+            base = baseline['results'].get(scenario, {}).get(stage)
+            if base is None or metric not in base or 'reference_ms' not in base:
+                continue  # New stage, scenario or statistic, nothing to compare against
+            if metric == 'relative_iqm':
+                now, before = stats[metric] * stats['reference_ms'], base[metric] * stats['reference_ms']
+            else:
+                now, before = stats[metric], base[metric] * stats['reference_ms'] / base['reference_ms']
+            # Tiny stages are all noise, require an absolute slowdown as well as a relative one
+            if now > before * (1 + tolerance) and now - before > min_delta_ms:
+                regressions.append((scenario, stage, f"{scenario}/{stage}: {before:.3f} ms -> {now:.3f} ms "
+                                    f"(+{(now / before - 1) * 100 if before else float('inf'):.0f}%)"))
+    return regressions
+
+
+def confirm(regressions, baseline, retries=RETRIES, iterations=ITERATIONS, warmup=WARMUP, log=None, **kwargs):
+    """Time the regressed stages again and keep only the ones that are slow every time
+
+    A stage caught in a slow patch of the host is rarely caught again, a real slowdown always is."""
+    for attempt in range(retries):
+        if not regressions:
+            break
+        if log:
+            log(f"Re-timing {len(regressions)} slower stage(s) ({attempt + 1}/{retries})")
+        scenarios = [s for s in SCENARIOS if any(s.name == scenario for scenario, _, _ in regressions)]
+        stages = {name: STAGES[name] for _, name, _ in regressions}
+        rerun = compare(run_benchmarks(scenarios, stages, iterations, warmup), baseline, **kwargs)
+        still_slow = {(scenario, stage) for scenario, stage, _ in rerun}
+        regressions = [r for r in regressions if (r[0], r[1]) in still_slow]
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks",
+                                     description="Time the game's update and render stages")
+    parser.add_argument('--iterations', type=int, default=ITERATIONS, help="timed runs per stage")
+    parser.add_argument('--warmup', type=int, default=WARMUP, help="untimed runs per stage")
+    parser.add_argument('--scenario', action='append', choices=[s.name for s in SCENARIOS],
+                        help="only run these scenarios (repeatable)")
+    parser.add_argument('--stage', action='append', choices=sorted(STAGES),
+                        help="only run these stages (repeatable)")
+    parser.add_argument('--output', help="write results as JSON to this file ('-' for stdout)")
+    # Timings only mean something on the machine that made them, so the baseline is local and never committed
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="baseline results to compare against")
+    parser.add_argument('--save-baseline', action='store_true',
+                        help="record these results as the baseline for later --compare runs on this machine")
+    parser.add_argument('--compare', action='store_true',
+                        help="fail if a stage got slower than the baseline (make one first with --save-baseline)")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="allowed slowdown before failing (0.25 = 25%%)")
+    parser.add_argument('--retries', type=int, default=RETRIES,
+                        help="times a slower stage is re-timed, it only fails if it is slower every time")
+    # Each run divided by the reference beside it follows the host's slow and fast patches, the interquartile
+    # mean then drops the runs a scheduler hiccup slowed down without hinging on one lucky run like min
+    parser.add_argument('--metric', choices=('relative_iqm', 'iqm_ms', 'min_ms', 'median_ms', 'mean_ms', 'p95_ms'),
+                        default='relative_iqm', help="statistic compared against the baseline")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    scenarios = [s for s in SCENARIOS if not args.scenario or s.name in args.scenario]
+    stages = {name: stage for name, stage in STAGES.items() if not args.stage or name in args.stage}
+
+    log = lambda line: print(line, file=sys.stderr)
+    results = run_benchmarks(scenarios, stages, args.iterations, args.warmup, log=log)
+
+    if args.output == '-':
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    elif args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        log(f"Saved baseline to {args.baseline}")
+        return 0
+
+    if not args.compare:
+        return 0
+    if not os.path.exists(args.baseline):
+        log(f"No baseline at {args.baseline}, run with --save-baseline on this machine to create one")
+        return 1
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance, args.metric)
+    regressions = confirm(regressions, baseline, args.retries, args.iterations, args.warmup, log=log,
+                          tolerance=args.tolerance, metric=args.metric)
+    for _, _, line in regressions:
+        log(f"REGRESSION {line}")
+    if regressions:
+        log(f"{len(regressions)} stage(s) slower than baseline by more than {args.tolerance:.0%}")
+        return 1
+    log("No regressions against baseline")
+    return 0
@@ -0,0 +1,58 @@
+import numpy as np
+import main as game
+from timestep import sim_clock
+from rng import rng as game_rng
+
+
+class Scenario:
+    """Deterministic game state with a fixed number of enemies and trash items"""
+    def __init__(self, name, enemies=100, trash=7, spread=600, seed=1234):
+        self.name = name
+        self.num_enemies = enemies
+        self.num_trash = trash
+        self.spread = spread  # Enemies are placed within this many px of the player
+        self.seed = seed
+        self.game_state = None
+        self._snapshot = None
+
+    def build(self):
+        """Create the game state; the same seed always gives the same layout"""
+        game_rng.seed(self.seed)
+        rng = np.random.default_rng(self.seed)
+        sim_clock.reset(10000)  # Past every startup cooldown
+
+        game_state = game.initialize_game()
+        game_state.world.spawn_trash(self.num_trash)
+
+        player = game_state.player
+        player.pos.update(1200, 600)  # Away from the NPC safezone so enemies chase
+        player.sync_rect()
+        game_state.world.stream(player.pos)  # Live chunks and flow field window around the player, as in play
+        player.has_sword = True
+        game_state.mission_started = True
+        game_state.mission_complete = True
+
+        enemies = game_state.enemies
+        enemies.clear()
+        offsets = rng.uniform(-self.spread, self.spread, size=(self.num_enemies, 2))
+        points = np.clip(offsets + player.pos, 0, (game.MAP_WIDTH, game.MAP_HEIGHT))
+        for x, y in points:
+            enemies.spawn((x, y), speed=1, image=game_state.enemy_img)
+
+        game_state.camera_offset.update(player.pos.x - game.WIDTH // 2, player.pos.y - game.HEIGHT // 2)
+        self.game_state = game_state
+        self._snapshot = game_state.snapshot()
+        return game_state
+
+    def restore(self):
+        """Undo whatever a stage changed so every iteration sees the same state"""
+        self.game_state.restore(self._snapshot)
+
+
+# Default suite: enemy scaling with the stock 7 trash items, plus a trash-heavy world
+SCENARIOS = [
+    Scenario('enemies_100', enemies=100, trash=7),
+    Scenario('enemies_1000', enemies=1000, trash=7),
+    Scenario('enemies_10000', enemies=10000, trash=7),
+    Scenario('trash_1000', enemies=100, trash=1000),
+]
@@ -0,0 +1,86 @@
+import main as game
+from timestep import sim_clock
+
+# Each stage is (setup, run). setup prepares state and is not timed, run is timed.
+# Both take the game state; the runner restores the scenario after every run.
+
+
+def _no_setup(game_state):
+    pass
+
+
+def enemy_movement(game_state):
+    game_state.enemies.update(game_state.player.pos, sim_clock.get_ticks(), dt=1 / game.TICK_RATE,
+                              flow_field=game_state.world.flow_field)
+
+
+def _obstacles_changed(game_state):
+    """Force a rebuild from scratch, as after placing or removing an obstacle"""
+    game_state.world.flow_field.dirty = True
+
+
+def _target_stepped(game_state):
+    """Put the field's target one cell beside the player, so the next update warm-starts from it"""
+    flow_field = game_state.world.flow_field
+    flow_field.update(game_state.player.pos + (flow_field.cell_size, 0))
+
+
+def flow_field(game_state):
+    game_state.world.flow_field.update(game_state.player.pos)
+
+
+def _swing(game_state):
+    """Start a fresh swing one cooldown after the last, with the hitbox already active"""
+    player = game_state.player
+    sim_clock.advance(player.sword.cooldown + 1)
+    player.attack(sim_clock.get_ticks())
+    player.sword.attack_frame = min(player.sword.active_hit_frames)
+
+
+def sword_attack(game_state):
+    game.handle_sword_attack(game_state.player, game_state.enemies, game_state)
+
+
+def enemy_collisions(game_state):
+    game.handle_enemy_collisions(game_state.player, game_state.enemies, game_state.health_system)
+
+
+def trash_pickup(game_state):
+    game.handle_trash_pickup(game_state.player, game_state.world, game_state)
+
+
+def background(game_state):
+    game_state.background.draw(game.screen, game_state.camera_offset)
+
+
+def entity_draw(game_state):
+    screen = game.screen
+    camera = game_state.camera_offset
+    world = game_state.world
+    world.draw_landfill(screen, camera)
+    world.draw_trash(screen, camera)
+    shadow_positions = [(x - camera.x, y - camera.y) for x, y in game_state.enemies.positions()]
+    shadow_positions.append((game_state.player.pos.x - camera.x, game_state.player.pos.y - camera.y))
+    game.draw_shadows(screen, shadow_positions)
+    game_state.enemies.draw(screen, camera)
+    game_state.player.draw(screen, camera)
+    game_state.npc.draw(screen, camera)
+
+
+def hud(game_state):
+    game_state.hud_message = game.active_message(game_state)
+    game_state.hud.update(game_state)
+    game_state.hud.draw(game.screen)
+
+
+STAGES = {
+    'enemy_movement': (_no_setup, enemy_movement),
+    'flow_field_rebuild': (_obstacles_changed, flow_field),
+    'flow_field_step': (_target_stepped, flow_field),
+    'sword_attack': (_swing, sword_attack),
+    'enemy_collisions': (_no_setup, enemy_collisions),
+    'trash_pickup': (_no_setup, trash_pickup),
+    'background': (_no_setup, background),
+    'entity_draw': (_no_setup, entity_draw),
+    'hud': (_no_setup, hud),
+}
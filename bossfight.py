@@ -1,13 +1,13 @@
 import pygame
-import random
 import math
+import sys
+from dirty_rects import DirtyRectRenderer
+from rng import rng
+from audio_manager import audio
+from scene import Scene, SceneManager
 
-pygame.init()
-
-# Screen setup
+# Screen setup (when run on its own)
 WIDTH, HEIGHT = 800, 600
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Melee Boss Fight")
 
 # Colors
 YELLOW = (255, 255, 0)
@@ -18,139 +18,189 @@ GREEN = (0, 255, 0)
 WHITE = (255, 255, 255)
 BLUE = (0, 200, 255)
 
-# Clock
-clock = pygame.time.Clock()
+medikit_rng = rng.stream('medikit')  # Medikit drop positions
+
 FPS = 60
+max_frame_steps = 5  # A stalled frame catches up at most this many frames, like the overworld's fixed timestep
 
 # Player
 player_size = 50
-player_x = WIDTH // 2
-player_y = HEIGHT - player_size - 10
 player_speed = 6
-player_health = 100
 attack_range = 70
 
 # Boss
 boss_size = 100
-boss_x = WIDTH // 2 - boss_size // 2
-boss_y = 50
-boss_health = 200
 boss_speed = 2
 
 # Medikit
 medikit_size = 30
-medikit_active = False
-medikit_x = 0
-medikit_y = 0
-medikit_timer = 0
 medikit_spawn_delay = 5000  # milliseconds
-last_medikit_spawn = pygame.time.get_ticks()
-
-# Fonts
-font = pygame.font.SysFont(None, 40)
-
-# Helper functions
-def draw_player(x, y):
-    pygame.draw.rect(screen, YELLOW, (x, y, player_size, player_size))
 
-def draw_boss(x, y):
-    pygame.draw.rect(screen, BROWN, (x, y, boss_size, boss_size))
-
-def draw_health_bar(x, y, health, max_health, width=100, height=10):
-    ratio = max(0, health / max_health)
-    pygame.draw.rect(screen, RED, (x, y, width, height))
-    pygame.draw.rect(screen, GREEN, (x, y, width * ratio, height))
 
 def is_collision(ax, ay, bx, by, size_a, size_b):
     return math.hypot(ax - bx, ay - by) < (size_a + size_b) // 2
 
-# Game loop
-running = True
-game_over = False
-winner = None
-
-while running:
-    screen.fill(BLACK)
-    clock.tick(FPS)
-
-    current_time = pygame.time.get_ticks()
-
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
 
+class BossFight(Scene):
+    """Melee boss fight on a single screen; after it ends any key returns to return_scene"""
+    def __init__(self, width=WIDTH, height=HEIGHT, dirty_rects=False, return_scene=None):
+        self.width = width
+        self.height = height
+        self.renderer = DirtyRectRenderer((width, height), enabled=dirty_rects)
+        self.return_scene = return_scene  # None: the fight is the whole program, quit when it ends
+        self.font = None
+        self.result_text = None  # Rendered once when the fight ends, the result screen is then static
+        self.result_drawn = False
+        self.reset()
+
+    def preload(self):
+        """Fonts and sounds, cheap enough for the main thread"""
+        self.font = pygame.font.SysFont(None, 40)
+        audio.load_sound('swing', "assets/weapons/sword.wav", category='weapon', priority=1, volume=0.3)
+        audio.load_sound('boss_hit', "assets/weapons/sword.wav", category='combat', priority=2, volume=0.6)
+
+    def reset(self):
+        self.player_x = self.width // 2
+        self.player_y = self.height - player_size - 10
+        self.player_health = 100
+        self.boss_x = self.width // 2 - boss_size // 2
+        self.boss_y = 50
+        self.boss_health = 200
+        self.medikit_active = False
+        self.medikit_x = 0
+        self.medikit_y = 0
+        self.since_medikit = 0  # Fight time in ms since the last medikit was picked up
+        self.game_over = False
+        self.winner = None
+        self.result_text = None
+
+    def enter(self, previous):
+        pygame.display.set_caption("Melee Boss Fight")
+        if self.game_over:
+            self.reset()  # A finished fight starts over, one left mid-fight carries on
+        self.invalidate()
+
+    def invalidate(self):
+        self.renderer.invalidate()
+        self.result_drawn = False
+
+    def is_idle(self):
+        return self.game_over  # The result screen only waits for a key
+
+    def player_center(self):
+        return (self.player_x + player_size // 2, self.player_y + player_size // 2)
+
+    def boss_center(self):
+        return (self.boss_x + boss_size // 2, self.boss_y + boss_size // 2)
+
+    def listener(self):
+        return self.player_center()
+
+    def handle_event(self, event):
         # Mouse click attack
-        if event.type == pygame.MOUSEBUTTONDOWN and not game_over:
-            distance = math.hypot((player_x + player_size // 2) - (boss_x + boss_size // 2),
-                                  (player_y + player_size // 2) - (boss_y + boss_size // 2))
+        if event.type == pygame.MOUSEBUTTONDOWN and not self.game_over:
+            player_center, boss_center = self.player_center(), self.boss_center()
+            distance = math.hypot(player_center[0] - boss_center[0], player_center[1] - boss_center[1])
+            audio.play_sound('swing', player_center)
             if distance < attack_range:
-                boss_health -= 20
+                self.boss_health -= 20
+                audio.play_sound('boss_hit', boss_center)
+
+        if event.type == pygame.KEYDOWN and self.game_over:
+            if self.return_scene is None:
+                self.manager.quit()
+            else:
+                self.manager.switch(self.return_scene)
+
+    def update(self, dt):
+        """Advance by dt seconds; speeds and damage are per frame at FPS and scaled to the frames dt covers"""
+        if self.game_over:
+            return
+        steps = min(dt * FPS, max_frame_steps)  # A 15 fps frame is 4 steps, so the fight keeps its speed
+        self.since_medikit += steps * 1000 / FPS
+        move = player_speed * steps
 
-    if not game_over:
         # Player movement
         keys = pygame.key.get_pressed()
-        if keys[pygame.K_LEFT] and player_x > 0:
-            player_x -= player_speed
-        if keys[pygame.K_RIGHT] and player_x < WIDTH - player_size:
-            player_x += player_speed
-        if keys[pygame.K_UP] and player_y > 0:
-            player_y -= player_speed
-        if keys[pygame.K_DOWN] and player_y < HEIGHT - player_size:
-            player_y += player_speed
+        if keys[pygame.K_LEFT] and self.player_x > 0:
+            self.player_x = max(0, self.player_x - move)
+        if keys[pygame.K_RIGHT] and self.player_x < self.width - player_size:
+            self.player_x = min(self.width - player_size, self.player_x + move)
+        if keys[pygame.K_UP] and self.player_y > 0:
+            self.player_y = max(0, self.player_y - move)
+        if keys[pygame.K_DOWN] and self.player_y < self.height - player_size:
+            self.player_y = min(self.height - player_size, self.player_y + move)
 
         # Boss movement towards player
-        dx = player_x - boss_x
-        dy = player_y - boss_y
+        dx = self.player_x - self.boss_x
+        dy = self.player_y - self.boss_y
         distance = math.hypot(dx, dy)
         if distance != 0:
-            boss_x += boss_speed * dx / distance
-            boss_y += boss_speed * dy / distance
+            self.boss_x += boss_speed * steps * dx / distance
+            self.boss_y += boss_speed * steps * dy / distance
 
         # Clamp boss inside screen
-        boss_x = max(0, min(WIDTH - boss_size, boss_x))
-        boss_y = max(0, min(HEIGHT - boss_size, boss_y))
+        self.boss_x = max(0, min(self.width - boss_size, self.boss_x))
+        self.boss_y = max(0, min(self.height - boss_size, self.boss_y))
 
         # Boss damages player if touches
-        if is_collision(player_x, player_y, boss_x, boss_y, player_size, boss_size):
-            player_health -= 1
+        if is_collision(self.player_x, self.player_y, self.boss_x, self.boss_y, player_size, boss_size):
+            self.player_health -= steps
 
         # Spawn medikit if enough time passed and it's not active
-        if not medikit_active and current_time - last_medikit_spawn > medikit_spawn_delay:
-            medikit_x = random.randint(0, WIDTH - medikit_size)
-            medikit_y = random.randint(0, HEIGHT - medikit_size)
-            medikit_active = True
+        if not self.medikit_active and self.since_medikit > medikit_spawn_delay:
+            self.medikit_x = medikit_rng.randint(0, self.width - medikit_size)
+            self.medikit_y = medikit_rng.randint(0, self.height - medikit_size)
+            self.medikit_active = True
 
         # Check for medikit pickup
-        if medikit_active and is_collision(player_x, player_y, medikit_x, medikit_y, player_size, medikit_size):
-            player_health += 20
-            if player_health > 100:
-                player_health = 100
-            medikit_active = False
-            last_medikit_spawn = pygame.time.get_ticks()
+        if self.medikit_active and is_collision(self.player_x, self.player_y, self.medikit_x, self.medikit_y,
+                                                player_size, medikit_size):
+            self.player_health = min(100, self.player_health + 20)
+            self.medikit_active = False
+            self.since_medikit = 0
 
         # Win/Lose conditions
-        if boss_health <= 0:
-            game_over = True
-            winner = "Player Wins!"
-        if player_health <= 0:
-            game_over = True
-            winner = "Boss Wins!"
-
-        # Draw everything
-        draw_player(player_x, player_y)
-        draw_boss(boss_x, boss_y)
-        draw_health_bar(10, 10, player_health, 100)
-        draw_health_bar(WIDTH - 110, 10, boss_health, 200)
-
-        if medikit_active:
-            pygame.draw.rect(screen, BLUE, (medikit_x, medikit_y, medikit_size, medikit_size))
-
-    else:
-        text = font.render(winner, True, WHITE)
-        screen.blit(text, (WIDTH // 2 - 100, HEIGHT // 2))
-
-
-
-    pygame.display.update()
-
-pygame.quit()
+        if self.boss_health <= 0:
+            self.game_over = True
+            self.winner = "Player Wins!"
+        if self.player_health <= 0:
+            self.game_over = True
+            self.winner = "Boss Wins!"
+
+    def draw_health_bar(self, screen, x, y, health, max_health, width=100, height=10):
+        ratio = max(0, health / max_health)
+        dirty = pygame.draw.rect(screen, RED, (x, y, width, height))
+        pygame.draw.rect(screen, GREEN, (x, y, width * ratio, height))
+        return dirty
+
+    def draw(self, screen):
+        if self.game_over and self.result_drawn:
+            return
+        renderer = self.renderer
+        renderer.begin_frame()
+        screen.fill(BLACK)
+        if not self.game_over:
+            renderer.mark(pygame.draw.rect(screen, YELLOW, (self.player_x, self.player_y, player_size, player_size)))
+            renderer.mark(pygame.draw.rect(screen, BROWN, (self.boss_x, self.boss_y, boss_size, boss_size)))
+            renderer.mark(self.draw_health_bar(screen, 10, 10, self.player_health, 100))
+            renderer.mark(self.draw_health_bar(screen, self.width - 110, 10, self.boss_health, 200))
+
+            if self.medikit_active:
+                renderer.mark(pygame.draw.rect(screen, BLUE, (self.medikit_x, self.medikit_y,
+                                                              medikit_size, medikit_size)))
+        else:
+            if self.result_text is None:
+                self.result_text = self.font.render(self.winner, True, WHITE)
+            renderer.mark(screen.blit(self.result_text, (self.width // 2 - 100, self.height // 2)))
+            self.result_drawn = True
+        renderer.present()
+
+
+if __name__ == "__main__":
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    manager = SceneManager(screen, FPS)
+    manager.add('bossfight', BossFight(dirty_rects="--dirty-rects" in sys.argv))
+    manager.run('bossfight')
+    pygame.quit()
@@ -0,0 +1,114 @@
+import os
+import atexit
+import shutil
+import struct
+import tempfile
+import weakref
+from collections import OrderedDict
+import numpy as np
+
+_COUNTS = struct.Struct('<II')  # Enemies and trash items in a frozen chunk
+
+
+def pack_chunk(enemies, trash):
+    """Frozen form of a chunk: entity counts, then the raw enemy and trash record arrays"""
+    return _COUNTS.pack(len(enemies), len(trash)) + enemies.tobytes() + trash.tobytes()
+
+
+def unpack_chunk(blob, enemy_dtype, trash_dtype):
+    """Record arrays of a pack_chunk() blob (read-only views, no copy)"""
+    num_enemies, num_trash = _COUNTS.unpack_from(blob)
+    enemies = np.frombuffer(blob, enemy_dtype, num_enemies, _COUNTS.size)
+    trash = np.frombuffer(blob, trash_dtype, num_trash, _COUNTS.size + enemies.nbytes)
+    return enemies, trash
+
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class SpilledChunk:
+    """A frozen chunk on disk; its file is never rewritten, so snapshots can keep referring to it"""
+    __slots__ = ('path', '__weakref__')
+
+    def __init__(self, path):
+        self.path = path
+        # The file goes once neither the cache nor any snapshot holds this chunk
+        weakref.finalize(self, _remove_quietly, path)
+
+    def read(self):
+        with open(self.path, 'rb') as f:
+            return f.read()
+
+
+def chunk_bytes(stored):
+    """Blob of a stored chunk, reading it back if it was spilled"""
+    return stored.read() if isinstance(stored, SpilledChunk) else stored
+
+
+class ChunkCache:
+    """Dormant chunks: the most recently visited stay in memory (LRU), the rest are spilled to disk"""
+    def __init__(self, max_resident=64, directory=None):
+        self.max_resident = max_resident
+        self.directory = directory  # Created on the first spill if not given
+        self.resident = OrderedDict()  # (col, row) -> bytes, least recently used first
+        self.spilled = {}  # (col, row) -> SpilledChunk
+        self.spills = 0
+
+    def put(self, key, blob):
+        """Store a frozen chunk, spilling the least recently used ones past max_resident"""
+        self.spilled.pop(key, None)
+        self.resident[key] = blob
+        self.resident.move_to_end(key)
+        while len(self.resident) > self.max_resident:
+            old_key, old_blob = self.resident.popitem(last=False)
+            self.spilled[old_key] = self._spill(old_key, old_blob)
+
+    def take(self, key):
+        """Remove and return a chunk's blob (None if the chunk holds nothing)"""
+        blob = self.resident.pop(key, None)
+        if blob is None:
+            stored = self.spilled.pop(key, None)
+            blob = stored.read() if stored is not None else None
+        return blob
+
+    def read(self, key):
+        """A chunk's blob without removing it or touching the LRU order"""
+        if key in self.resident:
+            return self.resident[key]
+        return self.spilled[key].read()
+
+    def _spill(self, key, blob):
+        if self.directory is None:
+            self.directory = tempfile.mkdtemp(prefix="chunks-")
+            atexit.register(shutil.rmtree, self.directory, True)
+        # A fresh file per spill; older ones may still be referenced by a snapshot
+        path = os.path.join(self.directory, f"{key[0]}_{key[1]}_{self.spills}.chunk")
+        with open(path, 'wb') as f:
+            f.write(blob)
+        self.spills += 1
+        return SpilledChunk(path)
+
+    def snapshot(self):
+        """Every stored chunk as {key: bytes or SpilledChunk}; both are immutable so nothing is copied"""
+        state = dict(self.spilled)
+        state.update(self.resident)
+        return state
+
+    def restore(self, state):
+        self.resident.clear()
+        self.spilled.clear()
+        for key, stored in state.items():
+            if isinstance(stored, SpilledChunk):
+                self.spilled[key] = stored
+            else:
+                self.put(key, stored)
+
+    def keys(self):
+        return sorted(self.resident.keys() | self.spilled.keys())
+
+    def __len__(self):
+        return len(self.resident) + len(self.spilled)
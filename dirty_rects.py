@@ -0,0 +1,89 @@
+import pygame
+
+class DirtyRectRenderer:
+    """Presents only the screen areas that changed since the last frame"""
+    def __init__(self, screen_size, enabled=True, scroll_threshold=None, max_rects=64):
+        self.screen_rect = pygame.Rect((0, 0), screen_size)
+        self.enabled = enabled
+        # Between full flips, the parts of the screen nothing was drawn over keep the background as
+        # of the last flip; it may lag the camera by this many px (default 1/32 of the screen)
+        if scroll_threshold is None:
+            scroll_threshold = min(screen_size) // 32
+        self.scroll_threshold = scroll_threshold
+        self.max_rects = max_rects  # Above this many rects a full flip is cheaper
+        self.prev_rects = []
+        self.curr_rects = []
+        self.last_camera = None
+        self.flipped_camera = None  # Camera at the last full flip
+        self.full_redraw = True
+        self.full_frames = 0
+        self.partial_frames = 0
+
+    def invalidate(self):
+        """Force the next present to update the whole screen"""
+        self.full_redraw = True
+
+    def begin_frame(self, camera_offset=None):
+        """Start a frame, checking whether the camera scrolled too far since the last full flip"""
+        self.curr_rects = []
+        if camera_offset is not None:
+            # Compare whole pixels so float noise in the camera doesn't force full flips
+            camera = (round(camera_offset[0]), round(camera_offset[1]))
+            if self.flipped_camera is None:
+                self.full_redraw = True
+            else:
+                # Measured from the last full flip, not the last frame, so slow scrolling can't drift forever
+                dx = abs(camera[0] - self.flipped_camera[0])
+                dy = abs(camera[1] - self.flipped_camera[1])
+                if max(dx, dy) > self.scroll_threshold:
+                    self.full_redraw = True
+            self.last_camera = camera
+
+    def mark(self, rect):
+        """Record a screen rect that was drawn this frame"""
+        if rect and self.enabled:
+            self.curr_rects.append(pygame.Rect(rect))
+
+    def mark_many(self, rects):
+        if self.enabled:
+            self.curr_rects.extend(pygame.Rect(r) for r in rects if r)
+
+    @staticmethod
+    def merge(rects):
+        """Union overlapping rects until none of them overlap"""
+        merged = []
+        for rect in rects:
+            rect = rect.copy()
+            i = 0
+            while i < len(merged):
+                if rect.colliderect(merged[i]):
+                    # Grow and rescan, the union may now touch earlier rects
+                    rect.union_ip(merged.pop(i))
+                    i = 0
+                else:
+                    i += 1
+            merged.append(rect)
+        return merged
+
+    def present(self):
+        """Flip the display or update only the merged dirty rects"""
+        if not self.enabled:
+            pygame.display.flip()
+            return
+
+        rects = self.prev_rects + self.curr_rects
+        if self.full_redraw or len(rects) > self.max_rects:
+            pygame.display.flip()
+            self.full_frames += 1
+            self.flipped_camera = self.last_camera
+        else:
+            rects = [r.clip(self.screen_rect) for r in self.merge(rects)]
+            rects = [r for r in rects if r.width and r.height]
+            if rects:
+                pygame.display.update(rects)
+            self.partial_frames += 1
+
+        # This frame's rects must be cleared next frame, wherever the objects move to
+        self.prev_rects = self.curr_rects
+        self.curr_rects = []
+        self.full_redraw = False
@@ -0,0 +1,354 @@
+import numpy as np
+import pygame
+from timestep import BASE_TICK_RATE
+
+
+class Component:
+    """Named group of per-entity fields; each field becomes one column in an archetype"""
+    __slots__ = ('name', 'fields')
+
+    def __init__(self, name, **fields):
+        self.name = name
+        # field -> (dtype, shape); dtype object means a plain Python list column
+        self.fields = {field: spec if isinstance(spec, tuple) else (spec, ())
+                       for field, spec in fields.items()}
+
+    def __repr__(self):
+        return f"Component({self.name})"
+
+
+# Standard components
+Position = Component('Position', pos=(np.float64, (2,)), prev_pos=(np.float64, (2,)))
+Velocity = Component('Velocity', speed=np.float64)  # Pixels per 1/60 s toward the current target
+Sprite = Component('Sprite', sprite=object)
+Collider = Component('Collider', size=(np.int32, (2,)))  # World rect size around pos
+Health = Component('Health', health=np.int32)
+Cooldown = Component('Cooldown', last_hit=np.int64, death_time=np.int64, is_hit=bool, invulnerable=bool)
+Trigger = Component('Trigger', radius=np.float64)
+
+
+class Archetype:
+    """Entities that share one exact set of components, stored column by column"""
+    def __init__(self, components, capacity=64):
+        self.components = frozenset(components)
+        self.fields = {}
+        for component in sorted(self.components, key=lambda c: c.name):
+            self.fields.update(component.fields)
+        self.array_fields = [f for f, (dtype, _) in self.fields.items() if dtype is not object]
+        self.list_fields = [f for f, (dtype, _) in self.fields.items() if dtype is object]
+        self.count = 0
+        self.capacity = 0
+        self.registry = None
+        self.entities = np.zeros(0, dtype=np.int64)  # Row -> entity id
+        self.rows = {}  # Entity id -> row
+        self.views = []  # Row -> facade (or None); a facade's index always equals its row
+        for field in self.array_fields:
+            dtype, shape = self.fields[field]
+            setattr(self, field, np.zeros((0,) + shape, dtype=dtype))
+        for field in self.list_fields:
+            setattr(self, field, [])
+        self._grow(capacity)
+
+    def has(self, *components):
+        return self.components.issuperset(components)
+
+    def _grow(self, capacity):
+        """Reallocate every array column with room for at least capacity entities"""
+        capacity = max(capacity, 1)
+        for field in self.array_fields + ['entities']:
+            old = getattr(self, field)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, field, new)
+        self.capacity = capacity
+
+    def add(self, entity, view=None, **values):
+        """Append a row for entity and return it; unspecified fields are zero"""
+        if self.count == self.capacity:
+            self._grow(self.capacity * 2)
+        row = self.count
+        for field in self.array_fields:
+            getattr(self, field)[row] = values.get(field, 0)
+        for field in self.list_fields:
+            getattr(self, field).append(values.get(field))
+        self.entities[row] = entity
+        self.rows[entity] = row
+        self.views.append(view)
+        self.count += 1
+        return row
+
+    def swap_remove(self, row):
+        """Remove row by moving the last row into it; returns the removed entity id"""
+        last = self.count - 1
+        entity = int(self.entities[row])
+        removed = self.views[row]
+        if row != last:
+            for field in self.array_fields:
+                column = getattr(self, field)
+                column[row] = column[last]
+            for field in self.list_fields:
+                column = getattr(self, field)
+                column[row] = column[last]
+            moved = int(self.entities[last])
+            self.entities[row] = moved
+            self.rows[moved] = row
+            self.views[row] = self.views[last]
+            if self.views[row] is not None:
+                self.views[row].index = row
+        for field in self.list_fields:
+            getattr(self, field).pop()
+        self.views.pop()
+        del self.rows[entity]
+        if removed is not None:
+            removed.index = -1
+        self.count = last
+        if self.registry is not None:
+            self.registry.locations.pop(entity, None)
+        return entity
+
+    def clear(self):
+        for view in self.views:
+            if view is not None:
+                view.index = -1
+        if self.registry is not None:
+            for entity in self.rows:
+                self.registry.locations.pop(entity, None)
+        for field in self.list_fields:
+            getattr(self, field).clear()
+        self.views.clear()
+        self.rows.clear()
+        self.count = 0
+
+    @property
+    def record_dtype(self):
+        """Structured dtype for one row of every array column plus its entity id"""
+        return np.dtype([(field, *self.fields[field]) for field in self.array_fields] + [('entity', np.int64)])
+
+    def freeze(self, rows):
+        """Remove rows and return them as a structured record array (list columns are dropped)"""
+        rows = np.asarray(rows, dtype=np.intp)
+        records = np.zeros(len(rows), dtype=self.record_dtype)
+        for field in self.array_fields:
+            records[field] = getattr(self, field)[rows]
+        records['entity'] = self.entities[rows]
+        # Descending order keeps pending rows valid while swapping from the end
+        for row in np.sort(rows)[::-1].tolist():
+            self.swap_remove(row)
+        return records
+
+    def thaw(self, records, make_view=None, **list_values):
+        """Append freeze() records under their original entity ids; list columns are set from list_values"""
+        n = len(records)
+        start, stop = self.count, self.count + n
+        if stop > self.capacity:
+            self._grow(max(self.capacity * 2, stop))
+        for field in self.array_fields:
+            getattr(self, field)[start:stop] = records[field]
+        for field in self.list_fields:
+            getattr(self, field).extend([list_values.get(field)] * n)
+        entities = records['entity'].tolist()
+        self.entities[start:stop] = entities
+        self.rows.update(zip(entities, range(start, stop)))
+        self.views.extend(make_view(row) if make_view is not None else None for row in range(start, stop))
+        self.count = stop
+        if self.registry is not None:
+            self.registry.locations.update((entity, self) for entity in entities)
+
+    def snapshot(self):
+        """Copies of the live rows of every column (list columns keep their references)"""
+        n = self.count
+        arrays = tuple(getattr(self, field)[:n].copy() for field in self.array_fields + ['entities'])
+        lists = tuple(list(getattr(self, field)) for field in self.list_fields)
+        return (n, arrays, lists)
+
+    def restore(self, state, make_view=None):
+        """Put back a snapshot(); make_view(row) rebuilds facades for rows that had none"""
+        n, arrays, lists = state
+        if n > self.capacity:
+            self._grow(n)
+        for field, column in zip(self.array_fields + ['entities'], arrays):
+            getattr(self, field)[:n] = column
+        for field, column in zip(self.list_fields, lists):
+            getattr(self, field)[:] = column
+        for view in self.views[n:]:
+            if view is not None:
+                view.index = -1
+        del self.views[n:]
+        if make_view is not None:
+            self.views.extend(make_view(row) for row in range(len(self.views), n))
+        else:
+            self.views.extend([None] * (n - len(self.views)))
+        self.count = n
+        if self.registry is not None:
+            for entity in self.rows:
+                self.registry.locations.pop(entity, None)
+        self.rows = {int(entity): row for row, entity in enumerate(self.entities[:n].tolist())}
+        if self.registry is not None:
+            self.registry.locations.update((entity, self) for entity in self.rows)
+
+    def __len__(self):
+        return self.count
+
+
+class Registry:
+    """Hands out entity ids and keeps one archetype per distinct component set"""
+    def __init__(self):
+        self.archetypes = {}  # frozenset(components) -> Archetype
+        self.locations = {}  # Entity id -> Archetype
+        self.next_id = 1
+        self._queries = {}
+
+    def archetype(self, *components, archetype=None):
+        """Get (or create / register) the archetype for exactly these components"""
+        key = frozenset(components)
+        found = self.archetypes.get(key)
+        if found is None:
+            found = archetype if archetype is not None else Archetype(key)
+            found.registry = self
+            self.archetypes[key] = found
+            self._queries.clear()  # Cached queries may now match one more archetype
+        return found
+
+    def create(self, *components, view=None, entity=None, **values):
+        """Create an entity with the given components and field values, return its id"""
+        return self.spawn_into(self.archetype(*components), view, entity, **values)
+
+    def spawn_into(self, archetype, view=None, entity=None, **values):
+        """Create an entity in a registered archetype, attaching view as its facade (entity reuses a stored id)"""
+        if entity is None:
+            entity = self.new_id()
+        if view is not None:
+            view.archetype = archetype
+            view.index = archetype.count
+        archetype.add(entity, view, **values)
+        self.locations[entity] = archetype
+        return entity
+
+    def new_id(self):
+        entity = self.next_id
+        self.next_id += 1
+        return entity
+
+    def destroy(self, entity):
+        archetype = self.locations.get(entity)
+        if archetype is not None:
+            archetype.swap_remove(archetype.rows[entity])
+
+    def location(self, entity):
+        """(archetype, row) of a live entity"""
+        archetype = self.locations[entity]
+        return archetype, archetype.rows[entity]
+
+    def query(self, *components):
+        """Every archetype that has at least these components"""
+        key = frozenset(components)
+        matches = self._queries.get(key)
+        if matches is None:
+            matches = self._queries[key] = [a for a in self.archetypes.values() if a.has(*components)]
+        return matches
+
+
+class EntityFacade:
+    """Base for thin objects that read and write one row of an archetype"""
+    __slots__ = ('archetype', 'index')
+
+    def __init__(self, archetype, index):
+        self.archetype = archetype
+        self.index = index  # Kept up to date by the archetype, -1 once removed
+
+    @property
+    def entity(self):
+        return int(self.archetype.entities[self.index])
+
+    def is_alive(self):
+        return self.index >= 0
+
+
+def field_property(field):
+    """Facade property for one scalar column"""
+    def getter(self):
+        return getattr(self.archetype, field)[self.index].item()
+
+    def setter(self, value):
+        getattr(self.archetype, field)[self.index] = value
+    return property(getter, setter)
+
+
+def vector_property(field):
+    """Facade property for a 2-wide column, read as a Vector2 copy and written back whole"""
+    def getter(self):
+        x, y = getattr(self.archetype, field)[self.index]
+        return pygame.Vector2(x, y)
+
+    def setter(self, value):
+        getattr(self.archetype, field)[self.index] = (value[0], value[1])
+    return property(getter, setter)
+
+
+# Systems: each works on whole archetypes at once
+
+def store_previous_system(registry):
+    """Copy pos to prev_pos for render interpolation"""
+    for archetype in registry.query(Position):
+        n = archetype.count
+        archetype.prev_pos[:n] = archetype.pos[:n]
+
+
+def chase_system(archetype, target_pos, dt=1 / BASE_TICK_RATE, active=None):
+    """Move rows toward target at their speed; active masks which rows may move"""
+    n = archetype.count
+    if n == 0:
+        return
+    pos = archetype.pos[:n]
+    delta = np.array((target_pos[0], target_pos[1]), dtype=np.float64) - pos
+    dist = np.hypot(delta[:, 0], delta[:, 1])
+    moving = dist > 0 if active is None else active & (dist > 0)
+    # Speeds are pixels per 1/60 s, dt keeps movement the same at any tick rate
+    step = np.divide(archetype.speed[:n] * (dt * BASE_TICK_RATE), dist, out=np.zeros(n), where=moving)
+    pos += delta * step[:, None]
+
+
+def steer_system(archetype, directions, dt=1 / BASE_TICK_RATE, active=None):
+    """Move rows along (n, 2) unit directions at their speed; active masks which rows may move"""
+    n = archetype.count
+    step = archetype.speed[:n] * (dt * BASE_TICK_RATE)
+    if active is not None:
+        step = np.where(active, step, 0.0)
+    archetype.pos[:n] += directions * step[:, None]
+
+
+def cooldown_system(archetype, current_time, hit_effect_duration, hit_cooldown):
+    """Expire hit flashes and invulnerability windows"""
+    n = archetype.count
+    since_hit = current_time - archetype.last_hit[:n]
+    archetype.is_hit[:n] &= since_hit <= hit_effect_duration
+    archetype.invulnerable[:n] &= since_hit <= hit_cooldown
+
+
+def collider_rects(archetype, rows=None):
+    """Top-left and size arrays of every collider (or only those of rows), centered on pos"""
+    if rows is None:
+        rows = slice(0, archetype.count)
+    size = archetype.size[rows]
+    return np.trunc(archetype.pos[rows] - size // 2), size
+
+
+def overlap_rows(archetype, rect, topleft=None, size=None):
+    """Rows whose collider rect overlaps rect"""
+    if topleft is None:
+        topleft, size = collider_rects(archetype)
+    x, y = topleft[:, 0], topleft[:, 1]
+    return ((x < rect.right) & (x + size[:, 0] > rect.left) &
+            (y < rect.bottom) & (y + size[:, 1] > rect.top))
+
+
+def trigger_system(registry, pos):
+    """Entities whose trigger radius contains pos, as {entity id: archetype}"""
+    inside = {}
+    for archetype in registry.query(Position, Trigger):
+        n = archetype.count
+        delta = archetype.pos[:n] - (pos[0], pos[1])
+        hit = np.hypot(delta[:, 0], delta[:, 1]) <= archetype.radius[:n]
+        for row in np.flatnonzero(hit).tolist():
+            inside[int(archetype.entities[row])] = archetype
+    return inside
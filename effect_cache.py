@@ -0,0 +1,71 @@
+import pygame
+from collections import OrderedDict
+
+class EffectCache:
+    """LRU cache of pre-tinted and pre-faded copies of sprite surfaces"""
+    def __init__(self, max_bytes=16 * 1024 * 1024, fade_steps=16):
+        self.max_bytes = max_bytes
+        self.fade_steps = fade_steps
+        self.entries = OrderedDict()  # (source, effect, arg) -> surface
+        self.used_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _surface_bytes(surface):
+        return surface.get_width() * surface.get_height() * surface.get_bytesize()
+
+    def _get(self, key):
+        surface = self.entries.get(key)
+        if surface is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+        return surface
+
+    def _put(self, key, surface):
+        self.misses += 1
+        self.entries[key] = surface
+        self.used_bytes += self._surface_bytes(surface)
+        # Evict least recently used variants until we are back under budget
+        while self.used_bytes > self.max_bytes and len(self.entries) > 1:
+            _, old = self.entries.popitem(last=False)
+            self.used_bytes -= self._surface_bytes(old)
+        return surface
+
+    def tinted(self, source, color, flags=pygame.BLEND_RGBA_MULT):
+        """Return source filled with color using the given blend flags"""
+        key = (source, 'tint', (tuple(color), flags))
+        surface = self._get(key)
+        if surface is None:
+            surface = source.copy()
+            surface.fill(color, special_flags=flags)
+            surface = self._put(key, surface)
+        return surface
+
+    def faded(self, source, alpha):
+        """Return source with its alpha scaled, quantized to fade_steps levels"""
+        top = self.fade_steps - 1
+        step = max(0, min(top, round(alpha * top / 255)))
+        if step == top:
+            return source
+        key = (source, 'fade', step)
+        surface = self._get(key)
+        if surface is None:
+            surface = source.copy()
+            surface.fill((255, 255, 255, step * 255 // top), special_flags=pygame.BLEND_RGBA_MULT)
+            surface = self._put(key, surface)
+        return surface
+
+    def prebake_fade(self, source):
+        """Build every fade step for source up front"""
+        top = self.fade_steps - 1
+        for step in range(top):
+            self.faded(source, step * 255 // top)
+
+    def clear(self):
+        self.entries.clear()
+        self.used_bytes = 0
+
+
+# Shared by enemies, Player and Sword so identical sources share variants
+effects = EffectCache()
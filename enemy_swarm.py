@@ -0,0 +1,262 @@
+import pygame
+import math
+import numpy as np
+from enemy import EnemyBase
+from atlas import blit_source
+from ecs import (Archetype, Registry, EntityFacade, Position, Velocity, Sprite, Collider, Health, Cooldown,
+                 field_property, vector_property, chase_system, steer_system, cooldown_system, collider_rects, overlap_rows)
+from timestep import sim_clock, BASE_TICK_RATE
+
+# Timings shared by every swarm enemy (milliseconds)
+HIT_COOLDOWN = 300
+HIT_EFFECT_DURATION = 150
+DEATH_DURATION = 300
+
+GRID_MIN_ENEMIES = 512  # Below this many enemies queries scan every row instead of the cell index
+
+ENEMY_COMPONENTS = (Position, Velocity, Sprite, Collider, Health, Cooldown)
+
+
+class SwarmEnemy(EntityFacade, EnemyBase):
+    """Slotted, pooled enemy facade over one row of an EnemySwarm"""
+    __slots__ = ()
+
+    # Per-enemy constants live on the class instead of every instance
+    max_health = 3
+    hit_cooldown = HIT_COOLDOWN
+    hit_effect_duration = HIT_EFFECT_DURATION
+    death_duration = DEATH_DURATION
+    knockback_force = 15
+
+    speed = field_property('speed')
+    health = field_property('health')
+    last_hit_time = field_property('last_hit')
+    is_hit = field_property('is_hit')
+    invulnerable = field_property('invulnerable')
+    death_time = field_property('death_time')
+
+    def _set_pos(self, value):
+        self.archetype.pos[self.index] = (value[0], value[1])
+        self.archetype.cell_index = None  # e.g. knocked back into another cell
+
+    pos = property(vector_property('pos').fget, _set_pos)
+
+    @property
+    def swarm(self):
+        return self.archetype
+
+    @property
+    def image(self):
+        return self.archetype.sprite[self.index]
+
+    original_image = image
+
+    @property
+    def rect(self):
+        return self.image.get_rect(center=self.pos)
+
+    def update(self):
+        # Timers are advanced in bulk by EnemySwarm.update
+        return self.is_dead() and sim_clock.get_ticks() - self.death_time > self.death_duration
+
+
+class EnemySwarm(Archetype):
+    """Enemy archetype whose systems update every enemy with vectorized NumPy ops"""
+    def __init__(self, capacity=64, registry=None, map_size=(3000, 3000), cell_size=128):
+        super().__init__(ENEMY_COMPONENTS, capacity)
+        # Uniform grid over enemy centers for rect and radius queries, rebuilt lazily after anything moves
+        self.cell_size = cell_size
+        self.grid_cols = max(1, -(-map_size[0] // cell_size))
+        self.grid_rows = max(1, -(-map_size[1] // cell_size))
+        self.cell_index = None  # (rows sorted by cell, start of each cell in them), None when stale
+        self.reach = 0  # Furthest a collider sticks out from its center
+        # A swarm without a shared registry still needs entity ids
+        registry = registry if registry is not None else Registry()
+        if registry.archetype(*ENEMY_COMPONENTS, archetype=self) is not self:
+            raise ValueError("registry already has an enemy archetype, it can hold only one EnemySwarm")
+        # Facades of removed enemies, handed out again so spawn/kill churn allocates nothing
+        self.free_views = [SwarmEnemy(self, -1) for _ in range(capacity)]
+
+    def _pooled_view(self, row=-1):
+        view = self.free_views.pop() if self.free_views else SwarmEnemy(self, row)
+        view.index = row
+        return view
+
+    def spawn(self, pos, speed, image):
+        """Add an enemy and return its facade (sprites are shared, never copied)"""
+        view = self._pooled_view()
+        self.registry.spawn_into(
+            self, view, pos=(pos[0], pos[1]), prev_pos=(pos[0], pos[1]),
+            speed=speed * 0.8,  # Enemies move a little slower than their nominal speed
+            health=SwarmEnemy.max_health, size=image.get_size(), sprite=image)
+        self.reach = max(self.reach, max(image.get_size()) // 2 + 1)
+        self.cell_index = None
+        return view
+
+    def swap_remove(self, row):
+        """O(1) removal that returns the facade to the pool"""
+        view = self.views[row]
+        self.cell_index = None
+        entity = super().swap_remove(row)
+        self.free_views.append(view)
+        return entity
+
+    def clear(self):
+        views = list(self.views)
+        self.cell_index = None
+        super().clear()
+        self.free_views.extend(views)
+
+    def restore(self, state):
+        """Put back a snapshot(), reusing existing and pooled facades"""
+        surplus = self.views[state[0]:]
+        super().restore(state, make_view=self._pooled_view)
+        self.free_views.extend(surplus)
+        self._after_bulk_add()
+
+    def thaw(self, records, sprite):
+        """Bring back frozen enemies, all drawn with sprite, using pooled facades"""
+        super().thaw(records, self._pooled_view, sprite=sprite)
+        self._after_bulk_add()
+
+    def _after_bulk_add(self):
+        if self.count:
+            self.reach = max(self.reach, int(self.size[:self.count].max()) // 2 + 1)
+        self.cell_index = None
+
+    # Cell index
+    def _cell(self, x, y):
+        """Grid col and row of a world position, off-map clamped to the border cells"""
+        scale = 1 / self.cell_size
+        return (min(max(math.floor(x * scale), 0), self.grid_cols - 1),
+                min(max(math.floor(y * scale), 0), self.grid_rows - 1))
+
+    def _build_cell_index(self):
+        """Counting sort of the rows by the cell their center is in"""
+        cells = np.floor(self.pos[:self.count] * (1 / self.cell_size)).astype(np.intp)
+        np.clip(cells, 0, (self.grid_cols - 1, self.grid_rows - 1), out=cells)
+        keys = cells[:, 1] * self.grid_cols + cells[:, 0]
+        size = self.grid_rows * self.grid_cols
+        starts = np.zeros(size + 1, dtype=np.intp)
+        np.cumsum(np.bincount(keys, minlength=size), out=starts[1:])
+        # Small integer keys let the stable sort run as a radix sort
+        order = np.argsort(keys.astype(np.int16) if size <= 2 ** 15 else keys, kind='stable')
+        self.cell_index = (order, starts)
+
+    def _nearby_rows(self, left, top, right, bottom):
+        """Rows (ascending) of every enemy whose collider could touch the world box left..right, top..bottom"""
+        if self.count < GRID_MIN_ENEMIES:
+            return np.arange(self.count)  # Scanning a few rows is cheaper than indexing them
+        if self.cell_index is None:
+            self._build_cell_index()
+        order, starts = self.cell_index
+        # Rows are indexed by center, so widen the box by how far a collider reaches past it
+        c0, r0 = self._cell(left - self.reach, top - self.reach)
+        c1, r1 = self._cell(right + self.reach, bottom + self.reach)
+        width = self.grid_cols
+        # Each grid row of the box is one contiguous run of the sorted rows
+        spans = [order[starts[r * width + c0]:starts[r * width + c1 + 1]] for r in range(r0, r1 + 1)]
+        found = np.concatenate(spans)
+        found.sort()  # Row order, the same order a full scan returns
+        return found
+
+    def render_positions(self, alpha=1.0):
+        """Positions between the previous and current tick"""
+        n = self.count
+        if alpha >= 1.0:
+            return self.pos[:n]
+        return self.prev_pos[:n] + (self.pos[:n] - self.prev_pos[:n]) * alpha
+
+    def update(self, target_pos, current_time=None, chase=True, dt=1 / BASE_TICK_RATE, flow_field=None):
+        """Move living enemies toward target (along flow_field if given), expire timers and drop finished deaths"""
+        if current_time is None:
+            current_time = sim_clock.get_ticks()
+        n = self.count
+        if n == 0:
+            return
+        alive = self.health[:n] > 0
+        if chase and flow_field is not None:
+            # One shared field for the whole swarm, each enemy just looks up its cell
+            flow_field.update(target_pos)
+            steer_system(self, flow_field.sample(self.pos[:n], target_pos), dt, active=alive)
+        elif chase:
+            # Dead enemies do not move
+            chase_system(self, target_pos, dt, active=alive)
+        cooldown_system(self, current_time, HIT_EFFECT_DURATION, HIT_COOLDOWN)
+        self.cell_index = None
+
+        finished = np.flatnonzero(~alive & (current_time - self.death_time[:n] > DEATH_DURATION))
+        # Descending order keeps pending indices valid while swapping from the end
+        for i in finished[::-1]:
+            self.swap_remove(int(i))
+
+    def draw(self, surface, camera_offset, doreturn=False, alpha=1.0):
+        """Draw the swarm, batching every enemy without hit/death/health effects"""
+        n = self.count
+        if n == 0:
+            return []
+        render_pos = self.render_positions(alpha)
+        # Plain enemies share one sprite, so they go out in a single blits call
+        plain = (self.health[:n] == SwarmEnemy.max_health) & ~self.is_hit[:n]
+        plain_idx = np.flatnonzero(plain)
+        cam = np.array((camera_offset[0], camera_offset[1]))
+        # Same rounding as Rect(center=...): round the center, then offset by half size
+        dests = (np.floor(render_pos[plain_idx] - cam + 0.5).astype(np.int64)
+                 - self.size[plain_idx] // 2).tolist()
+        sources = {}
+        batch = []
+        images = self.sprite
+        for i, dest in zip(plain_idx.tolist(), dests):
+            image = images[i]
+            src = sources.get(id(image))
+            if src is None:
+                src = sources[id(image)] = blit_source(image)
+            batch.append((src[0], dest, src[1]))
+        dirty = surface.blits(batch, doreturn=doreturn) or []
+
+        for i in np.flatnonzero(~plain).tolist():
+            # Shift the camera so the enemy appears at its interpolated position
+            shift = self.pos[i] - render_pos[i]
+            rect = self.views[i].draw(surface, pygame.Vector2(cam[0] + shift[0], cam[1] + shift[1]))
+            if doreturn:
+                dirty.append(rect)
+        return dirty
+
+    def positions(self, alpha=1.0):
+        """Return (interpolated) enemy centers as a list of [x, y] pairs"""
+        return self.render_positions(alpha).tolist()
+
+    def query_rect(self, rect, include_dead=False):
+        """Return enemies whose world rect overlaps rect"""
+        rect = pygame.Rect(rect)
+        if self.count == 0 or rect.width <= 0 or rect.height <= 0:
+            return []
+        rows = self._nearby_rows(rect.left, rect.top, rect.right, rect.bottom)
+        topleft, size = collider_rects(self, rows)
+        hit = overlap_rows(self, rect, topleft, size)
+        if not include_dead:
+            hit &= self.health[rows] > 0
+        return [self.views[i] for i in rows[hit].tolist()]
+
+    def query_radius(self, pos, radius, include_dead=False):
+        """Return enemies whose world rect intersects the circle at pos"""
+        if self.count == 0:
+            return []
+        px, py = pos[0], pos[1]
+        rows = self._nearby_rows(px - radius, py - radius, px + radius, py + radius)
+        topleft, sizes = collider_rects(self, rows)
+        dx = px - np.clip(px, topleft[:, 0], topleft[:, 0] + sizes[:, 0])
+        dy = py - np.clip(py, topleft[:, 1], topleft[:, 1] + sizes[:, 1])
+        hit = dx * dx + dy * dy <= radius * radius
+        if not include_dead:
+            hit &= self.health[rows] > 0
+        return [self.views[i] for i in rows[hit].tolist()]
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        return iter(self.views[:self.count])
+
+    def __getitem__(self, i):
+        return self.views[:self.count][i]
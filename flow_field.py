@@ -0,0 +1,176 @@
+import math
+import numpy as np
+
+BLOCKED_COST = 1000.0  # Cost of stepping through a no-entry cell, high enough to always go around
+# Step costs are integers (diagonal ~ sqrt(2) * straight), so every distance is an exact sum whatever
+# order it was found in: an incrementally updated field is bit-identical to one built from scratch
+STRAIGHT_COST = 10
+DIAGONAL_COST = 14
+
+# 8-connected neighbourhood as (dy, dx, step length)
+_NEIGHBOURS = [(dy, dx, math.hypot(dy, dx)) for dy in (-1, 0, 1) for dx in (-1, 0, 1) if dy or dx]
+# Direction toward each neighbour, after a zero entry for cells no neighbour improves on
+_DIRECTIONS = np.array([(0.0, 0.0)] + [(dx / step, dy / step) for dy, dx, step in _NEIGHBOURS])
+
+
+def _diagonal_lines(rows, cols):
+    """Flat cell indices of both diagonal directions, one diagonal per column of each array
+
+    Scans along axis 0 then run over all diagonals at once; diagonals shorter than the array are
+    padded at the end with index rows * cols, a sentinel cell past the grid."""
+    cells = np.arange(rows * cols).reshape(rows, cols)
+    lines = []
+    for flipped in (cells, cells[:, ::-1]):
+        diagonals = [np.diagonal(flipped, k) for k in range(-(rows - 1), cols)]
+        padded = np.full((min(rows, cols), len(diagonals)), rows * cols)
+        for i, diagonal in enumerate(diagonals):
+            padded[:len(diagonal), i] = diagonal
+        lines.append(padded)
+    return lines
+
+
+class FlowField:
+    """Grid of directions toward one target cell, shared by every enemy that samples it"""
+    def __init__(self, map_size, cell_size=64, origin=(0, 0)):
+        self.cell_size = cell_size
+        self.origin = origin  # World position of the grid's top-left corner
+        self._origin = np.array(origin, dtype=np.float64)
+        self.cols = max(1, math.ceil(map_size[0] / cell_size))
+        self.rows = max(1, math.ceil(map_size[1] / cell_size))
+        self.blocked = np.zeros((self.rows, self.cols), dtype=bool)
+        self.dist = np.full((self.rows, self.cols), np.inf)
+        self.directions = np.zeros((self.rows, self.cols, 2), dtype=np.float64)
+        self.target_cell = None
+        self.dirty = True
+        self.rebuilds = 0
+        self.sweeps = 0  # Rounds of line scans the rebuilds needed in total
+        self._diagonals = _diagonal_lines(self.rows, self.cols)
+        self._scans = None  # Per-line running step costs, kept until the obstacles change
+
+    def cell_of(self, pos):
+        col = min(self.cols - 1, max(0, int((pos[0] - self.origin[0]) // self.cell_size)))
+        row = min(self.rows - 1, max(0, int((pos[1] - self.origin[1]) // self.cell_size)))
+        return row, col
+
+    # Obstacles
+    def block_rect(self, rect):
+        """Mark every cell touched by a world rect as no-entry"""
+        x, y = rect[0] - self.origin[0], rect[1] - self.origin[1]
+        c0, r0 = max(0, x // self.cell_size), max(0, y // self.cell_size)
+        c1 = max(0, min(self.cols, -(-(x + rect[2]) // self.cell_size)))
+        r1 = max(0, min(self.rows, -(-(y + rect[3]) // self.cell_size)))
+        self.blocked[r0:r1, c0:c1] = True
+        self.dirty = True
+
+    def block_circle(self, center, radius):
+        """Mark cells whose center lies inside the circle as no-entry"""
+        half = self.cell_size / 2
+        ys = np.arange(self.rows)[:, None] * self.cell_size + (half + self.origin[1])
+        xs = np.arange(self.cols)[None, :] * self.cell_size + (half + self.origin[0])
+        self.blocked |= (xs - center[0]) ** 2 + (ys - center[1]) ** 2 <= radius * radius
+        self.dirty = True
+
+    def clear_obstacles(self):
+        self.blocked[:] = False
+        self.dirty = True
+
+    # Field
+    def update(self, target_pos):
+        """Update the field if the target changed cell or obstacles changed; returns True if it did"""
+        cell = self.cell_of(target_pos)
+        if cell == self.target_cell and not self.dirty:
+            return False
+        previous = None if self.dirty else self.target_cell
+        if self.dirty:
+            self._scans = None
+        self.target_cell = cell
+        self.dirty = False
+        self._rebuild(cell, previous)
+        return True
+
+    def _rebuild(self, target_cell, previous_cell=None):
+        """Distances and directions toward target_cell, warm-started from the field of an adjacent previous_cell"""
+        rows, cols = self.rows, self.cols
+        size = rows * cols
+        if self._scans is None:
+            self._scans = self._line_scans()
+        scans, cost = self._scans
+        dist = np.full(size + 1, np.inf)
+        target = target_cell[0] * cols + target_cell[1]
+        if (previous_cell is not None and max(abs(target_cell[0] - previous_cell[0]),
+                                              abs(target_cell[1] - previous_cell[1])) == 1):
+            # A path to the old target plus the step on to the new one is an upper bound on every
+            # distance, and relaxing down from an upper bound ends at the same exact distances
+            diagonal = target_cell[0] != previous_cell[0] and target_cell[1] != previous_cell[1]
+            previous = previous_cell[0] * cols + previous_cell[1]
+            dist[:size] = self.dist.ravel() + cost[previous] * (DIAGONAL_COST if diagonal else STRAIGHT_COST)
+        dist[target] = 0.0
+
+        # Fast sweeping, see _line_scans; one scan carries a wavefront across the whole grid, so a few
+        # rounds over the lines converge where relaxing one neighbour ring at a time took the grid's width
+        padded = np.full((rows + 2, cols + 2), np.inf)
+        grid = padded[1:-1, 1:-1]
+        straight_steps = cost[:size].reshape(rows, cols) * STRAIGHT_COST
+        diagonal_steps = cost[:size].reshape(rows, cols) * DIAGONAL_COST
+        field = dist[:size].reshape(rows, cols)
+        views = (field, field.T)  # Columns and rows are scanned in place, diagonals gathered
+        while True:
+            for i, (line, forward, backward) in enumerate(scans):
+                d = views[i] if line is None else dist[line]
+                scan = d - forward
+                np.minimum.accumulate(scan, axis=0, out=scan)
+                scan += forward
+                np.minimum(d, scan, out=d)
+                reverse = d[::-1]
+                scan = reverse - backward
+                np.minimum.accumulate(scan, axis=0, out=scan)
+                scan += backward
+                np.minimum(reverse, scan, out=reverse)
+                if line is not None:
+                    dist[line] = d
+                    dist[size] = np.inf  # Keep the sentinel from becoming a shortcut
+            self.sweeps += 1
+            # Distances only ever come down from upper bounds, so once no single neighbour step
+            # improves any cell they are exact; one local pass checks that cheaper than another round
+            grid[:] = field
+            if not any((padded[1 + dy:1 + dy + rows, 1 + dx:1 + dx + cols] +
+                        (straight_steps if dy == 0 or dx == 0 else diagonal_steps) < grid).any()
+                       for dy, dx, _ in _NEIGHBOURS):
+                break
+        dist = grid.copy()
+        self.dist = dist
+
+        # Each cell points at its cheapest neighbour (the first of equals), or nowhere if none is closer
+        candidates = np.stack([dist] + [padded[1 + dy:1 + dy + rows, 1 + dx:1 + dx + cols]
+                                        for dy, dx, _ in _NEIGHBOURS])
+        self.directions = _DIRECTIONS[candidates.argmin(axis=0)]
+        self.rebuilds += 1
+
+    def _line_scans(self):
+        """Running step costs along columns, rows and diagonals both ways, plus the flat costs (sentinel last)
+
+        Along a line, dist[i] = min(dist[i], dist[i - 1] + cost[i] * step) for every i at once is
+        C[i] + min over j <= i of (dist[j] - C[j]), with C the running sum of cost * step."""
+        cost = np.append(np.where(self.blocked, BLOCKED_COST, 1.0).ravel(), 0.0)  # Sentinel costs nothing
+        grid_cost = cost[:-1].reshape(self.rows, self.cols)
+        lines = [(None, grid_cost * STRAIGHT_COST), (None, grid_cost.T * STRAIGHT_COST)]
+        lines += [(line, cost[line] * DIAGONAL_COST) for line in self._diagonals]
+        return [(line, np.cumsum(line_cost, axis=0), np.cumsum(line_cost[::-1], axis=0))
+                for line, line_cost in lines], cost
+
+    def sample(self, positions, target_pos):
+        """Unit directions for an (n, 2) array of world positions"""
+        # Truncating is enough, anything left of or above the grid is clipped to its border anyway
+        cells = ((positions - self._origin) * (1 / self.cell_size)).astype(np.intp)
+        np.clip(cells, 0, (self.cols - 1, self.rows - 1), out=cells)
+        flat = cells[:, 1] * self.cols + cells[:, 0]
+        directions = self.directions.reshape(-1, 2).take(flat, axis=0)
+        dist = self.dist.ravel().take(flat)
+        # In or next to the target cell (or with no path) steer straight at the target itself
+        direct = (dist < 1.5 * STRAIGHT_COST) | ~np.isfinite(dist)
+        if direct.any():
+            delta = np.array((target_pos[0], target_pos[1]), dtype=np.float64) - positions[direct]
+            length = np.hypot(delta[:, 0], delta[:, 1])
+            directions[direct] = np.divide(delta, length[:, None], out=np.zeros_like(delta),
+                                           where=length[:, None] > 0)
+        return directions
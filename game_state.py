@@ -0,0 +1,106 @@
+import struct
+from timestep import sim_clock
+from rng import rng
+
+# Scalar part of a snapshot: sim clock, score/kill counters, timers and mission flags
+_SCALARS = struct.Struct('<d2i5q7?')
+
+
+class GameSnapshot:
+    """Mutable simulation data copied out of a GameState; surfaces and sounds are shared, never copied"""
+    __slots__ = ('scalars', 'current_message', 'player', 'health', 'enemies', 'world', 'npc', 'rng', 'next_id')
+
+    def __init__(self, scalars, current_message, player, health, enemies, world, npc, rng_state, next_id):
+        self.scalars = scalars  # bytes packed with _SCALARS
+        self.current_message = current_message
+        self.player = player
+        self.health = health
+        self.enemies = enemies
+        self.world = world  # Live trash and the streamed chunks
+        self.npc = npc
+        self.rng = rng_state  # Per-system random stream states
+        self.next_id = next_id  # Entity id counter, so respawned enemies get the same ids
+
+
+class GameState:
+    """Everything the game loop reads and writes each frame, as slotted attributes"""
+    __slots__ = (
+        # Game objects, built once by initialize_game
+        'player', 'health_system', 'enemies', 'npc', 'world', 'background', 'enemy_img',
+        'hud', 'light_overlay', 'camera_offset',
+        # Progress
+        'score', 'enemies_killed', 'mission_started', 'mission_complete', 'second_mission_complete',
+        'game_active',
+        # Messages
+        'show_npc_message', 'show_sword_message', 'message_shown_once', 'current_message',
+        'message_time', 'pause_start', 'sword_message_time', 'hud_message',
+        # Spawning
+        'enemy_spawn_timer', 'enemy_spawn_interval',
+        # Snapshot taken right after setup, restored on restart
+        'initial',
+    )
+
+    def __init__(self, player, health_system, enemies, npc, world, background, enemy_img,
+                 hud, light_overlay, camera_offset):
+        self.player = player
+        self.health_system = health_system
+        self.enemies = enemies
+        self.npc = npc
+        self.world = world
+        self.background = background
+        self.enemy_img = enemy_img
+        self.hud = hud
+        self.light_overlay = light_overlay
+        self.camera_offset = camera_offset
+
+        self.score = 0
+        self.enemies_killed = 0
+        self.mission_started = False
+        self.mission_complete = False
+        self.second_mission_complete = False
+        self.game_active = True
+
+        self.show_npc_message = False
+        self.show_sword_message = False
+        self.message_shown_once = False
+        self.current_message = None
+        self.message_time = 0
+        self.pause_start = 0
+        self.sword_message_time = 0
+        self.hud_message = None
+
+        self.enemy_spawn_timer = 0
+        self.enemy_spawn_interval = 10000  # 10 seconds
+        self.initial = None
+
+    def snapshot(self):
+        """Copy the mutable simulation state (positions, health, timers, flags) into a GameSnapshot"""
+        scalars = _SCALARS.pack(
+            sim_clock.time, self.score, self.enemies_killed,
+            self.message_time, self.pause_start, self.sword_message_time,
+            self.enemy_spawn_timer, self.enemy_spawn_interval,
+            self.mission_started, self.mission_complete, self.second_mission_complete, self.game_active,
+            self.show_npc_message, self.show_sword_message, self.message_shown_once)
+        return GameSnapshot(scalars, self.current_message, self.player.snapshot(),
+                            self.health_system.snapshot(), self.enemies.snapshot(),
+                            self.world.snapshot(), self.npc.snapshot(), rng.getstate(),
+                            self.enemies.registry.next_id)
+
+    def restore(self, snap, rng_streams=True):
+        """Return to a snapshot() without reloading any assets; rng_streams=False leaves the random streams running"""
+        (clock, self.score, self.enemies_killed,
+         self.message_time, self.pause_start, self.sword_message_time,
+         self.enemy_spawn_timer, self.enemy_spawn_interval,
+         self.mission_started, self.mission_complete, self.second_mission_complete, self.game_active,
+         self.show_npc_message, self.show_sword_message, self.message_shown_once) = _SCALARS.unpack(snap.scalars)
+        sim_clock.reset(clock)
+        self.current_message = snap.current_message
+        self.player.restore(snap.player)
+        self.health_system.restore(snap.health)
+        self.enemies.restore(snap.enemies)
+        self.world.restore(snap.world)
+        self.npc.restore(snap.npc)
+        if rng_streams:
+            rng.setstate(snap.rng)
+        self.enemies.registry.next_id = snap.next_id
+        self.hud_message = None
@@ -0,0 +1,238 @@
+import os
+import sys
+import time
+import random
+import argparse
+
+# Headless means no window and no audio device, set before pygame is initialized
+os.environ["SDL_VIDEODRIVER"] = "dummy"
+os.environ["SDL_AUDIODRIVER"] = "dummy"
+
+import pygame
+import main as game
+from timestep import sim_clock
+from rng import rng
+from audio_manager import audio
+from replay import KeyState, InputRecorder, Recording, state_checksum, decode_keys, ATTACK, RESET
+
+
+NO_KEYS = KeyState()
+DIRECTION_KEYS = {
+    (0, -1): (pygame.K_UP,), (0, 1): (pygame.K_DOWN,),
+    (-1, 0): (pygame.K_LEFT,), (1, 0): (pygame.K_RIGHT,),
+    (-1, -1): (pygame.K_LEFT, pygame.K_UP), (1, -1): (pygame.K_RIGHT, pygame.K_UP),
+    (-1, 1): (pygame.K_LEFT, pygame.K_DOWN), (1, 1): (pygame.K_RIGHT, pygame.K_DOWN),
+}
+
+
+def keys_toward(source, target, attack=False):
+    """Keys that move from source toward target (8 directions)"""
+    dx, dy = target[0] - source[0], target[1] - source[1]
+    step = (0 if abs(dx) < 8 else (1 if dx > 0 else -1),
+            0 if abs(dy) < 8 else (1 if dy > 0 else -1))
+    keys = list(DIRECTION_KEYS.get(step, ()))
+    if attack:
+        keys.append(pygame.K_SPACE)
+    return KeyState(keys)
+
+
+# Input scripts: callables (tick, game_state) -> KeyState
+def idle_script(tick, game_state):
+    return NO_KEYS
+
+
+def make_wander_script(seed=0, hold_ticks=30):
+    """Random 8-way walk that changes direction every hold_ticks and swings often"""
+    script_rng = random.Random(seed)
+    state = {'keys': NO_KEYS}
+
+    def script(tick, game_state):
+        if tick % hold_ticks == 0:
+            keys = list(script_rng.choice(list(DIRECTION_KEYS.values())))
+            if script_rng.random() < 0.5:
+                keys.append(pygame.K_SPACE)
+            state['keys'] = KeyState(keys)
+        return state['keys']
+    return script
+
+
+def collector_script(tick, game_state):
+    """Bot that talks to the NPC, ferries trash to the landfill and fights enemies once armed"""
+    player = game_state.player
+    if not game_state.mission_started:
+        target = game_state.npc.pos
+    elif player.carrying_trash:
+        target = game_state.world.decomposer_zone.center
+    elif game_state.world.trash_list:
+        target = min((t.rect.center for t in game_state.world.trash_list),
+                     key=lambda c: (c[0] - player.pos.x) ** 2 + (c[1] - player.pos.y) ** 2)
+    else:
+        # Every item is frozen in a far chunk, head for the map center to wake more of them
+        target = (game.MAP_WIDTH // 2, game.MAP_HEIGHT // 2)
+    nearby = game_state.enemies.query_radius(player.pos, 150) if player.has_sword else []
+    if not nearby:
+        return keys_toward(player.pos, target)
+
+    # The blade hits ~80 px ahead, so back off when too close and otherwise step toward
+    # the closest enemy along one axis, which also turns the player to face it
+    enemy_pos = min((e.pos for e in nearby), key=player.pos.distance_squared_to)
+    dx, dy = enemy_pos - player.pos
+    step = (1 if dx > 0 else -1, 0) if abs(dx) > abs(dy) else (0, 1 if dy > 0 else -1)
+    if max(abs(dx), abs(dy)) < 48:
+        return KeyState(DIRECTION_KEYS[(-step[0], -step[1])])
+    # Tap SPACE every other tick, attacks trigger on key-down like the real event loop
+    keys = list(DIRECTION_KEYS[step])
+    if tick % 2 == 0:
+        keys.append(pygame.K_SPACE)
+    return KeyState(keys)
+
+
+SCRIPTS = {
+    'idle': lambda seed: idle_script,
+    'wander': make_wander_script,
+    'collector': lambda seed: collector_script,
+}
+
+
+def run_headless(ticks, script, tick_rate=game.TICK_RATE, on_death='restart', seed=None, record=None):
+    """Drive update_simulation as fast as possible and return run statistics"""
+    seed = rng.seed(seed)
+    sim_clock.reset()
+    game_state = game.initialize_game()
+    recorder = InputRecorder(record, tick_rate, seed) if record else None
+    dt = 1.0 / tick_rate
+    deaths = 0
+    max_enemies = len(game_state.enemies)
+
+    ran = 0
+    space_was_down = False
+    start = time.perf_counter()
+    while ran < ticks:
+        keys = script(ran, game_state)
+        # Same as the KEYDOWN handler in game.main()
+        space_down = keys[pygame.K_SPACE]
+        if space_down and not space_was_down and game_state.mission_complete:
+            game_state.player.attack(sim_clock.get_ticks())
+            if recorder is not None:
+                recorder.mark(ATTACK)
+        space_was_down = space_down
+        if recorder is not None:
+            recorder.record_tick(keys)
+        game_state.player.input_source = lambda: keys
+        audio.update_listener(game_state.player.pos)  # Before the tick plays its sounds, as SceneManager does
+        game.update_simulation(game_state, dt)
+        audio.end_frame()  # Each tick stands in for a rendered frame
+        ran += 1
+        max_enemies = max(max_enemies, len(game_state.enemies))
+        if not game_state.game_active:
+            deaths += 1
+            if on_death == 'stop':
+                break
+            game.reset_game(game_state)
+            if recorder is not None:
+                recorder.mark(RESET)
+    elapsed = time.perf_counter() - start
+    if recorder is not None:
+        recorder.close(game_state)
+
+    return _stats(game_state, ran, dt, elapsed, deaths, max_enemies)
+
+
+def apply_events(game_state, bits):
+    """Event loop actions recorded before a tick, in the same order as game.main()"""
+    if bits & ATTACK:
+        game_state.player.attack(sim_clock.get_ticks())
+    if bits & RESET:
+        game.reset_game(game_state)
+
+
+def run_replay(recording):
+    """Re-run a recorded session tick for tick as fast as possible and check it ends identically"""
+    rng.seed(recording.seed)
+    sim_clock.reset()
+    game_state = game.initialize_game()
+    dt = 1.0 / recording.tick_rate
+    deaths = 0
+    max_enemies = len(game_state.enemies)
+
+    # Decode each distinct input once, sessions only use a handful
+    inputs = {bits: decode_keys(bits) for bits in set(recording.ticks.tolist())}
+    start = time.perf_counter()
+    for bits in recording.ticks.tolist():
+        apply_events(game_state, bits)
+        keys = inputs[bits]
+        game_state.player.input_source = lambda: keys
+        audio.update_listener(game_state.player.pos)
+        game.update_simulation(game_state, dt)
+        audio.end_frame()
+        max_enemies = max(max_enemies, len(game_state.enemies))
+        if not game_state.game_active:
+            deaths += 1
+    apply_events(game_state, recording.trailing)
+    elapsed = time.perf_counter() - start
+
+    stats = _stats(game_state, len(recording), dt, elapsed, deaths, max_enemies)
+    stats['checksum'] = state_checksum(game_state)
+    stats['matches'] = recording.checksum is None or stats['checksum'] == recording.checksum
+    return stats
+
+
+def _stats(game_state, ran, dt, elapsed, deaths, max_enemies):
+    return {
+        'ticks': ran,
+        'wall_seconds': elapsed,
+        'ticks_per_second': ran / elapsed if elapsed > 0 else float('inf'),
+        'sim_seconds': ran * dt,
+        'speedup': ran * dt / elapsed if elapsed > 0 else float('inf'),
+        'deaths': deaths,
+        'enemies': len(game_state.enemies),
+        'max_enemies': max_enemies,
+        'score': game_state.score,
+        'enemies_killed': game_state.enemies_killed,
+        'sounds': audio.stats(),
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run the game simulation headless at maximum speed")
+    parser.add_argument('--ticks', type=int, default=60 * 60 * 10, help="simulation ticks to run")
+    parser.add_argument('--tick-rate', type=int, default=game.TICK_RATE, help="ticks per simulated second")
+    parser.add_argument('--script', choices=sorted(SCRIPTS), default='collector', help="input script")
+    parser.add_argument('--seed', type=int, default=0, help="seed for the script and game RNG")
+    parser.add_argument('--on-death', choices=('restart', 'stop'), default='restart')
+    parser.add_argument('--record', metavar='PATH', help="save the script's input to a recording")
+    parser.add_argument('--replay', metavar='PATH', help="re-run a recording (from here or the game's --record)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.replay:
+        recording = Recording.load(args.replay)
+        stats = run_replay(recording)
+    else:
+        script = SCRIPTS[args.script](args.seed)
+        stats = run_headless(args.ticks, script, args.tick_rate, args.on_death, args.seed, args.record)
+    print(f"Simulated {stats['ticks']} ticks ({stats['sim_seconds']:.0f} s of game time) "
+          f"in {stats['wall_seconds']:.2f} s: {stats['ticks_per_second']:.0f} ticks/s "
+          f"({stats['speedup']:.0f}x real time)")
+    print(f"Enemies alive: {stats['enemies']} (max {stats['max_enemies']}), "
+          f"killed: {stats['enemies_killed']}, score: {stats['score']}, deaths: {stats['deaths']}")
+    sounds = stats['sounds']
+    print(f"Sounds played: {sounds['played']}, deduped: {sounds['deduped']}, "
+          f"dropped: {sounds['dropped']}, stolen: {sounds['stolen']}, culled: {sounds['culled']}")
+    status = 0
+    if args.replay:
+        if recording.checksum is None:
+            print("Recording has no final checksum (session did not close it), replay not verified")
+        elif stats['matches']:
+            print(f"Replay matches the recording (checksum {stats['checksum']:08x})")
+        else:
+            print(f"Replay DIVERGED: checksum {stats['checksum']:08x}, recorded {recording.checksum:08x}")
+            status = 1
+    pygame.quit()
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
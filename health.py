@@ -1,4 +1,5 @@
 import pygame
+from timestep import sim_clock
 
 class HealthSystem:
     def __init__(self, max_health):
@@ -11,7 +12,7 @@ class HealthSystem:
         self.health_bar_pos = (20, 60)
 
     def take_damage(self, amount=1):
-        current_time = pygame.time.get_ticks()
+        current_time = sim_clock.get_ticks()
         if current_time - self.last_hit_time > self.damage_cooldown:
             self.current_health -= amount
             self.last_hit_time = current_time
@@ -21,17 +22,24 @@ class HealthSystem:
     def is_dead(self):
         return self.current_health <= 0
 
-    def draw_health_bar(self, surface):
+    def draw_health_bar(self, surface, pos=None):
+        pos = self.health_bar_pos if pos is None else pos
         ratio = self.current_health / self.max_health
         # Background (empty health)
         pygame.draw.rect(surface, (255, 0, 0), 
-                        (*self.health_bar_pos, self.health_bar_width, self.health_bar_height))
+                        (*pos, self.health_bar_width, self.health_bar_height))
         # Foreground (current health)
         pygame.draw.rect(surface, (0, 255, 0), 
-                        (*self.health_bar_pos, self.health_bar_width * ratio, self.health_bar_height))
+                        (*pos, self.health_bar_width * ratio, self.health_bar_height))
         # Border
         pygame.draw.rect(surface, (255, 255, 255), 
-                        (*self.health_bar_pos, self.health_bar_width, self.health_bar_height), 2)
+                        (*pos, self.health_bar_width, self.health_bar_height), 2)
+
+    def snapshot(self):
+        return (self.current_health, self.last_hit_time)
+
+    def restore(self, state):
+        self.current_health, self.last_hit_time = state
 
     def reset(self):
         self.current_health = self.max_health
@@ -0,0 +1,100 @@
+import pygame
+
+_UNSET = object()
+
+class Widget:
+    """HUD element that keeps its rendered surface until its value changes"""
+    def __init__(self, source, pos):
+        self.source = source  # Callable returning the watched value from game_state
+        self.pos = pos
+        self.value = _UNSET
+        self.surface = None
+        self.renders = 0
+
+    def refresh(self, game_state):
+        """Re-render if the watched value changed, returns True when dirty"""
+        value = self.source(game_state)
+        if value == self.value:
+            return False
+        self.value = value
+        surface = self.render(value)
+        # Display format, so the per-frame blit doesn't convert pixels
+        self.surface = surface.convert_alpha() if surface is not None else None
+        self.renders += 1
+        return True
+
+    def render(self, value):
+        raise NotImplementedError
+
+    def get_rect(self):
+        if self.surface is None:
+            return pygame.Rect(self.pos, (0, 0))
+        return self.surface.get_rect(topleft=self.pos)
+
+
+class TextWidget(Widget):
+    """Single line of text built from a format string"""
+    def __init__(self, font, text, source, pos, color=(0, 0, 0)):
+        super().__init__(source, pos)
+        self.font = font
+        self.text = text
+        self.color = color
+
+    def render(self, value):
+        return self.font.render(self.text.format(value), True, self.color)
+
+
+class HealthBarWidget(Widget):
+    """Player health bar drawn by the HealthSystem"""
+    def __init__(self, health_system):
+        super().__init__(lambda game_state: health_system.current_health, health_system.health_bar_pos)
+        self.health_system = health_system
+
+    def render(self, value):
+        size = (self.health_system.health_bar_width, self.health_system.health_bar_height)
+        surface = pygame.Surface(size, pygame.SRCALPHA)
+        self.health_system.draw_health_bar(surface, (0, 0))
+        return surface
+
+
+class MessageWidget(Widget):
+    """Boxed message centered near the bottom of the screen"""
+    def __init__(self, font, source, center, padding=20):
+        super().__init__(source, center)
+        self.font = font
+        self.center = center
+        self.padding = padding
+
+    def render(self, value):
+        if not value:
+            return None
+        text_surf = self.font.render(value, True, (0, 0, 0))
+        box = pygame.Surface((text_surf.get_width() + self.padding * 2,
+                              text_surf.get_height() + self.padding * 2), pygame.SRCALPHA)
+        pygame.draw.rect(box, (255, 255, 255), box.get_rect(), border_radius=8)
+        box.blit(text_surf, (self.padding, self.padding))
+        self.pos = box.get_rect(center=self.center).topleft
+        return box
+
+
+class HUD:
+    """Draws each widget's cached surface at its own rect; widgets re-render only when their value changes"""
+    def __init__(self, widgets=()):
+        self.widgets = list(widgets)
+
+    def add(self, widget):
+        self.widgets.append(widget)
+        return widget
+
+    def update(self, game_state):
+        """Refresh every widget, returns True if any of them changed"""
+        dirty = False
+        for widget in self.widgets:
+            if widget.refresh(game_state):
+                dirty = True
+        return dirty
+
+    def draw(self, surface):
+        """Blit the widgets and return the rects they cover"""
+        return surface.blits([(widget.surface, widget.pos) for widget in self.widgets
+                              if widget.surface is not None])
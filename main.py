@@ -1,70 +1,144 @@
 import pygame
 import sys
-import os
-import random
-from enemy import Enemy
+from enemy_swarm import EnemySwarm
+from ecs import Registry, store_previous_system, trigger_system
 from npc import NPC
 from player import Player
+from weapon import Sword
 from world import World
 from trash import Trash
 from health import HealthSystem
-from audio_manager import AudioManager
+from audio_manager import audio
+from asset_cache import assets
+from effect_cache import effects
+from asset_loader import AssetLoader
+from atlas import TextureAtlas
+from background import ChunkedBackground
+from timestep import FixedTimestep, sim_clock
+from dirty_rects import DirtyRectRenderer
+from game_state import GameState
+from rng import rng, spawn_rng
+from replay import InputRecorder, ATTACK, RESET
+from savegame import AutoSaver, load_game, DEFAULT_SAVE_PATH
+from profiler import profiler
+from hud import HUD, TextWidget, HealthBarWidget, MessageWidget
 import math 
 from menu import StartMenu
+from scene import Scene, SceneManager
+from bossfight import BossFight
 
 # Initialize pygame and setup constants
 pygame.init()
 WIDTH, HEIGHT = 900, 600
-menu = StartMenu(WIDTH, HEIGHT)
 MAP_WIDTH, MAP_HEIGHT = 3000, 3000
 FPS = 60
+TICK_RATE = 60  # Fixed simulation ticks per second
 BLACK = (0, 0, 0)
 WHITE = (255, 255, 255)
 
 # Setup display and fonts
 screen = pygame.display.set_mode((WIDTH, HEIGHT))
 pygame.display.set_caption("Trash Collection - Open World")
-clock = pygame.time.Clock()
+renderer = DirtyRectRenderer((WIDTH, HEIGHT), enabled=False)  # Opt in with --dirty-rects
 font = pygame.font.SysFont(None, 32)
 large_font = pygame.font.SysFont(None, 74)
 
 # Helper functions
 def load_image(name, size=None):
-    """Load and optionally scale an image"""
-    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), name)
-    if not os.path.exists(path):
-        print(f"Image file missing: {path}")
+    """Load and optionally scale an image (cached, see AssetCache)"""
+    try:
+        return assets.image(name, size)
+    except FileNotFoundError as e:
+        print(f"Image file missing: {e}")
         return pygame.Surface((48, 48), pygame.SRCALPHA)
-    img = pygame.image.load(path).convert_alpha()
-    return pygame.transform.smoothscale(img, size) if size else img
 
 def load_animation_frames(folder, size=(48, 48)):
     """Load all animation frames from a folder"""
-    frames = []
-    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), folder)
-    if os.path.exists(path):
-        frame_files = sorted([f for f in os.listdir(path) if f.endswith('.png')])
-        for frame in frame_files:
-            frames.append(load_image(os.path.join(folder, frame), size))
+    try:
+        return assets.frames(folder, size)
+    except FileNotFoundError as e:
+        print(f"Animation folder missing: {e}")
+        return [pygame.Surface(size, pygame.SRCALPHA)]
+
+_shadow_cache = {}
+
+def get_shadow(size=(64, 20)):
+    """Return the shadow ellipse surface for a size, building it once"""
+    shadow = _shadow_cache.get(size)
+    if shadow is None:
+        shadow = pygame.Surface(size, pygame.SRCALPHA)
+        pygame.draw.ellipse(shadow, (0, 0, 0, 50), shadow.get_rect())
+        _shadow_cache[size] = shadow
+    return shadow
+
+def draw_shadows(surface, positions, size=(64, 20), doreturn=False):
+    """Draw shadows under many characters with a single batched blit"""
+    shadow = get_shadow(size)
+    # Offset from character center to shadow top-left
+    dx = 5 - size[0] // 2
+    dy = 45 - size[1] // 2
+    batch = [(shadow, (x + dx, y + dy)) for x, y in positions]
+    if doreturn:
+        return surface.blits(batch)
+    if hasattr(surface, 'fblits'):
+        surface.fblits(batch)
     else:
-        print(f"Animation folder missing: {path}")
-        frames.append(pygame.Surface(size, pygame.SRCALPHA))
-    return frames
-
-def draw_shadow(surface, pos, size=(64, 20)):
-    """Draw a shadow ellipse under characters"""
-    shadow = pygame.Surface(size, pygame.SRCALPHA)
-    pygame.draw.ellipse(shadow, (0, 0, 0, 50), shadow.get_rect())
-    surface.blit(shadow, shadow.get_rect(center=(pos[0] + 5, pos[1] + 45)))
-
-def draw_message_box(surface, text):
-    """Draw a message box with text"""
-    padding = 20
-    text_surf = font.render(text, True, (0, 0, 0))
-    box_rect = pygame.Rect(0, 0, text_surf.get_width() + padding * 2, text_surf.get_height() + padding * 2)
-    box_rect.center = (WIDTH // 2, HEIGHT - 60)
-    pygame.draw.rect(surface, WHITE, box_rect, border_radius=8)
-    surface.blit(text_surf, (box_rect.x + padding, box_rect.y + padding))
+        surface.blits(batch, doreturn=False)
+
+def create_hud(health_system):
+    """Build the retained-mode HUD for score, kills, trash, health and messages"""
+    return HUD([
+        TextWidget(font, "Score: {} / 5", lambda gs: gs.score, (20, 20)),
+        TextWidget(font, "Carrying Trash: {}",
+                   lambda gs: 'Yes' if gs.player.carrying_trash else 'No', (20, 40)),
+        TextWidget(font, "Enemies Killed: {}/20", lambda gs: gs.enemies_killed, (20, 60)),
+        HealthBarWidget(health_system),
+        MessageWidget(font, lambda gs: gs.hud_message, (WIDTH // 2, HEIGHT - 60)),
+    ])
+
+def active_message(game_state):
+    """Pick the message box to show this frame, expiring timed messages"""
+    current_time = sim_clock.get_ticks()
+    if game_state.show_npc_message:
+        if current_time - game_state.pause_start < 3000:
+            return "BALEN: Please collect 5 trash items!"
+        game_state.show_npc_message = False
+    
+    message = None
+    if game_state.show_sword_message:
+        if current_time - game_state.sword_message_time < 3000:
+            message = "You got a SWORD! Press SPACE to attack"
+        else:
+            game_state.show_sword_message = False
+    
+    # Current NPC message draws over the sword message
+    if game_state.current_message and current_time - game_state.message_time < 3000:
+        message = game_state.current_message
+    return message
+
+# Everything initialize_game loads, so it can be decoded in the background behind the menu
+GAME_ASSETS = {
+    'images': [
+        ("assets/enemy.jpg", (64, 64), True),
+        ("assets/balen.jpg", (128, 128), True),
+        ("assets/Trash.png", (64, 64), True),
+        ("assets/Waste.png", (150, 150), True),
+        ("assets/background.png", None, True),
+    ] + [(f"assets/weapons/{direction}.png", (50, 70), False)
+         for direction in ('up', 'down', 'left', 'right')],
+    'folders': [(f"assets/player/{direction}", (48, 48))
+                for direction in ('up', 'down', 'left', 'right')],
+    'sounds': ["assets/weapons/sword.wav"],
+}
+
+_sprite_atlas = None
+
+def get_sprite_atlas(sprites):
+    """Pack sprites into the shared atlas on first use and reuse it afterwards"""
+    global _sprite_atlas
+    if _sprite_atlas is None or any(name not in _sprite_atlas for name in sprites):
+        _sprite_atlas = TextureAtlas().pack(sprites)
+    return _sprite_atlas
 
 # Game initialization
 def initialize_game():
@@ -81,289 +155,403 @@ def initialize_game():
     npc_img = load_image("assets/balen.jpg", (128, 128))
     trash_img = load_image("assets/Trash.png", (64, 64))
     landfill_img = load_image("assets/Waste.png", (150, 150))
-    background_img = pygame.transform.scale(
-        load_image("assets/background.png"),
-        (load_image("assets/background.png").get_width() * 4, 
-         load_image("assets/background.png").get_height() * 4)
-    )
-    try:
-        hit_sound = pygame.mixer.Sound("assets/weapons/sword.wav")  # Add this line
-        hit_sound.set_volume(0.5)  # Adjust volume as needed
-    except:
-        print("Could not load hit sound effect")
-        hit_sound = None
-    # Create game objects
+    background = ChunkedBackground(load_image("assets/background.png"), scale=4)
+    sword_images = Sword.load_images_from(assets)
+    
+    # Pack every world sprite into one atlas and draw from its sub-rects
+    sprites = {'enemy': enemy_img, 'npc': npc_img, 'trash': trash_img, 'landfill': landfill_img}
+    for direction, frames in player_animations.items():
+        for i, frame in enumerate(frames):
+            sprites[f'player/{direction}/{i}'] = frame
+    for direction, image in sword_images.items():
+        sprites[f'sword/{direction}'] = image
+    atlas = get_sprite_atlas(sprites)
+    player_animations = {direction: [atlas.frame(f'player/{direction}/{i}') for i in range(len(frames))]
+                         for direction, frames in player_animations.items()}
+    enemy_img, npc_img = atlas.frame('enemy'), atlas.frame('npc')
+    trash_img, landfill_img = atlas.frame('trash'), atlas.frame('landfill')
+    effects.prebake_fade(enemy_img)  # Every enemy shares this sprite, its death fade is ready before the first kill
+    # Played through the AudioManager: one voice per frame, however many enemies a swing connects with
+    audio.load_sound('hit', "assets/weapons/sword.wav", category='combat', priority=2, volume=0.5)
+    # Create game objects (world first so trash can register in its spatial hash)
+    entities = Registry()  # Column storage shared by the NPC, trash and enemies
+    npc = NPC((1600, 1400), image=npc_img, safezone_radius=250, chat_radius=120, registry=entities)
+    enemies = EnemySwarm(registry=entities, map_size=(MAP_WIDTH, MAP_HEIGHT))
+    world = World((MAP_WIDTH, MAP_HEIGHT), trash_img, landfill_img, npc.pos, npc.safezone_radius,
+                  registry=entities, enemies=enemies, enemy_image=enemy_img)
+    
     player = Player((1800, 250), speed=3, animations=player_animations)
+    player.sword.set_images({direction: atlas.frame(f'sword/{direction}') for direction in sword_images})
     player.has_sword = False
     health_system = HealthSystem(max_health=10)
     
-    enemies = [
-        Enemy((1000, 1000), speed=1, image=enemy_img),
-        Enemy((1200, 1200), speed=1, image=enemy_img),
-        Enemy((800, 1500), speed=1, image=enemy_img)
-    ]
+    for pos in [(1000, 1000), (1200, 1200), (800, 1500)]:
+        enemies.spawn(pos, speed=1, image=enemy_img)
+    world.stream(player.pos)  # Freeze whatever starts out far from the player
     
-    npc = NPC((1600, 1400), image=npc_img, safezone_radius=250, chat_radius=120)
-    world = World((MAP_WIDTH, MAP_HEIGHT), trash_img, landfill_img, npc.pos, npc.safezone_radius)
-    
-    # Game state
-    return {
-        'player': player,
-        'health_system': health_system,
-        'enemies': enemies,
-        'npc': npc,
-        'world': world,
-        'background_img': background_img,
-        'light_overlay': pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA),
-        'camera_offset': pygame.Vector2(),
-        'score': 0,
-        'enemies_killed': 0,
-        'mission_started': False,
-        'mission_complete': False,
-        'second_mission_complete': False,
-        'show_npc_message': False,
-        'show_sword_message': False,
-        'message_shown_once': False,
-        'game_active': True,
-        'enemy_spawn_timer': 0,
-        'enemy_spawn_interval': 10000,  # 10 seconds
-        'current_message': None,
-        'message_time': 0,
-        'hit_sound': hit_sound
-    }
+    game_state = GameState(player, health_system, enemies, npc, world, background, enemy_img,
+                           create_hud(health_system),
+                           pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA), pygame.Vector2())
+    game_state.light_overlay.fill((255, 255, 220, 40))
+    game_state.initial = game_state.snapshot()
+    return game_state
 
 def reset_game(game_state):
-    """Reset the game to initial state"""
-    game_state.update(initialize_game())
-    game_state['light_overlay'].fill((255, 255, 220, 40))
+    """Reset the game to initial state by restoring the start snapshot (no asset reloads)"""
+    # The random streams run on instead of rewinding, so every restart gets a fresh trash layout and
+    # spawns; replays still match because the reset is recorded and the streams' state is deterministic
+    game_state.restore(game_state.initial, rng_streams=False)
+    game_state.world.spawn_trash()
 
+@profiler.profile('sword_attack')
 def handle_sword_attack(player, enemies, game_state):
     """Handle sword attack mechanics"""
     hit_occurred = False  # Track if we hit any enemies
     
     if player.attacking:
         sword_hitbox = player.get_sword_hitbox()
-        for enemy in enemies[:]:  # Iterate over a copy
-            if sword_hitbox.colliderect(enemy.get_world_rect()):
-                hit_occurred = True  # We hit at least one enemy
-                if enemy.take_damage(player.sword.damage):
-                    # Apply knockback effect
-                    knockback_dir = (enemy.pos - player.pos).normalize()
-                    enemy.pos += knockback_dir * player.sword.knockback_force
-                    if enemy.is_dead():
-                        enemies.remove(enemy)
-                        game_state['enemies_killed'] += 1
-                        # Check if second mission is complete
-                        if game_state['mission_complete'] and game_state['enemies_killed'] >= 20:
-                            game_state['second_mission_complete'] = True
-                            game_state['current_message'] = "BALEN: You've proven yourself worthy!"
-                            game_state['message_time'] = pygame.time.get_ticks()
+        for enemy in enemies.query_rect(sword_hitbox):  # Only living enemies under the blade
+            hit_occurred = True  # We hit at least one enemy
+            if enemy.take_damage(player.sword.damage):
+                # Apply knockback effect
+                knockback_dir = (enemy.pos - player.pos).normalize()
+                enemy.pos += knockback_dir * player.sword.knockback_force
+                if enemy.is_dead():
+                    # The swarm drops the enemy once its death fade finishes
+                    game_state.enemies_killed += 1
+                    # Check if second mission is complete
+                    if game_state.mission_complete and game_state.enemies_killed >= 20:
+                        game_state.second_mission_complete = True
+                        game_state.current_message = "BALEN: You've proven yourself worthy! Press B to face the boss"
+                        game_state.message_time = sim_clock.get_ticks()
         
         # Play hit sound if we connected with an enemy
-        if hit_occurred and game_state['hit_sound']:
-            game_state['hit_sound'].play()
+        if hit_occurred:
+            audio.play_sound('hit', sword_hitbox.center)
 
+@profiler.profile('enemy_collisions')
 def handle_enemy_collisions(player, enemies, health_system):
     """Check for and handle collisions with enemies"""
-    current_time = pygame.time.get_ticks()
-    for enemy in enemies:
-        if (enemy.get_world_rect().colliderect(player.get_world_rect()) and 
-            health_system.take_damage()):
+    for enemy in enemies.query_rect(player.get_world_rect()):
+        if health_system.take_damage():
             # Knockback effect when player is hit
             knockback_dir = (player.pos - enemy.pos).normalize()
             player.pos += knockback_dir * 30  # Adjust knockback strength as needed
+            player.sync_rect()
             
             if health_system.is_dead():
                 return False
     return True
 
+@profiler.profile('trash_pickup')
+def handle_trash_pickup(player, world, game_state):
+    """Pick up trash the player touches and score it at the landfill"""
+    if game_state.mission_started and not player.carrying_trash:
+        for trash in world.grid.query_rect(player.get_world_rect(), Trash):
+            player.carrying_trash = True
+            trash.relocate()
+            break
+    
+    if player.carrying_trash and player.get_world_rect().colliderect(world.decomposer_zone):
+        game_state.score += 1
+        player.carrying_trash = False
+
+@profiler.profile('spawn_new_enemy')
 def spawn_new_enemy(game_state):
     """Spawn a new enemy at random edge of map"""
-    current_time = pygame.time.get_ticks()
-    if current_time - game_state['enemy_spawn_timer'] > game_state['enemy_spawn_interval']:
-        edge = random.randint(0, 3)  # 0: top, 1: right, 2: bottom, 3: left
+    current_time = sim_clock.get_ticks()
+    if current_time - game_state.enemy_spawn_timer > game_state.enemy_spawn_interval:
+        edge = spawn_rng.randint(0, 3)  # 0: top, 1: right, 2: bottom, 3: left
         if edge == 0:  # top
-            x = random.randint(0, MAP_WIDTH)
+            x = spawn_rng.randint(0, MAP_WIDTH)
             y = -50
         elif edge == 1:  # right
             x = MAP_WIDTH + 50
-            y = random.randint(0, MAP_HEIGHT)
+            y = spawn_rng.randint(0, MAP_HEIGHT)
         elif edge == 2:  # bottom
-            x = random.randint(0, MAP_WIDTH)
+            x = spawn_rng.randint(0, MAP_WIDTH)
             y = MAP_HEIGHT + 50
         else:  # left
             x = -50
-            y = random.randint(0, MAP_HEIGHT)
-            
-        new_enemy = Enemy((x, y), speed=1, image=game_state['enemies'][0].image)
-        game_state['enemies'].append(new_enemy)
-        game_state['enemy_spawn_timer'] = current_time
-
-def main():
-    """Main game loop"""
-    if menu.run(screen):  # This will show the menu and wait for click
-        # Proceed with game initialization
-        game_state = initialize_game()
-
-    game_state['light_overlay'].fill((255, 255, 220, 40))
-    pygame.mixer.init()
-    pygame.mixer.music.load("assets/background.mp3")
-    pygame.mixer.music.set_volume(0.2)
-    pygame.mixer.music.play(-1)
-    running = True
-    while running:
-        dt = clock.tick(FPS) / 1000  # Delta time in seconds
-        
-        # Event handling
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_SPACE and game_state['mission_complete']:
-                    current_time = pygame.time.get_ticks()
-                    game_state['player'].attack(current_time)
-                if event.key == pygame.K_r and not game_state['game_active']:
-                    reset_game(game_state)
-        
-        if game_state['game_active']:
-            # Update player
-            game_state['player'].move(dt)
-            game_state['player'].pos.x = max(0, min(game_state['player'].pos.x, MAP_WIDTH - game_state['player'].rect.width))
-            game_state['player'].pos.y = max(0, min(game_state['player'].pos.y, MAP_HEIGHT - game_state['player'].rect.height))
-            
-            # Update camera
-            game_state['camera_offset'].x = game_state['player'].pos.x - WIDTH // 2
-            game_state['camera_offset'].y = game_state['player'].pos.y - HEIGHT // 2
+            y = spawn_rng.randint(0, MAP_HEIGHT)
             
-            # Spawn new enemies periodically
-            spawn_new_enemy(game_state)
-            
-            # Update enemies
-            for enemy in game_state['enemies']:
-                if not game_state['npc'].is_in_safezone(game_state['player'].pos):
-                    enemy.move_toward(game_state['player'].pos)
-                enemy.update()
-            
-            # Handle sword attacks immediately after player update
-            if game_state['player'].has_sword:
-                handle_sword_attack(game_state['player'], game_state['enemies'], game_state)
-            
-            # Handle collisions
-            game_state['game_active'] = handle_enemy_collisions(
-                game_state['player'], game_state['enemies'], game_state['health_system'])
-            
-            # Mission logic
-            if game_state['npc'].is_in_chat_radius(game_state['player'].pos):
-                current_time = pygame.time.get_ticks()
-                message = game_state['npc'].get_message(game_state)
-                if message and (current_time - game_state.get('message_time', 0) > 3000):
-                    game_state['current_message'] = message
-                    game_state['message_time'] = current_time
-                
-                if not game_state['mission_started']:
-                    game_state['mission_started'] = True
-                    game_state['show_npc_message'] = True
-                    game_state['message_shown_once'] = True
-                    game_state['pause_start'] = pygame.time.get_ticks()
-            
-            # Trash collection
-            if game_state['mission_started'] and not game_state['player'].carrying_trash:
-                for trash in game_state['world'].trash_list:
-                    if game_state['player'].get_world_rect().colliderect(trash.get_world_rect()):
-                        game_state['player'].carrying_trash = True
-                        trash.relocate()
-                        break
-            
-            # Trash delivery
-            if (game_state['player'].carrying_trash and 
-                game_state['player'].get_world_rect().colliderect(game_state['world'].decomposer_zone)):
-                game_state['score'] += 1
-                game_state['player'].carrying_trash = False
-            
-            # Mission completion
-            if game_state['score'] >= 5 and not game_state['mission_complete']:
-                game_state['mission_complete'] = True
-                game_state['player'].has_sword = True
-                game_state['show_sword_message'] = True
-                game_state['sword_message_time'] = pygame.time.get_ticks()
+        game_state.enemies.spawn((x, y), speed=1, image=game_state.enemy_img)
+        game_state.enemy_spawn_timer = current_time
+
+@profiler.profile('simulation')
+def update_simulation(game_state, dt):
+    """Advance all game logic by one fixed tick of dt seconds"""
+    sim_clock.advance(dt * 1000)
+    
+    # Keep last tick's positions so rendering can interpolate
+    game_state.player.store_previous()
+    store_previous_system(game_state.world.entities)
+    
+    # Update player
+    with profiler.stage('player_move'):
+        game_state.player.move(dt)
+        game_state.player.pos.x = max(0, min(game_state.player.pos.x, MAP_WIDTH - game_state.player.rect.width))
+        game_state.player.pos.y = max(0, min(game_state.player.pos.y, MAP_HEIGHT - game_state.player.rect.height))
+        game_state.player.sync_rect()
+    
+    # Spawn new enemies periodically
+    spawn_new_enemy(game_state)
+    
+    # Keep only the chunks around the player live; the camera is centered on the player, and
+    # following its simulated position (not the interpolated camera) keeps replays exact
+    with profiler.stage('streaming'):
+        game_state.world.stream(game_state.player.pos)
+    
+    # Update enemies (movement, hit timers and death removal in one vectorized pass)
+    with profiler.stage('enemy_update'):
+        # Enemies hold back while the player stands in a trigger, the NPC's safezone
+        in_safezone = trigger_system(game_state.world.entities, game_state.player.pos)
+        game_state.enemies.update(
+            game_state.player.pos, sim_clock.get_ticks(), chase=not in_safezone, dt=dt,
+            flow_field=game_state.world.flow_field)
+    
+    # Handle sword attacks immediately after player update
+    if game_state.player.has_sword:
+        handle_sword_attack(game_state.player, game_state.enemies, game_state)
+    
+    # Handle collisions
+    game_state.game_active = handle_enemy_collisions(
+        game_state.player, game_state.enemies, game_state.health_system)
+    
+    # Mission logic
+    if game_state.npc.is_in_chat_radius(game_state.player.pos):
+        current_time = sim_clock.get_ticks()
+        message = game_state.npc.get_message(game_state)
+        if message and (current_time - game_state.message_time > 3000):
+            game_state.current_message = message
+            game_state.message_time = current_time
         
-        # Drawing
+        if not game_state.mission_started:
+            game_state.mission_started = True
+            game_state.show_npc_message = True
+            game_state.message_shown_once = True
+            game_state.pause_start = sim_clock.get_ticks()
+    
+    # Trash collection and delivery
+    handle_trash_pickup(game_state.player, game_state.world, game_state)
+    
+    # Mission completion
+    if game_state.score >= 5 and not game_state.mission_complete:
+        game_state.mission_complete = True
+        game_state.player.has_sword = True
+        game_state.show_sword_message = True
+        game_state.sword_message_time = sim_clock.get_ticks()
+
+class Overworld(Scene):
+    """The open world: fixed-timestep simulation with an interpolated camera"""
+    def __init__(self, seed=None, record_path=None, resume=False):
+        self.seed = seed
+        self.record_path = record_path
+        self.resume = resume
+        self.loader = AssetLoader()
+        self.game_state = None  # Built on the first enter, kept while other scenes run
+        self.recorder = None
+        self.autosaver = None
+        self.timestep = FixedTimestep(TICK_RATE)
+        self.was_active = True
+        self.player_render_pos = None
+        self.game_over_drawn = False  # The game over screen is static, drawn once and then left alone
+        self.game_over_text = None
+
+    def preload(self):
+        """Start decoding game assets on worker threads (while the menu is up)"""
+        self.loader.start(**GAME_ASSETS)
+
+    def enter(self, previous):
+        pygame.display.set_caption("Trash Collection - Open World")
+        self.invalidate()
+        if self.game_state is not None:
+            return  # Back from another scene: the world was only suspended
+        # Anything still decoding is finished here, initialize_game then only hits the cache
+        self.loader.wait()
+        self.seed = rng.seed(self.seed)
+        sim_clock.reset()
+        game_state = self.game_state = initialize_game()
+        if self.resume:
+            try:
+                if load_game(game_state, DEFAULT_SAVE_PATH):
+                    print(f"Resumed from {DEFAULT_SAVE_PATH}")
+            except (OSError, ValueError) as e:
+                print(f"Could not load save: {e}, starting a new game")
+        self.recorder = InputRecorder(self.record_path, TICK_RATE, self.seed) if self.record_path else None
+        self.autosaver = AutoSaver(DEFAULT_SAVE_PATH)  # Writes on its own thread, never stalls a frame
+        self.was_active = game_state.game_active
+        self.player_render_pos = game_state.player.render_pos(1.0)
+
+        audio.set_music_volume(0.2)
+        if audio.load_music("assets/background.mp3"):
+            audio.play_music(-1)
+
+    def handle_event(self, event):
+        game_state = self.game_state
+        recorder = self.recorder
+        if event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_SPACE and game_state.mission_complete:
+                current_time = sim_clock.get_ticks()
+                game_state.player.attack(current_time)
+                if recorder is not None:
+                    recorder.mark(ATTACK)
+            if event.key == pygame.K_r and not game_state.game_active:
+                reset_game(game_state)
+                if recorder is not None:
+                    recorder.mark(RESET)
+            if event.key == pygame.K_b and game_state.second_mission_complete and game_state.game_active:
+                # The simulation simply doesn't tick while the boss fight runs
+                self.manager.switch('bossfight')
+            if event.key == pygame.K_F3:
+                profiler.toggle_overlay()
+                self.invalidate()
+            if event.key == pygame.K_F4 and profiler.enabled:
+                path = profiler.export_chrome_trace()
+                if path:
+                    print(f"Wrote trace to {path}")
+
+    def update(self, dt):
+        game_state = self.game_state
+        if game_state.game_active:
+            # Run as many fixed ticks as the elapsed time calls for, independent of render FPS
+            for _ in range(self.timestep.advance(dt)):
+                if self.recorder is not None:
+                    self.recorder.record_tick(pygame.key.get_pressed())
+                update_simulation(game_state, self.timestep.dt)
+                self.autosaver.update(game_state, sim_clock.get_ticks())
+                if not game_state.game_active:
+                    break
+            if game_state.second_mission_complete:
+                self.manager.preload('bossfight')  # Ready before the player asks for it
+
+            # Camera follows the player's interpolated position for smooth scrolling
+            self.player_render_pos = game_state.player.render_pos(self.timestep.alpha)
+            game_state.camera_offset.x = self.player_render_pos.x - WIDTH // 2
+            game_state.camera_offset.y = self.player_render_pos.y - HEIGHT // 2
+
+    def listener(self):
+        return self.game_state.player.pos  # The player is the listener
+
+    def is_idle(self):
+        return not self.game_state.game_active  # Nothing moves on the game over screen
+
+    def invalidate(self):
+        renderer.invalidate()
+        self.game_over_drawn = False
+
+    def draw(self, screen):
+        game_state = self.game_state
+        alpha = self.timestep.alpha
+        player_render_pos = self.player_render_pos
+        if game_state.game_active != self.was_active:
+            self.invalidate()  # Switching screens changes every pixel
+            self.was_active = game_state.game_active
+        if not game_state.game_active and self.game_over_drawn:
+            return  # Still on screen from the first game over frame
+        renderer.begin_frame(game_state.camera_offset if game_state.game_active else None)
         screen.fill((150, 200, 150))
         
-        if game_state['game_active']:
-            # Draw background
-            bg_w, bg_h = game_state['background_img'].get_width(), game_state['background_img'].get_height()
-            for x in range(int(game_state['camera_offset'].x // bg_w) * bg_w, 
-                         int(game_state['camera_offset'].x + WIDTH) + bg_w, bg_w):
-                for y in range(int(game_state['camera_offset'].y // bg_h) * bg_h,
-                             int(game_state['camera_offset'].y + HEIGHT) + bg_h, bg_h):
-                    screen.blit(game_state['background_img'], 
-                              (x - game_state['camera_offset'].x, y - game_state['camera_offset'].y))
+        if game_state.game_active:
+            # Draw background (visible chunks only, scaled lazily)
+            with profiler.stage('background'):
+                game_state.background.draw(screen, game_state.camera_offset)
             
             # Draw world objects
-            game_state['world'].draw_landfill(screen, game_state['camera_offset'])
-            game_state['world'].draw_trash(screen, game_state['camera_offset'])
+            with profiler.stage('world_draw'):
+                renderer.mark(game_state.world.draw_landfill(screen, game_state.camera_offset))
+                renderer.mark_many(game_state.world.draw_trash(screen, game_state.camera_offset))
+            
+            # Draw all character shadows in one pass, then the characters
+            with profiler.stage('shadows'):
+                cam_x, cam_y = game_state.camera_offset
+                shadow_positions = [(x - cam_x, y - cam_y) for x, y in game_state.enemies.positions(alpha)]
+                shadow_positions.append((player_render_pos.x - cam_x, player_render_pos.y - cam_y))
+                if renderer.enabled:
+                    renderer.mark_many(draw_shadows(screen, shadow_positions, doreturn=True))
+                else:
+                    draw_shadows(screen, shadow_positions)
+            
+            with profiler.stage('enemies_draw'):
+                renderer.mark_many(game_state.enemies.draw(screen, game_state.camera_offset,
+                                                              doreturn=renderer.enabled, alpha=alpha))
             
-            # Draw characters with shadows
-            for enemy in game_state['enemies']:
-                draw_shadow(screen, (enemy.pos - game_state['camera_offset']).xy)
-                enemy.draw(screen, game_state['camera_offset'])
+            # Shifting the camera by the interpolation error draws the player at its render position
+            player_camera = game_state.camera_offset + (game_state.player.pos - player_render_pos)
+            renderer.mark(game_state.player.draw(screen, player_camera))
+            renderer.mark(game_state.npc.draw(screen, game_state.camera_offset))
             
-            draw_shadow(screen, (game_state['player'].pos - game_state['camera_offset']).xy)
-            game_state['player'].draw(screen, game_state['camera_offset'])
-            game_state['npc'].draw(screen, game_state['camera_offset'])
+            with profiler.stage('light_overlay'):
+                screen.blit(game_state.light_overlay, (0, 0))
             
-            # Draw UI
-            screen.blit(font.render(f"Score: {game_state['score']} / 5", True, BLACK), (20, 20))
-            screen.blit(font.render(f"Enemies Killed: {game_state['enemies_killed']}/20", True, BLACK), (20, 60))
-            screen.blit(font.render(f"Carrying Trash: {'Yes' if game_state['player'].carrying_trash else 'No'}", 
-                                 True, BLACK), (20, 40))
-            game_state['health_system'].draw_health_bar(screen)
-            screen.blit(game_state['light_overlay'], (0, 0))
+            # Draw UI (text is only re-rendered when the underlying value changes)
+            with profiler.stage('hud'):
+                game_state.hud_message = active_message(game_state)
+                game_state.hud.update(game_state)
+                renderer.mark_many(game_state.hud.draw(screen))
             
             # Debug: Draw sword hitbox
-            if game_state['player'].attacking and game_state['player'].has_sword:
-                hitbox = game_state['player'].get_sword_hitbox()
-                screen_hitbox = hitbox.move(-game_state['camera_offset'].x, -game_state['camera_offset'].y)
-                pygame.draw.rect(screen, (255, 0, 0, 100), screen_hitbox, 1)
+            if game_state.player.attacking and game_state.player.has_sword:
+                hitbox = game_state.player.get_sword_hitbox()
+                screen_hitbox = hitbox.move(-game_state.camera_offset.x, -game_state.camera_offset.y)
+                renderer.mark(pygame.draw.rect(screen, (255, 0, 0, 100), screen_hitbox, 1))
             
             # Achievement notification
-            if game_state['mission_complete'] and not game_state['npc'].achievement_shown:
+            if game_state.mission_complete and not game_state.npc.achievement_shown:
                 msg = font.render("🎉 Achievement Unlocked: Clean Champion!", True, (0, 128, 0))
                 screen.blit(msg, msg.get_rect(center=(WIDTH // 2, HEIGHT // 2)))
-                game_state['npc'].achievement_shown = True
+                game_state.npc.achievement_shown = True
                 pygame.display.flip()
                 pygame.time.wait(2000)
             
-            # NPC messages
-            if game_state['show_npc_message']:
-                draw_message_box(screen, "BALEN: Please collect 5 trash items!")
-                pygame.display.flip()
-                if pygame.time.get_ticks() - game_state['pause_start'] < 3000:
-                    continue
-                else:
-                    game_state['show_npc_message'] = False
-            
-            # Sword message
-            if game_state.get('show_sword_message', False):
-                if pygame.time.get_ticks() - game_state['sword_message_time'] < 3000:
-                    draw_message_box(screen, "You got a SWORD! Press SPACE to attack")
-                else:
-                    game_state['show_sword_message'] = False
-            
-            # Current NPC message
-            if game_state['current_message'] and pygame.time.get_ticks() - game_state['message_time'] < 3000:
-                draw_message_box(screen, game_state['current_message'])
         else:
             # Game over screen
-            game_over_text = large_font.render("YOU DIED - Press R to restart", True, (255, 0, 0))
-            text_rect = game_over_text.get_rect(center=(WIDTH//2, HEIGHT//2))
-            screen.blit(game_over_text, text_rect)
+            if self.game_over_text is None:
+                self.game_over_text = large_font.render("YOU DIED - Press R to restart", True, (255, 0, 0))
+            text_rect = self.game_over_text.get_rect(center=(WIDTH//2, HEIGHT//2))
+            renderer.mark(screen.blit(self.game_over_text, text_rect))
+            self.game_over_drawn = True
+        
+        # Profiler overlay (F3), the previous frame's numbers
+        renderer.mark(profiler.draw_overlay(screen))
         
-        pygame.display.flip()
+        with profiler.stage('present'):
+            renderer.present()
+
+    def close(self):
+        """Finish saves and the input recording when the program ends"""
+        if self.game_state is None:
+            return
+        # Keep progress on exit, a finished run (game over) leaves the last autosave in place
+        game_state = self.game_state
+        self.autosaver.close(game_state if game_state.game_active else None)
+        if self.recorder is not None:
+            self.recorder.close(game_state)
+            print(f"Wrote input recording to {self.recorder.path} "
+                  f"(replay with: python headless.py --replay {self.recorder.path})")
 
+def main(seed=None, record_path=None, resume=False, dirty_rects=False):
+    """Run the menu, overworld and boss fight as scenes in one main loop"""
+    if resume and record_path is not None:
+        # Replays start from initialize_game(), a recording made on top of a save could never match
+        print("--record can't be combined with --continue: recordings always start from a new game")
+        pygame.quit()
+        sys.exit(2)
+    renderer.enabled = dirty_rects
+    manager = SceneManager(screen, FPS)
+    menu = manager.add('menu', StartMenu(WIDTH, HEIGHT))
+    menu.renderer.enabled = dirty_rects
+    overworld = manager.add('overworld', Overworld(seed, record_path, resume))
+    manager.add('bossfight', BossFight(WIDTH, HEIGHT, dirty_rects, return_scene='overworld'))
+    manager.run('menu')
+    overworld.close()
     pygame.quit()
     sys.exit()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    if "--profile" in sys.argv:
+        profiler.enabled = True
+    # --seed N fixes every random stream, --record PATH saves the session's input for headless replay
+    seed = int(sys.argv[sys.argv.index("--seed") + 1]) if "--seed" in sys.argv else None
+    record_path = sys.argv[sys.argv.index("--record") + 1] if "--record" in sys.argv else None
+    main(seed, record_path, resume="--continue" in sys.argv, dirty_rects="--dirty-rects" in sys.argv)
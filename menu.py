@@ -1,17 +1,18 @@
 import pygame
-import sys
 import os
+from asset_cache import assets
+from dirty_rects import DirtyRectRenderer
+from scene import Scene
 
 def load_image(relative_path, size=None):
-    full_path = os.path.join(os.getcwd(), "assets", relative_path)
-    if not os.path.exists(full_path):
-        print(f"[WARNING] Missing image file: {full_path}")
+    try:
+        return assets.image(os.path.join("assets", relative_path), size)
+    except FileNotFoundError as e:
+        print(f"[WARNING] Missing image file: {e}")
         return pygame.Surface((48, 48), pygame.SRCALPHA)
-    img = pygame.image.load(full_path).convert_alpha()
-    return pygame.transform.smoothscale(img, size) if size else img
 
-class StartMenu:
-    def __init__(self, screen_width, screen_height):
+class StartMenu(Scene):
+    def __init__(self, screen_width, screen_height, next_scene='overworld'):
         self.screen_width = screen_width
         self.screen_height = screen_height
         self.background = None
@@ -20,6 +21,13 @@ class StartMenu:
         self.instruction_font = None
         self.start_button = None
         self.initialized = False
+        self.renderer = DirtyRectRenderer((screen_width, screen_height), enabled=False)
+        self.next_scene = next_scene  # Started by the START button, preloaded while the menu is up
+        self.last_hovering = None
+        self.last_progress = None
+        self.static_layer = None  # Background, title and instructions, see render_static_layer
+        self.button_text = None
+        self.needs_redraw = True
 
     def load_resources(self):
         try:
@@ -65,34 +73,15 @@ class StartMenu:
         text_surface = font.render(text, True, main_color)
         screen.blit(text_surface, (x, y))
 
-    def draw(self, screen):
-        if not self.initialized:
-            self.load_resources()
-
-        screen.blit(self.background, (0, 0))
+    def render_static_layer(self):
+        """Background, glowing title and instructions: everything that never changes, rendered once"""
+        layer = self.background.copy()
 
         # Title with glow
         title_text = "Trash Collector"
         x = self.screen_width // 2 - self.title_font.size(title_text)[0] // 2
         y = self.screen_height // 4
-        self.draw_glow_text(screen, self.title_font, title_text, x, y, (255, 255, 255), (0, 255, 180))
-
-        # Hover effect for button
-        mouse_pos = pygame.mouse.get_pos()
-        hovering = self.start_button.collidepoint(mouse_pos)
-        button_color = (60, 180, 90) if hovering else (50, 150, 50)
-        border_color = (30, 100, 30)
-
-        # Button rectangle
-        pygame.draw.rect(screen, button_color, self.start_button, border_radius=12)
-        pygame.draw.rect(screen, border_color, self.start_button, 4, border_radius=12)
-
-        # Button text
-        button_text = self.button_font.render("START", True, (255, 255, 255))
-        screen.blit(button_text, (
-            self.start_button.centerx - button_text.get_width() // 2,
-            self.start_button.centery - button_text.get_height() // 2
-        ))
+        self.draw_glow_text(layer, self.title_font, title_text, x, y, (255, 255, 255), (0, 255, 180))
 
         # Instructions
         instructions = [
@@ -103,36 +92,97 @@ class StartMenu:
 
         for i, line in enumerate(instructions):
             instr_surf = self.instruction_font.render(line, True, (230, 230, 230, 200))
-            screen.blit(instr_surf, (
+            layer.blit(instr_surf, (
                 self.screen_width // 2 - instr_surf.get_width() // 2,
                 self.screen_height // 2 + 20 + i * 28
             ))
+        self.button_text = self.button_font.render("START", True, (255, 255, 255))
+        return layer
 
-    def run(self, screen):
+    def draw_menu(self, screen, hovering):
         if not self.initialized:
             self.load_resources()
+        if self.static_layer is None:
+            self.static_layer = self.render_static_layer()
 
-        clock = pygame.time.Clock()
-        running = True
+        screen.blit(self.static_layer, (0, 0))
 
-        while running:
-            screen.blit(self.background, (0, 0))
-            self.draw(screen)
+        # Hover effect for button
+        button_color = (60, 180, 90) if hovering else (50, 150, 50)
+        border_color = (30, 100, 30)
 
-            mouse_pos = pygame.mouse.get_pos()
-            mouse_clicked = False
+        # Button rectangle
+        pygame.draw.rect(screen, button_color, self.start_button, border_radius=12)
+        pygame.draw.rect(screen, border_color, self.start_button, 4, border_radius=12)
 
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    sys.exit()
-                if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-                    mouse_clicked = True
+        # Button text
+        screen.blit(self.button_text, (
+            self.start_button.centerx - self.button_text.get_width() // 2,
+            self.start_button.centery - self.button_text.get_height() // 2
+        ))
 
-            if self.start_button.collidepoint(mouse_pos) and mouse_clicked:
-                return True
+    def draw_loading_bar(self, screen, progress):
+        """Draw asset loading progress under the start button, returns its rect"""
+        bar = pygame.Rect(0, 0, self.start_button.width, 8)
+        bar.midtop = (self.start_button.centerx, self.start_button.bottom + 16)
+        pygame.draw.rect(screen, (30, 30, 30), bar, border_radius=4)
+        fill = bar.copy()
+        fill.width = int(bar.width * progress)
+        if fill.width:
+            pygame.draw.rect(screen, (0, 255, 180), fill, border_radius=4)
+        return bar
+
+    def enter(self, previous):
+        if not self.initialized:
+            self.load_resources()
+        pygame.display.set_caption("Trash Collector")
+        self.invalidate()
+        self.manager.preload(self.next_scene)  # Decode its assets behind the menu
+
+    def handle_event(self, event):
+        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1 and self.start_button.collidepoint(event.pos):
+            self.manager.switch(self.next_scene)
+
+    def invalidate(self):
+        self.needs_redraw = True
+        self.renderer.invalidate()
+
+    def is_idle(self):
+        return True  # Only input, hover and the loading bar change the menu
 
-            pygame.display.flip()
-            clock.tick(60)
+    def idle_timeout(self):
+        loader = self.next_loader()
+        return 1000 if loader is None or loader.is_done() else 100  # Wake up to advance the loading bar
 
-        return False
+    def next_loader(self):
+        """AssetLoader of the scene the menu leads to, if it loads in the background"""
+        return getattr(self.manager.scenes[self.next_scene], 'loader', None)
+
+    def update(self, dt):
+        loader = self.next_loader()
+        if loader is not None:
+            loader.pump()  # Hand decoded assets over to the main thread
+
+    def draw(self, screen):
+        hovering = self.start_button.collidepoint(pygame.mouse.get_pos())
+        loader = self.next_loader()
+        progress = loader.progress() if loader is not None else None
+        if not self.needs_redraw and hovering == self.last_hovering and progress == self.last_progress:
+            return  # Nothing changed, the display still shows the last frame
+
+        self.renderer.begin_frame()
+        self.draw_menu(screen, hovering)
+        # Only the button and the loading bar ever change, everything else is static
+        if hovering != self.last_hovering:
+            self.renderer.mark(self.start_button)
+            self.last_hovering = hovering
+
+        # Show how far along the next scene's background loading is
+        if loader is not None:
+            bar = self.draw_loading_bar(screen, progress)
+            if progress != self.last_progress:
+                self.renderer.mark(bar)
+                self.last_progress = progress
+
+        self.needs_redraw = False
+        self.renderer.present()
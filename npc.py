@@ -1,36 +1,54 @@
 import pygame
+from ecs import Registry, EntityFacade, Position, Sprite, Trigger, vector_property, field_property
 
-class NPC:
-    def __init__(self, pos, image, safezone_radius=250, chat_radius=120):
-        self.pos = pygame.Vector2(pos)
-        self.image = image
-        self.rect = self.image.get_rect(center=self.pos)
-        self.safezone_radius = safezone_radius
+NPC_COMPONENTS = (Position, Sprite, Trigger)
+
+
+class NPC(EntityFacade):
+    """Facade over the NPC entity; its trigger radius is the safezone"""
+    __slots__ = ('chat_radius', 'rect', 'achievement_shown', 'second_quest_given', 'second_quest_complete')
+
+    pos = vector_property('pos')
+    safezone_radius = field_property('radius')
+
+    def __init__(self, pos, image, safezone_radius=250, chat_radius=120, registry=None):
+        super().__init__(None, -1)
+        registry = registry if registry is not None else Registry()
+        registry.create(*NPC_COMPONENTS, view=self, pos=pos, prev_pos=pos, sprite=image, radius=safezone_radius)
+        self.rect = image.get_rect(center=pos)
         self.chat_radius = chat_radius
         self.achievement_shown = False
         self.second_quest_given = False
         self.second_quest_complete = False
 
-    def is_in_safezone(self, player_pos):
-        return self.pos.distance_to(player_pos) <= self.safezone_radius
+    @property
+    def image(self):
+        return self.archetype.sprite[self.index]
+
+    def snapshot(self):
+        return (self.achievement_shown, self.second_quest_given, self.second_quest_complete)
+
+    def restore(self, state):
+        self.achievement_shown, self.second_quest_given, self.second_quest_complete = state
 
     def is_in_chat_radius(self, player_pos):
         return self.pos.distance_to(player_pos) <= self.chat_radius
 
     def get_message(self, game_state):
-        if not game_state['mission_complete']:
+        if not game_state.mission_complete:
             return "BALEN: Please collect 5 trash items!"
-        elif game_state['mission_complete'] and not self.second_quest_given:
+        elif game_state.mission_complete and not self.second_quest_given:
             self.second_quest_given = True
             return "BALEN: Now defeat 20 enemies with your sword!"
-        elif self.second_quest_given and not game_state['second_mission_complete']:
-            return f"BALEN: Enemies defeated: {game_state['enemies_killed']}/20"
-        elif game_state['second_mission_complete']:
+        elif self.second_quest_given and not game_state.second_mission_complete:
+            return f"BALEN: Enemies defeated: {game_state.enemies_killed}/20"
+        elif game_state.second_mission_complete:
             return "BALEN: You've proven yourself worthy!"
         return None
 
     def draw(self, surface, camera_offset):
         pos = self.pos - camera_offset
-        surface.blit(self.image, self.image.get_rect(center=pos))
+        dirty = surface.blit(self.image, self.image.get_rect(center=pos))
         # Optionally draw the safe zone circle
-        pygame.draw.circle(surface, (255, 255, 0), (int(pos.x), int(pos.y)), self.safezone_radius, 2)
\ No newline at end of file
+        circle = pygame.draw.circle(surface, (255, 255, 0), (int(pos.x), int(pos.y)), self.safezone_radius, 2)
+        return dirty.union(circle)
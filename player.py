@@ -1,6 +1,9 @@
 import pygame
 import math
 from weapon import Sword
+from effect_cache import effects
+from profiler import profiler
+from timestep import sim_clock, BASE_TICK_RATE
 
 # Key constants
 K_LEFT = pygame.K_LEFT
@@ -48,20 +51,24 @@ class Player:
         self.attack_cooldown = 300  # milliseconds between attacks
         self.last_attack_time = 0
         
+        # Input source returning a key-state mapping, swapped out for scripted/headless play
+        self.input_source = pygame.key.get_pressed
+        
         # State tracking
-        self.last_update = pygame.time.get_ticks()
+        self.last_update = sim_clock.get_ticks()
+        self.prev_pos = pygame.Vector2(self.pos)  # Position at the previous simulation tick
 
-    def animate(self):
-        """Handle animation cycling"""
+    def animate(self, dt=1 / BASE_TICK_RATE):
+        """Handle animation cycling (animation_speed is frames per 1/60 s)"""
         animation = self.animations[self.status]
-        self.frame_index += self.animation_speed
+        self.frame_index += self.animation_speed * dt * BASE_TICK_RATE
         if self.frame_index >= len(animation):
             self.frame_index = 0
         self.image = animation[int(self.frame_index)]
 
     def get_input(self):
         """Handle all keyboard input"""
-        keys = pygame.key.get_pressed()
+        keys = self.input_source()
         
         # Reset movement
         self.direction.x, self.direction.y = 0, 0
@@ -92,7 +99,7 @@ class Player:
             
         # Sword attack
         if keys[K_SPACE] and self.has_sword and not self.attacking:
-            current_time = pygame.time.get_ticks()
+            current_time = sim_clock.get_ticks()
             if current_time - self.last_attack_time > self.attack_cooldown:
                 self.attack(current_time)
 
@@ -106,7 +113,7 @@ class Player:
         
         # Update animations
         if self.direction.magnitude() > 0:
-            self.animate()
+            self.animate(dt)
         else:
             # Reset to first frame when not moving
             self.frame_index = 0
@@ -114,13 +121,43 @@ class Player:
         
         # Update sword
         if self.has_sword:
-            self.sword.update()
+            self.sword.update(dt)
             
         # Update invulnerability
-        current_time = pygame.time.get_ticks()
+        current_time = sim_clock.get_ticks()
         if self.invulnerable and current_time - self.last_hit_time > self.hit_cooldown:
             self.invulnerable = False
 
+    def store_previous(self):
+        """Remember the position before a simulation tick for render interpolation"""
+        self.prev_pos.update(self.pos)
+
+    def render_pos(self, alpha):
+        """Position between the previous and current tick"""
+        return self.prev_pos.lerp(self.pos, alpha)
+
+    def snapshot(self):
+        """Mutable simulation state as a flat tuple (no surfaces or sounds)"""
+        return (self.pos.x, self.pos.y, self.prev_pos.x, self.prev_pos.y, self.facing.x, self.facing.y,
+                self.status, self.frame_index, self.carrying_trash, self.has_sword, self.attacking,
+                self.last_attack_time, self.health, self.invulnerable, self.last_hit_time,
+                self.sword.snapshot())
+
+    def restore(self, state):
+        """Put back a snapshot() and refresh the derived image and rect"""
+        (x, y, prev_x, prev_y, facing_x, facing_y,
+         self.status, self.frame_index, self.carrying_trash, self.has_sword, self.attacking,
+         self.last_attack_time, self.health, self.invulnerable, self.last_hit_time,
+         sword_state) = state
+        self.pos.update(x, y)
+        self.prev_pos.update(prev_x, prev_y)
+        self.facing = pygame.Vector2(facing_x, facing_y)
+        self.direction = pygame.Vector2(0, 0)
+        self.trash_inventory = []
+        self.sword.restore(sword_state)
+        self.image = self.animations[self.status][int(self.frame_index)]
+        self.sync_rect()
+
     def attack(self, current_time):
         """Initiate sword attack"""
         if self.has_sword:
@@ -132,7 +169,7 @@ class Player:
 
     def take_damage(self, amount=1):
         """Handle taking damage from enemies"""
-        current_time = pygame.time.get_ticks()
+        current_time = sim_clock.get_ticks()
         if not self.invulnerable:
             self.health -= amount
             self.last_hit_time = current_time
@@ -152,6 +189,10 @@ class Player:
             return self.sword.get_hitbox()
         return pygame.Rect(0, 0, 0, 0)  # Empty rect when not attacking
 
+    def sync_rect(self):
+        """Keep rect centered on the current position"""
+        self.rect.center = self.pos
+
     def get_world_rect(self):
         """Get player's collision rect in world coordinates"""
         return pygame.Rect(
@@ -169,25 +210,26 @@ class Player:
             return True
         return False
 
+    @profiler.profile('player.draw')
     def draw(self, surface, camera_offset):
-        """Draw player and sword with camera offset"""
+        """Draw player and sword with camera offset, returning the screen rect touched"""
         screen_pos = self.pos - camera_offset
         
         # Draw player with invulnerability flash effect
         if self.invulnerable:
-            flash_phase = (pygame.time.get_ticks() - self.last_hit_time) % 200
+            flash_phase = (sim_clock.get_ticks() - self.last_hit_time) % 200
             if flash_phase < 100:  # Flash on/off every 100ms
-                temp_image = self.image.copy()
-                temp_image.fill((255, 255, 255, 180), special_flags=pygame.BLEND_RGBA_MULT)
-                surface.blit(temp_image, temp_image.get_rect(center=screen_pos))
+                temp_image = effects.tinted(self.image, (255, 255, 255, 180))
+                dirty = surface.blit(temp_image, temp_image.get_rect(center=screen_pos))
             else:
-                surface.blit(self.image, self.image.get_rect(center=screen_pos))
+                dirty = surface.blit(self.image, self.image.get_rect(center=screen_pos))
         else:
-            surface.blit(self.image, self.image.get_rect(center=screen_pos))
+            dirty = surface.blit(self.image, self.image.get_rect(center=screen_pos))
         
         # Draw sword
         if self.has_sword:
-            self.sword.draw(surface, camera_offset)
+            dirty = dirty.union(self.sword.draw(surface, camera_offset))
             
         # Debug: Draw hitbox
-        # pygame.draw.rect(surface, (255, 0, 0), self.get_world_rect().move(-camera_offset.x, -camera_offset.y), 1)
\ No newline at end of file
+        # pygame.draw.rect(surface, (255, 0, 0), self.get_world_rect().move(-camera_offset.x, -camera_offset.y), 1)
+        return dirty
@@ -0,0 +1,270 @@
+import os
+import json
+import time
+import functools
+import numpy as np
+import pygame
+
+
+class _Stage:
+    """Reusable context manager that times one named stage"""
+    __slots__ = ('profiler', 'name_id', 'start')
+
+    def __init__(self, profiler, name_id):
+        self.profiler = profiler
+        self.name_id = name_id
+        self.start = 0
+
+    def __enter__(self):
+        self.profiler.depth += 1
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter_ns()
+        profiler = self.profiler
+        profiler.depth -= 1
+        profiler.record(self.name_id, self.start, end - self.start, profiler.depth)
+        return False
+
+
+class _NoStage:
+    """Stand-in used while profiling is off, costs one method call"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_STAGE = _NoStage()
+
+
+class Profiler:
+    """Per-stage frame timings in a fixed-size ring buffer, with overlay and trace export"""
+    def __init__(self, capacity=65536, frame_history=600, budget_ms=1000 / 60,
+                 snapshot_dir=None, snapshot_interval=1.0, enabled=False):
+        self.enabled = enabled
+        self.capacity = capacity
+        # Ring buffer of stage events, one row per finished stage
+        self.event_name = np.zeros(capacity, dtype=np.int32)
+        self.event_start = np.zeros(capacity, dtype=np.int64)  # perf_counter_ns
+        self.event_duration = np.zeros(capacity, dtype=np.int64)
+        self.event_depth = np.zeros(capacity, dtype=np.int16)
+        self.event_frame = np.zeros(capacity, dtype=np.int64)
+        self.head = 0  # Next slot to write
+        self.size = 0
+        self.depth = 0
+
+        self.names = []  # name_id -> stage name
+        self.name_ids = {}
+        self.stages = {}  # name -> _Stage
+
+        # Frame times for the histogram, plus this frame's per-stage totals
+        self.frame_history = np.zeros(frame_history, dtype=np.float64)
+        self.frame_head = 0
+        self.frame_count = 0
+        self.frame_start = None
+        self.frame_totals = {}
+        self.rolling = {}  # name -> smoothed ms per frame
+        self.smoothing = 0.1
+
+        self.budget_ms = budget_ms
+        self.snapshot_dir = snapshot_dir or os.path.join(os.path.dirname(os.path.abspath(__file__)), "profiles")
+        self.snapshot_interval = snapshot_interval  # Seconds between over-budget snapshots
+        self.last_snapshot = 0.0
+        self.snapshots = 0
+
+        self.overlay_visible = False
+        self.enabled_before_overlay = enabled  # Restored when the overlay is hidden
+        self.overlay = None
+        self.overlay_every = 15  # Re-render the overlay every N frames
+        self.font = None
+
+    # Instrumentation
+    def _name_id(self, name):
+        name_id = self.name_ids.get(name)
+        if name_id is None:
+            name_id = self.name_ids[name] = len(self.names)
+            self.names.append(name)
+        return name_id
+
+    def stage(self, name):
+        """Context manager timing the enclosed block as stage name"""
+        if not self.enabled:
+            return _NO_STAGE
+        stage = self.stages.get(name)
+        if stage is None:
+            stage = self.stages[name] = _Stage(self, self._name_id(name))
+        return stage
+
+    def profile(self, name=None):
+        """Decorator timing every call of a function as stage name"""
+        def decorate(fn):
+            stage_name = name or fn.__qualname__
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                with self.stage(stage_name):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def record(self, name_id, start, duration, depth=0):
+        i = self.head
+        self.event_name[i] = name_id
+        self.event_start[i] = start
+        self.event_duration[i] = duration
+        self.event_depth[i] = depth
+        self.event_frame[i] = self.frame_count
+        self.head = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+        # Inclusive time per stage name, summed over every call this frame
+        self.frame_totals[name_id] = self.frame_totals.get(name_id, 0) + duration
+
+    # Frames
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        self.frame_start = time.perf_counter_ns()
+        self.frame_totals = {}
+
+    def end_frame(self):
+        """Close the frame, update rolling stats and snapshot it if it blew the budget"""
+        if not self.enabled or self.frame_start is None:
+            return
+        end = time.perf_counter_ns()
+        frame_ms = (end - self.frame_start) / 1e6
+        breakdown = {self.names[i]: ns / 1e6 for i, ns in self.frame_totals.items()}
+        self.record(self._name_id('frame'), self.frame_start, end - self.frame_start, -1)
+
+        self.frame_history[self.frame_head] = frame_ms
+        self.frame_head = (self.frame_head + 1) % len(self.frame_history)
+        self.frame_count += 1
+
+        for name in self.rolling.keys() | breakdown.keys():
+            ms = breakdown.get(name, 0.0)
+            self.rolling[name] = self.rolling.get(name, ms) + (ms - self.rolling.get(name, ms)) * self.smoothing
+
+        if frame_ms > self.budget_ms:
+            self._snapshot(frame_ms, breakdown)
+        self.frame_start = None
+
+    def _snapshot(self, frame_ms, breakdown):
+        now = time.monotonic()
+        if now - self.last_snapshot < self.snapshot_interval:
+            return  # A run of slow frames only needs one file
+        self.last_snapshot = now
+        try:
+            os.makedirs(self.snapshot_dir, exist_ok=True)
+            path = os.path.join(self.snapshot_dir, f"slow-frame-{self.frame_count}.json")
+            with open(path, 'w') as f:
+                json.dump({
+                    'frame': self.frame_count,
+                    'frame_ms': frame_ms,
+                    'budget_ms': self.budget_ms,
+                    'stages_ms': dict(sorted(breakdown.items(), key=lambda kv: -kv[1])),
+                }, f, indent=2)
+            self.snapshots += 1
+        except OSError as e:
+            print(f"Could not write profile snapshot: {e}")
+
+    # Export
+    def events(self, seconds=None):
+        """Buffered events in completion order as (name, start_ns, duration_ns, depth, frame)"""
+        if self.size < self.capacity:
+            order = np.arange(self.size)
+        else:
+            order = np.roll(np.arange(self.capacity), -self.head)
+        if seconds is not None and len(order):
+            newest = self.event_start[order].max()
+            order = order[self.event_start[order] >= newest - int(seconds * 1e9)]
+        return [(self.names[self.event_name[i]], int(self.event_start[i]), int(self.event_duration[i]),
+                 int(self.event_depth[i]), int(self.event_frame[i])) for i in order]
+
+    def export_chrome_trace(self, path=None, seconds=10):
+        """Write the last seconds of events as Chrome trace JSON (chrome://tracing, Perfetto)"""
+        if path is None:
+            path = os.path.join(self.snapshot_dir, f"trace-{int(time.time())}.json")
+        events = self.events(seconds)
+        origin = min((start for _, start, _, _, _ in events), default=0)
+        trace = [{'name': name, 'ph': 'X', 'pid': 1, 'tid': 1,
+                  'ts': (start - origin) / 1000, 'dur': duration / 1000,
+                  'args': {'frame': frame}}
+                 for name, start, duration, _, frame in events]
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with open(path, 'w') as f:
+                json.dump({'traceEvents': trace, 'displayTimeUnit': 'ms'}, f)
+        except OSError as e:
+            print(f"Could not write trace: {e}")
+            return None
+        return path
+
+    # Overlay
+    def toggle_overlay(self):
+        """Show or hide the overlay; showing it turns recording on until it is hidden again"""
+        self.overlay_visible = not self.overlay_visible
+        if self.overlay_visible:
+            self.enabled_before_overlay = self.enabled
+            self.enabled = True
+        else:
+            self.enabled = self.enabled_before_overlay
+        self.overlay = None
+
+    def _render_overlay(self, width=260, bar_height=40, buckets=20):
+        if self.font is None:
+            self.font = pygame.font.SysFont(None, 18)
+        rows = sorted(((ms, name) for name, ms in self.rolling.items()), reverse=True)
+        line_height = self.font.get_linesize()
+        height = line_height * (len(rows) + 2) + bar_height + 12
+        overlay = pygame.Surface((width, height), pygame.SRCALPHA)
+        overlay.fill((0, 0, 0, 170))
+
+        filled = min(self.frame_count, len(self.frame_history))
+        frames = self.frame_history[:filled] if filled < len(self.frame_history) else self.frame_history
+        avg = frames.mean() if filled else 0.0
+        worst = frames.max() if filled else 0.0
+        header = f"frame {avg:5.2f} ms avg  {worst:5.2f} max"
+        overlay.blit(self.font.render(header, True, (255, 255, 255)), (6, 4))
+        y = 4 + line_height
+        for ms, name in rows:
+            color = (255, 120, 120) if ms > self.budget_ms / 4 else (220, 220, 220)
+            overlay.blit(self.font.render(f"{ms:6.2f}  {name}", True, color), (6, y))
+            y += line_height
+
+        # Frame-time histogram, the budget bucket and beyond are drawn red
+        if filled:
+            top = max(worst, self.budget_ms * 1.5)
+            counts, edges = np.histogram(frames, bins=buckets, range=(0, top))
+            peak = max(counts.max(), 1)
+            bar_width = (width - 12) / buckets
+            for i, count in enumerate(counts):
+                h = int(bar_height * count / peak)
+                color = (255, 80, 80) if edges[i + 1] > self.budget_ms else (120, 220, 120)
+                pygame.draw.rect(overlay, color, (6 + i * bar_width, y + 4 + bar_height - h,
+                                                  max(1, bar_width - 1), h))
+        return overlay
+
+    def draw_overlay(self, surface, pos=(10, 110)):
+        """Draw the overlay if visible and return its screen rect"""
+        if not self.overlay_visible:
+            return None
+        if self.overlay is None or self.frame_count % self.overlay_every == 0:
+            self.overlay = self._render_overlay()
+        return surface.blit(self.overlay, pos)
+
+    def clear(self):
+        self.head = 0
+        self.size = 0
+        self.frame_count = 0
+        self.frame_head = 0
+        self.rolling.clear()
+
+
+# Shared by the main loop and the instrumented draw methods
+profiler = Profiler()
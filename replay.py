@@ -0,0 +1,138 @@
+import struct
+import zlib
+import numpy as np
+import pygame
+from chunks import chunk_bytes
+
+# File layout: header, then (repeat, bits) runs of identical ticks, then a footer written on close
+MAGIC = b'TCIR'
+VERSION = 1
+_HEADER = struct.Struct('<4sHHq')  # magic, version, tick rate, session seed
+_RUN = np.dtype([('repeat', '<u2'), ('bits', '<u2')])
+_FOOTER = struct.Struct('<4sQIH')  # end marker, tick count, final state checksum, trailing events
+_END = b'END!'
+
+# Bits 0-8: keys read by Player.get_input, held for the whole tick
+RECORDED_KEYS = (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN,
+                 pygame.K_a, pygame.K_d, pygame.K_w, pygame.K_s, pygame.K_SPACE)
+# Bits 9-10: KEYDOWN actions taken by the event loop just before the tick
+ATTACK = 1 << 9
+RESET = 1 << 10
+
+
+class KeyState:
+    """Minimal stand-in for pygame.key.get_pressed() built from a set of pressed keys"""
+    __slots__ = ('pressed',)
+
+    def __init__(self, pressed=()):
+        self.pressed = frozenset(pressed)
+
+    def __getitem__(self, key):
+        return key in self.pressed
+
+
+def encode_keys(keys):
+    """Pack the recorded keys of a get_pressed()-like object into bits"""
+    bits = 0
+    for bit, key in enumerate(RECORDED_KEYS):
+        if keys[key]:
+            bits |= 1 << bit
+    return bits
+
+
+def decode_keys(bits):
+    return KeyState(key for bit, key in enumerate(RECORDED_KEYS) if bits & (1 << bit))
+
+
+def state_checksum(game_state):
+    """CRC32 of the simulation state, equal only if two runs ended bit-identically"""
+    snap = game_state.snapshot()
+    crc = zlib.crc32(snap.scalars)
+    # repr keeps every float exactly; ints go through float so 0 and 0.0 (same game state) match
+    crc = zlib.crc32(repr(_as_floats((snap.current_message, snap.player, snap.health, snap.npc))).encode(), crc)
+    for column in snap.enemies[1]:
+        crc = zlib.crc32(np.ascontiguousarray(column).tobytes(), crc)
+    trash_positions, trash_entities, _, _, chunks = snap.world
+    crc = zlib.crc32(trash_positions.tobytes(), crc)
+    crc = zlib.crc32(trash_entities.tobytes(), crc)
+    # Entities frozen in dormant chunks are part of the state too
+    for key in sorted(chunks):
+        crc = zlib.crc32(repr(key).encode() + chunk_bytes(chunks[key]), crc)
+    return crc
+
+
+def _as_floats(values):
+    return tuple(_as_floats(v) if type(v) is tuple else float(v) if type(v) is int else v for v in values)
+
+
+class InputRecorder:
+    """Writes the per-tick input of a session to a compact run-length encoded binary file"""
+    def __init__(self, path, tick_rate, seed):
+        self.path = path
+        self.file = open(path, 'wb')
+        self.file.write(_HEADER.pack(MAGIC, VERSION, tick_rate, seed))
+        self.ticks = 0
+        self.pending = 0  # Event bits waiting for the next tick
+        self.bits = None
+        self.repeat = 0
+
+    def mark(self, event):
+        """Note an ATTACK or RESET taken by the event loop; it is stored with the next tick"""
+        self.pending |= event
+
+    def record_tick(self, keys):
+        """Record the input of one simulation tick, call right before update_simulation"""
+        bits = encode_keys(keys) | self.pending
+        self.pending = 0
+        if bits == self.bits and self.repeat < 0xFFFF:
+            self.repeat += 1
+        else:
+            self._flush()
+            self.bits, self.repeat = bits, 1
+        self.ticks += 1
+
+    def _flush(self):
+        if self.repeat:
+            self.file.write(np.array([(self.repeat, self.bits)], dtype=_RUN).tobytes())
+
+    def close(self, game_state):
+        """Finish the file with the tick count and a checksum of the final state"""
+        if self.file is None:
+            return
+        self._flush()
+        # Events after the last tick (a restart right before quitting) are kept so replays end the same
+        self.file.write(_FOOTER.pack(_END, self.ticks, state_checksum(game_state), self.pending))
+        self.file.close()
+        self.file = None
+
+
+class Recording:
+    """A loaded input recording: one uint16 of key and event bits per tick"""
+    def __init__(self, tick_rate, seed, ticks, checksum, trailing=0):
+        self.tick_rate = tick_rate
+        self.seed = seed
+        self.ticks = ticks  # Per-tick bits as a NumPy array
+        self.checksum = checksum  # None if the session ended without closing the file
+        self.trailing = trailing  # Event bits taken after the last tick
+
+    def __len__(self):
+        return len(self.ticks)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            data = f.read()
+        magic, version, tick_rate, seed = _HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} input recording")
+        body, checksum, trailing = data[_HEADER.size:], None, 0
+        footer_start = len(body) - _FOOTER.size
+        if footer_start >= 0 and footer_start % _RUN.itemsize == 0 and body[footer_start:footer_start + 4] == _END:
+            _, tick_count, checksum, trailing = _FOOTER.unpack(body[-_FOOTER.size:])
+            body = body[:-_FOOTER.size]
+        # A crashed session can leave a partial run at the end, drop it
+        runs = np.frombuffer(body, dtype=_RUN, count=len(body) // _RUN.itemsize)
+        ticks = np.repeat(runs['bits'], runs['repeat'])
+        if checksum is not None and len(ticks) != tick_count:
+            raise ValueError(f"{path} has {len(ticks)} ticks, footer says {tick_count}")
+        return cls(tick_rate, seed, ticks, checksum, trailing)
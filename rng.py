@@ -0,0 +1,37 @@
+import random
+
+
+class RandomStreams:
+    """One seeded random.Random per subsystem, so extra draws in one system never shift another"""
+    def __init__(self, seed=None):
+        self.streams = {}  # Name -> random.Random
+        self.seed(seed)
+
+    def seed(self, seed=None):
+        """Reseed every stream from one session seed (None picks a fresh one) and return it"""
+        if seed is None:
+            seed = random.SystemRandom().randrange(2 ** 63)
+        self.session_seed = seed
+        for name, stream in self.streams.items():
+            stream.seed(f"{seed}:{name}")
+        return seed
+
+    def stream(self, name):
+        """The named stream, created on first use from the session seed"""
+        stream = self.streams.get(name)
+        if stream is None:
+            stream = self.streams[name] = random.Random(f"{self.session_seed}:{name}")
+        return stream
+
+    def getstate(self):
+        return {name: stream.getstate() for name, stream in self.streams.items()}
+
+    def setstate(self, state):
+        for name, stream_state in state.items():
+            self.stream(name).setstate(stream_state)
+
+
+# Shared streams; modules fetch theirs once with rng.stream(name)
+rng = RandomStreams()
+spawn_rng = rng.stream('spawn')  # Enemy spawn edges and positions
+trash_rng = rng.stream('trash')  # Trash placement and relocation
@@ -0,0 +1,235 @@
+import os
+import mmap
+import struct
+import threading
+import zlib
+import numpy as np
+from game_state import GameSnapshot, _SCALARS
+from chunks import chunk_bytes
+
+# File layout (little endian), every block at a fixed or counted size:
+#   header | scalars | player | health | npc | enemy columns | trash | streaming | chunks | rng streams | message
+MAGIC = b'TCSV'
+VERSION = 2
+# magic, version, enemies, trash, chunks, rng streams, message bytes (-1 = None), next entity id, crc32
+_HEADER = struct.Struct('<4sHIIIHiqI')
+_PLAYER = struct.Struct('<6dBd3?qq?q?dq')  # Player.snapshot() with status as an index, then Sword.snapshot()
+_HEALTH = struct.Struct('<qq')
+_NPC = struct.Struct('<3?')
+_STREAM = struct.Struct('<B625I?d')  # name length, Mersenne Twister words, gauss_next flag and value
+_STREAMING = struct.Struct('<iiHH')  # focus chunk (-1 = none yet), active mask rows and cols (0 = all live)
+_CHUNK = struct.Struct('<iiI')  # chunk col, row and frozen blob length
+
+STATUSES = ('up', 'down', 'left', 'right')
+# Enemy columns by name with an explicit on-disk dtype, so the file does not depend on archetype field order
+ENEMY_COLUMNS = (('pos', '<f8', 2), ('prev_pos', '<f8', 2), ('speed', '<f8', 1), ('size', '<i4', 2),
+                 ('health', '<i4', 1), ('last_hit', '<i8', 1), ('death_time', '<i8', 1),
+                 ('is_hit', '?', 1), ('invulnerable', '?', 1), ('entities', '<i8', 1))
+
+# Next to the game like its assets, whatever directory it is started from
+DEFAULT_SAVE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "saves", "autosave.sav")
+
+
+def encode_snapshot(snap, enemy_fields):
+    """Serialize a GameSnapshot; enemy_fields names its enemy columns (archetype.array_fields + ['entities'])"""
+    (x, y, prev_x, prev_y, facing_x, facing_y, status, frame_index, carrying_trash, has_sword, attacking,
+     last_attack_time, health, invulnerable, last_hit_time, (sword_attacking, attack_frame, sword_last)) = snap.player
+    n, arrays, _ = snap.enemies
+    columns = dict(zip(enemy_fields, arrays))
+    message = None if snap.current_message is None else snap.current_message.encode('utf-8')
+
+    parts = [
+        snap.scalars,
+        _PLAYER.pack(x, y, prev_x, prev_y, facing_x, facing_y, STATUSES.index(status), frame_index,
+                     carrying_trash, has_sword, attacking, last_attack_time, health, invulnerable,
+                     last_hit_time, sword_attacking, attack_frame, sword_last),
+        _HEALTH.pack(*snap.health),
+        _NPC.pack(*snap.npc),
+    ]
+    parts.extend(np.ascontiguousarray(columns[name], dtype=dtype).tobytes() for name, dtype, _ in ENEMY_COLUMNS)
+    trash_positions, trash_entities, focus_chunk, active, chunks = snap.world
+    parts.append(np.ascontiguousarray(trash_positions, dtype='<f8').tobytes())
+    parts.append(np.ascontiguousarray(trash_entities, dtype='<i8').tobytes())
+    focus_col, focus_row = focus_chunk if focus_chunk is not None else (-1, -1)
+    mask_rows, mask_cols = active.shape if active is not None else (0, 0)
+    parts.append(_STREAMING.pack(focus_col, focus_row, mask_rows, mask_cols))
+    if active is not None:
+        parts.append(np.ascontiguousarray(active, dtype='?').tobytes())
+    for key in sorted(chunks):
+        # Spilled chunks are read back here, on the autosave thread
+        blob = chunk_bytes(chunks[key])
+        parts.append(_CHUNK.pack(key[0], key[1], len(blob)) + blob)
+    for name, (_, words, gauss) in snap.rng.items():
+        name = name.encode('utf-8')
+        parts.append(_STREAM.pack(len(name), *words, gauss is not None, gauss or 0.0) + name)
+    if message is not None:
+        parts.append(message)
+
+    payload = b''.join(parts)
+    header = _HEADER.pack(MAGIC, VERSION, n, len(trash_positions), len(chunks), len(snap.rng),
+                          -1 if message is None else len(message), snap.next_id, zlib.crc32(payload))
+    return header + payload
+
+
+def decode_snapshot(buffer, enemy_fields, enemy_sprite):
+    """Build a GameSnapshot from encode_snapshot() bytes; arrays are zero-copy views into buffer"""
+    magic, version, n, trash_count, chunk_count, stream_count, message_len, next_id, crc = _HEADER.unpack_from(buffer)
+    if magic != MAGIC:
+        raise ValueError("not a save file")
+    if version != VERSION:
+        raise ValueError(f"save file version {version} is not supported (expected {VERSION})")
+    # No view of the payload outlives the check, an error raised here must not pin the buffer
+    if zlib.crc32(memoryview(buffer)[_HEADER.size:]) != crc:
+        raise ValueError("save file is corrupt (checksum mismatch)")
+
+    offset = _HEADER.size
+    scalars = bytes(buffer[offset:offset + _SCALARS.size])
+    offset += _SCALARS.size
+    fields = _PLAYER.unpack_from(buffer, offset)
+    offset += _PLAYER.size
+    player = fields[:6] + (STATUSES[fields[6]],) + fields[7:15] + (fields[15:],)
+    health = _HEALTH.unpack_from(buffer, offset)
+    offset += _HEALTH.size
+    npc = _NPC.unpack_from(buffer, offset)
+    offset += _NPC.size
+
+    columns = {}
+    for name, dtype, width in ENEMY_COLUMNS:
+        column = np.frombuffer(buffer, dtype=dtype, count=n * width, offset=offset)
+        columns[name] = column.reshape(n, width) if width > 1 else column
+        offset += column.nbytes
+    enemies = (n, tuple(columns[name] for name in enemy_fields), ([enemy_sprite] * n,))
+    trash_positions = np.frombuffer(buffer, dtype='<f8', count=trash_count * 2, offset=offset).reshape(trash_count, 2)
+    offset += trash_positions.nbytes
+    trash_entities = np.frombuffer(buffer, dtype='<i8', count=trash_count, offset=offset)
+    offset += trash_entities.nbytes
+    focus_col, focus_row, mask_rows, mask_cols = _STREAMING.unpack_from(buffer, offset)
+    offset += _STREAMING.size
+    active = None
+    if mask_rows:
+        active = np.frombuffer(buffer, dtype='?', count=mask_rows * mask_cols, offset=offset).reshape(mask_rows, mask_cols)
+        offset += active.nbytes
+    chunks = {}
+    for _ in range(chunk_count):
+        col, row, length = _CHUNK.unpack_from(buffer, offset)
+        offset += _CHUNK.size
+        chunks[(col, row)] = bytes(buffer[offset:offset + length])  # Copied, chunks outlive the map
+        offset += length
+    world = (trash_positions, trash_entities, None if focus_col < 0 else (focus_col, focus_row), active, chunks)
+
+    rng_state = {}
+    for _ in range(stream_count):
+        fields = _STREAM.unpack_from(buffer, offset)
+        offset += _STREAM.size
+        name = bytes(buffer[offset:offset + fields[0]]).decode('utf-8')
+        offset += fields[0]
+        rng_state[name] = (3, fields[1:626], fields[627] if fields[626] else None)
+    message = None if message_len < 0 else bytes(buffer[offset:offset + message_len]).decode('utf-8')
+    return GameSnapshot(scalars, message, player, health, enemies, world, npc, rng_state, next_id)
+
+
+def write_save(path, data):
+    """Write bytes to path atomically, a crash mid-write leaves the previous save intact"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def save_game(game_state, path=DEFAULT_SAVE_PATH):
+    """Synchronously snapshot and write the game"""
+    write_save(path, encode_snapshot(game_state.snapshot(), _enemy_fields(game_state)))
+
+
+def load_game(game_state, path=DEFAULT_SAVE_PATH):
+    """Restore a save into an initialized game through a read-only memory map; returns False if missing
+
+    Raises ValueError for a file that is not a readable save (wrong format, corrupt or truncated)."""
+    if not os.path.exists(path):
+        return False
+    truncated = False
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        try:
+            snap = decode_snapshot(mapped, _enemy_fields(game_state), game_state.enemy_img)
+        except struct.error:
+            truncated = True  # Raised once the map is closed, the traceback still holds views into it
+        else:
+            game_state.restore(snap)
+            # The snapshot's arrays point into the map, drop them before it closes
+            del snap
+    if truncated:
+        raise ValueError("save file is truncated")
+    return True
+
+
+def _enemy_fields(game_state):
+    return game_state.enemies.array_fields + ['entities']
+
+
+class AutoSaver:
+    """Writes saves on a background thread from double-buffered snapshots, the game thread never touches the disk"""
+    def __init__(self, path=DEFAULT_SAVE_PATH, interval=30000):
+        self.path = path
+        self.interval = interval  # Simulation milliseconds between autosaves
+        self.last_save = None
+        self.saves = 0
+        self._pending = None  # Back buffer: newest snapshot not yet picked up by the worker
+        self._writing = False  # Front buffer busy: the worker is encoding / writing a snapshot
+        self._condition = threading.Condition()
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="autosave", daemon=True)
+        self._thread.start()
+
+    def update(self, game_state, now):
+        """Call once per tick with the sim time; queues an autosave every interval"""
+        if self.last_save is None:
+            self.last_save = now
+        elif now - self.last_save >= self.interval:
+            self.last_save = now
+            self.request(game_state)
+
+    def request(self, game_state):
+        """Queue a save of the current state without blocking"""
+        # Only the snapshot copy happens here; a newer request replaces one the worker has not picked up yet
+        item = (game_state.snapshot(), _enemy_fields(game_state))
+        with self._condition:
+            self._pending = item
+            self._condition.notify()
+
+    def flush(self):
+        """Block until every queued save is on disk"""
+        with self._condition:
+            self._condition.wait_for(lambda: self._pending is None and not self._writing)
+
+    def close(self, game_state=None):
+        """Save one last time (if given a game), wait for the writer and stop it"""
+        if game_state is not None:
+            self.request(game_state)
+        self.flush()
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending is not None or self._stopping)
+                if self._pending is None:
+                    return
+                (snap, enemy_fields), self._pending = self._pending, None
+                self._writing = True
+            try:
+                write_save(self.path, encode_snapshot(snap, enemy_fields))
+                self.saves += 1
+            except Exception as e:
+                print(f"Autosave failed: {e}")
+            finally:
+                with self._condition:
+                    self._writing = False
+                    self._condition.notify_all()
@@ -0,0 +1,129 @@
+import pygame
+from profiler import profiler
+from audio_manager import audio
+
+
+class Scene:
+    """One screen of the game (menu, overworld, boss fight) run by a SceneManager"""
+    manager = None  # Set by SceneManager.add
+
+    def preload(self):
+        """Start loading what the scene needs without blocking (e.g. on worker threads)"""
+
+    def enter(self, previous):
+        """Become the current scene; previous is the scene name switched from (None at startup)"""
+
+    def exit(self):
+        """Stop being the current scene; the scene is only suspended, its state stays for the next enter"""
+
+    def handle_event(self, event):
+        pass
+
+    def update(self, dt):
+        """Advance by dt seconds of frame time"""
+
+    def draw(self, screen):
+        """Draw and present the frame"""
+
+    def listener(self):
+        """World position positional sounds are heard from, None to leave it unchanged"""
+        return None
+
+    def is_idle(self):
+        """True while the screen is static: the loop then sleeps until an event or idle_timeout()"""
+        return False
+
+    def idle_timeout(self):
+        """Longest sleep in milliseconds while idle, shorter if something animates without input"""
+        return 1000
+
+    def invalidate(self):
+        """The display lost its contents (e.g. the window was uncovered), redraw everything next frame"""
+
+
+class SceneManager:
+    """Runs the current scene in the single main loop over a shared display, switching between scenes"""
+    def __init__(self, screen, fps=60, background_fps=15):
+        self.screen = screen
+        self.fps = fps  # Caps rendering only, scenes with a simulation run it on their own fixed timestep
+        self.background_fps = background_fps  # Cap while the window doesn't have focus
+        self.focused = True
+        self.idle_frames = 0  # Frames that slept in event.wait instead of spinning
+        self.clock = pygame.time.Clock()
+        self.scenes = {}  # name -> Scene; scenes that are not current are suspended, never destroyed
+        self.current = None
+        self.current_name = None
+        self.next_name = None
+        self.preloaded = set()
+        self.running = False
+
+    def add(self, name, scene):
+        scene.manager = self
+        self.scenes[name] = scene
+        return scene
+
+    def preload(self, name):
+        """Let a scene start loading in the background ahead of a switch (once)"""
+        if name not in self.preloaded:
+            self.preloaded.add(name)
+            self.scenes[name].preload()
+
+    def switch(self, name):
+        """Make name the current scene at the end of this frame"""
+        self.next_name = name
+
+    def quit(self):
+        self.running = False
+
+    def _enter_next(self):
+        name, self.next_name = self.next_name, None
+        previous = self.current_name
+        if self.current is not None:
+            self.current.exit()
+        self.preload(name)  # Switching to a scene nobody preloaded still runs its preload first
+        self.current, self.current_name = self.scenes[name], name
+        self.current.enter(previous)
+        self._place_listener()  # Sounds of the first frame must not be heard from the last scene's listener
+
+    def _place_listener(self):
+        listener = self.current.listener()
+        if listener is not None:
+            audio.update_listener(listener)
+
+    def run(self, start):
+        """Main loop: events, update and draw of the current scene until quit() or the window closes"""
+        self.switch(start)
+        self._enter_next()
+        self.running = True
+        while self.running:
+            if self.current.is_idle():
+                # Nothing moves on screen: block until input arrives or the scene wants to animate
+                events = [pygame.event.wait(self.current.idle_timeout())]
+                events.extend(pygame.event.get())
+                dt = self.clock.tick() / 1000
+                self.idle_frames += 1
+            else:
+                dt = self.clock.tick(self.fps if self.focused else self.background_fps) / 1000  # Seconds
+                events = pygame.event.get()
+            profiler.begin_frame()
+            self._place_listener()  # Before events and update, which play the frame's sounds
+            for event in events:
+                if event.type == pygame.QUIT:
+                    self.running = False
+                elif event.type == pygame.NOEVENT:
+                    continue  # event.wait timed out
+                elif event.type == pygame.WINDOWFOCUSLOST:
+                    self.focused = False
+                elif event.type == pygame.WINDOWFOCUSGAINED:
+                    self.focused = True
+                elif event.type in (pygame.WINDOWEXPOSED, pygame.VIDEOEXPOSE):
+                    self.current.invalidate()
+                else:
+                    self.current.handle_event(event)
+            self.current.update(dt)
+            self.current.draw(self.screen)
+            profiler.end_frame()
+            audio.end_frame()
+            if self.next_name is not None and self.running:
+                self._enter_next()
+        self.current.exit()
@@ -0,0 +1,121 @@
+import pygame
+
+class SpatialHash:
+    """Uniform grid over world space for fast rect and radius queries"""
+    def __init__(self, map_size, cell_size=128):
+        self.map_width, self.map_height = map_size
+        self.cell_size = cell_size
+        self.cols = max(1, -(-self.map_width // cell_size))
+        self.rows = max(1, -(-self.map_height // cell_size))
+        self.cells = {}  # (cx, cy) -> {entity: None}, dicts keep insertion order
+        self.rects = {}  # entity -> world rect owned by the grid
+        self.spans = {}  # entity -> (cx0, cy0, cx1, cy1)
+
+    def _cell_span(self, x, y, w, h):
+        """Return the clamped range of cells covered by a rect"""
+        cs = self.cell_size
+        # Entities spawned off-map land in the border cells instead of growing the grid
+        cx0 = min(max(int(x // cs), 0), self.cols - 1)
+        cy0 = min(max(int(y // cs), 0), self.rows - 1)
+        cx1 = min(max(int((x + max(w - 1, 0)) // cs), 0), self.cols - 1)
+        cy1 = min(max(int((y + max(h - 1, 0)) // cs), 0), self.rows - 1)
+        return cx0, cy0, cx1, cy1
+
+    def _link(self, entity, span):
+        cx0, cy0, cx1, cy1 = span
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                self.cells.setdefault((cx, cy), {})[entity] = None
+
+    def _unlink(self, entity, span):
+        cx0, cy0, cx1, cy1 = span
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                bucket = self.cells.get((cx, cy))
+                if bucket is not None:
+                    bucket.pop(entity, None)
+                    if not bucket:
+                        del self.cells[(cx, cy)]
+
+    def insert(self, entity, rect):
+        """Register an entity with its world rect"""
+        if entity in self.rects:
+            self.remove(entity)
+        rect = pygame.Rect(rect)
+        span = self._cell_span(rect.x, rect.y, rect.width, rect.height)
+        self.rects[entity] = rect
+        self.spans[entity] = span
+        self._link(entity, span)
+
+    def move(self, entity, x, y):
+        """Move an entity's rect to a new top-left, rebucketing only on cell change"""
+        rect = self.rects.get(entity)
+        if rect is None:
+            return
+        rect.x = int(x)  # Truncate like pygame.Rect(...) does
+        rect.y = int(y)
+        span = self._cell_span(rect.x, rect.y, rect.width, rect.height)
+        old_span = self.spans[entity]
+        if span != old_span:
+            self._unlink(entity, old_span)
+            self._link(entity, span)
+            self.spans[entity] = span
+
+    def remove(self, entity):
+        """Unregister an entity"""
+        span = self.spans.pop(entity, None)
+        if span is not None:
+            self._unlink(entity, span)
+            del self.rects[entity]
+
+    def clear(self):
+        self.cells.clear()
+        self.rects.clear()
+        self.spans.clear()
+
+    def get_rect(self, entity):
+        """Return the grid's rect for an entity (do not mutate it)"""
+        return self.rects.get(entity)
+
+    def _candidates(self, span, kind):
+        cx0, cy0, cx1, cy1 = span
+        found = {}
+        cells = self.cells
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                bucket = cells.get((cx, cy))
+                if bucket:
+                    found.update(bucket)
+        if kind is None:
+            return found
+        return [e for e in found if isinstance(e, kind)]
+
+    def query_rect(self, rect, kind=None):
+        """Return entities whose rect overlaps the given world rect"""
+        rect = pygame.Rect(rect)
+        if rect.width <= 0 or rect.height <= 0:
+            return []
+        span = self._cell_span(rect.x, rect.y, rect.width, rect.height)
+        rects = self.rects
+        return [e for e in self._candidates(span, kind) if rect.colliderect(rects[e])]
+
+    def query_radius(self, pos, radius, kind=None):
+        """Return entities whose rect intersects the circle at pos"""
+        px, py = pos
+        span = self._cell_span(px - radius, py - radius, radius * 2 + 1, radius * 2 + 1)
+        radius_sq = radius * radius
+        result = []
+        for entity in self._candidates(span, kind):
+            rect = self.rects[entity]
+            # Distance from circle center to the closest point on the rect
+            dx = px - max(rect.left, min(px, rect.right))
+            dy = py - max(rect.top, min(py, rect.bottom))
+            if dx * dx + dy * dy <= radius_sq:
+                result.append(entity)
+        return result
+
+    def __len__(self):
+        return len(self.rects)
+
+    def __contains__(self, entity):
+        return entity in self.rects
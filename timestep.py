@@ -0,0 +1,49 @@
+BASE_TICK_RATE = 60  # Per-tick speeds in the game are tuned for 60 ticks per second
+
+
+class SimClock:
+    """Simulation time in milliseconds, advanced only by simulation ticks"""
+    def __init__(self):
+        self.time = 0.0
+
+    def get_ticks(self):
+        """Drop-in replacement for pygame.time.get_ticks() inside game logic"""
+        return int(self.time)
+
+    def advance(self, ms):
+        self.time += ms
+
+    def reset(self, ms=0.0):
+        self.time = ms
+
+
+class FixedTimestep:
+    """Accumulator that turns variable frame times into a whole number of fixed ticks"""
+    def __init__(self, tick_rate=BASE_TICK_RATE, max_steps=5):
+        self.tick_rate = tick_rate
+        self.dt = 1.0 / tick_rate
+        self.max_steps = max_steps  # Cap on catch-up ticks per frame so slow frames can't spiral
+        self.accumulator = 0.0
+        self.ticks = 0
+
+    def advance(self, frame_dt):
+        """Add a frame's elapsed seconds and return how many ticks to simulate"""
+        self.accumulator += frame_dt
+        steps = int(self.accumulator / self.dt)
+        if steps > self.max_steps:
+            # Too far behind, drop the backlog instead of slowing every following frame
+            steps = self.max_steps
+            self.accumulator = 0.0
+        else:
+            self.accumulator -= steps * self.dt
+        self.ticks += steps
+        return steps
+
+    @property
+    def alpha(self):
+        """How far the renderer is between the previous and current tick (0.0 to 1.0)"""
+        return min(1.0, self.accumulator / self.dt)
+
+
+# Shared clock read by every system that used pygame.time.get_ticks() for game logic
+sim_clock = SimClock()
@@ -1,22 +1,61 @@
 import pygame
-import random
+from ecs import Registry, EntityFacade, Position, Sprite, Collider
+from rng import trash_rng
 
-class Trash:
-    def __init__(self, image, pos, map_size):
-        self.image = image
-        self.pos = pygame.Vector2(pos)
+TRASH_COMPONENTS = (Position, Sprite, Collider)
+
+
+class Trash(EntityFacade):
+    """Facade over one trash entity; pos is the top-left corner, the entity stores the center"""
+    __slots__ = ('map_width', 'map_height', 'rect', 'grid')
+
+    def __init__(self, image, pos, map_size, grid=None, registry=None, entity=None):
+        super().__init__(None, -1)
         self.map_width, self.map_height = map_size
-        self.rect = self.image.get_rect(topleft=self.pos)
+        self.rect = image.get_rect(topleft=pos)
+        registry = registry if registry is not None else Registry()
+        size = image.get_size()
+        center = (pos[0] + size[0] / 2, pos[1] + size[1] / 2)
+        registry.create(*TRASH_COMPONENTS, view=self, entity=entity, pos=center, prev_pos=center, size=size,
+                        sprite=image)
+        self.grid = grid
+        if self.grid is not None:
+            self.grid.insert(self, self.rect)
+
+    @property
+    def image(self):
+        return self.archetype.sprite[self.index]
+
+    @property
+    def pos(self):
+        (cx, cy), (w, h) = self.archetype.pos[self.index], self.archetype.size[self.index]
+        return pygame.Vector2(cx - w / 2, cy - h / 2)
+
+    @pos.setter
+    def pos(self, value):
+        w, h = self.archetype.size[self.index]
+        self.archetype.pos[self.index] = (value[0] + w / 2, value[1] + h / 2)
 
     def relocate(self):
         margin = 50
-        x = random.randint(margin, self.map_width - margin)
-        y = random.randint(margin, self.map_height - margin)
-        self.pos = pygame.Vector2(x, y)
-        self.rect.topleft = self.pos
+        x = trash_rng.randint(margin, self.map_width - margin)
+        y = trash_rng.randint(margin, self.map_height - margin)
+        self.move_to((x, y))
+
+    def move_to(self, pos):
+        """Place the top-left corner at pos and keep rect and grid in step"""
+        self.pos = pos
+        self.rect.topleft = (int(pos[0]), int(pos[1]))  # Truncate like the Rect constructor
+        if self.grid is not None:
+            self.grid.move(self, self.rect.x, self.rect.y)
+
+    def destroy(self):
+        if self.grid is not None:
+            self.grid.remove(self)
+        self.archetype.registry.destroy(self.entity)
 
     def draw(self, screen, camera_offset):
-        screen.blit(self.image, (self.pos.x - camera_offset.x, self.pos.y - camera_offset.y))
+        return screen.blit(self.image, (self.pos.x - camera_offset.x, self.pos.y - camera_offset.y))
 
     def get_world_rect(self):
         return self.rect
@@ -1,7 +1,10 @@
 import pygame
 import os
 import math
-from pathlib import Path
+from asset_cache import assets
+from audio_manager import audio
+from effect_cache import effects
+from timestep import BASE_TICK_RATE
 
 class Sword:
     def __init__(self, player):
@@ -15,7 +18,6 @@ class Sword:
         self.attack_range = 80  # Increased range
         self.active_hit_frames = {1, 2}  # Frames when hitbox is active
         self.knockback_force = 15
-        self.swing_sound = None  # Sound effect
         
         # Load directional sword images
         self.sword_images = {
@@ -28,36 +30,36 @@ class Sword:
         self.load_sound()
         self.current_image = self.sword_images['down']
 
+    @staticmethod
+    def load_images_from(asset_cache):
+        """Load the four directional sword images through an AssetCache"""
+        return {
+            direction: asset_cache.image(
+                os.path.join("assets", "weapons", f"{direction}.png"),
+                (50, 70),  # Slightly larger
+                smooth=False
+            )
+            for direction in ('up', 'down', 'left', 'right')
+        }
+
     def load_images(self):
         """Load directional sword images"""
         try:
-            assets_dir = Path(__file__).parent / "assets" / "weapons"
-            self.sword_images['up'] = pygame.image.load(str(assets_dir / "up.png")).convert_alpha()
-            self.sword_images['down'] = pygame.image.load(str(assets_dir / "down.png")).convert_alpha()
-            self.sword_images['left'] = pygame.image.load(str(assets_dir / "left.png")).convert_alpha()
-            self.sword_images['right'] = pygame.image.load(str(assets_dir / "right.png")).convert_alpha()
-            
-            # Scale images if needed
-            for direction in self.sword_images:
-                if self.sword_images[direction]:
-                    self.sword_images[direction] = pygame.transform.scale(
-                        self.sword_images[direction], 
-                        (50, 70)  # Slightly larger
-                    )
+            self.sword_images.update(self.load_images_from(assets))
         except Exception as e:
             print(f"Error loading sword images: {e}")
             self.create_fallback_graphics()
 
+    def set_images(self, images):
+        """Replace the directional images, e.g. with texture atlas frames"""
+        self.sword_images.update(images)
+        self.current_image = self.sword_images[self.player.status]
+
     def load_sound(self):
-        """Load sword sound effect"""
-        try:
-            assets_dir = Path(__file__).parent / "assets" / "weapons"
-            sound_path = assets_dir / "sword.wav"
-            self.swing_sound = pygame.mixer.Sound(str(sound_path))
-            self.swing_sound.set_volume(0.3)  # Adjust volume as needed
-        except Exception as e:
-            print(f"Error loading sword sound: {e}")
-            self.swing_sound = None
+        """Register the swing sound with the shared AudioManager"""
+        if 'swing' not in audio.sounds:
+            audio.load_sound('swing', os.path.join("assets", "weapons", "sword.wav"),
+                             category='weapon', priority=1, volume=0.3)
 
     def create_fallback_graphics(self):
         """Create simple placeholder graphics if images can't be loaded"""
@@ -88,19 +90,25 @@ class Sword:
             self.attack_frame = 0
             self.last_attack_time = current_time
             # Play sound effect if available
-            if self.swing_sound:
-                self.swing_sound.play()
+            audio.play_sound('swing', self.player.pos)
             return True
         return False
 
-    def update(self):
-        """Update attack animation"""
+    def update(self, dt=1 / BASE_TICK_RATE):
+        """Update attack animation (attack_speed is frames per 1/60 s)"""
         if self.attacking:
-            self.attack_frame += self.attack_speed
+            self.attack_frame += self.attack_speed * dt * BASE_TICK_RATE
             if self.attack_frame >= 4:  # 4-frame attack animation
                 self.attacking = False
                 self.attack_frame = 0
 
+    def snapshot(self):
+        """Mutable attack state as a tuple"""
+        return (self.attacking, self.attack_frame, self.last_attack_time)
+
+    def restore(self, state):
+        self.attacking, self.attack_frame, self.last_attack_time = state
+
     def get_hitbox(self):
         """Calculate current hitbox based on player direction"""
         if not self.attacking or int(self.attack_frame) not in self.active_hit_frames:
@@ -126,7 +134,7 @@ class Sword:
         )
 
     def draw(self, surface, camera_offset):
-        """Draw sword with proper positioning and attack effects"""
+        """Draw sword with proper positioning and attack effects, returning the screen rect"""
         self.current_image = self.sword_images[self.player.status]
         pos = pygame.Vector2(self.player.rect.center)
         
@@ -151,9 +159,8 @@ class Sword:
             
             # Visual feedback during active hit frames
             if int(self.attack_frame) in self.active_hit_frames:
-                highlight = self.current_image.copy()
-                highlight.fill((255, 255, 0, 50), special_flags=pygame.BLEND_ADD)
-                self.current_image = highlight
+                self.current_image = effects.tinted(self.current_image, (255, 255, 0, 50),
+                                                    pygame.BLEND_ADD)
 
         screen_pos = pos - camera_offset
-        surface.blit(self.current_image, self.current_image.get_rect(center=screen_pos))
\ No newline at end of file
+        return surface.blit(self.current_image, self.current_image.get_rect(center=screen_pos))
\ No newline at end of file
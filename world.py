@@ -1,38 +1,239 @@
 import pygame
-import random
 import math
-from trash import Trash
+import numpy as np
+from trash import Trash, TRASH_COMPONENTS
+from ecs import Registry
+from spatial_hash import SpatialHash
+from flow_field import FlowField
+from chunks import ChunkCache, pack_chunk, unpack_chunk
+from rng import trash_rng
+from atlas import blit_source
 
 class World:
-    def __init__(self, map_size, trash_image, landfill_image, npc_pos, safezone_radius):
+    def __init__(self, map_size, trash_image, landfill_image, npc_pos, safezone_radius, cell_size=128,
+                 registry=None, enemies=None, enemy_image=None, chunk_size=1024, active_radius=1,
+                 max_resident_chunks=64):
         self.map_width, self.map_height = map_size
+        self.grid = SpatialHash(map_size, cell_size)  # Trash only, enemies are queried from their swarm
+        self.entities = registry if registry is not None else Registry()  # ECS storage for every entity
+        self.trash_entities = self.entities.archetype(*TRASH_COMPONENTS)
         self.trash_image = trash_image
         self.landfill_image = landfill_image
         self.npc_pos = npc_pos
         self.safezone_radius = safezone_radius
         self.decomposer_zone = pygame.Rect(self.npc_pos[0] - 75, self.npc_pos[1] - 75, 150, 150)
+
+        # Streaming: the map is cut into square chunks and only those near the focus have live entities,
+        # the rest keep theirs frozen as packed records in an LRU cache that spills to disk
+        self.enemies = enemies  # Swarm whose enemies are frozen with their chunk (optional)
+        self.enemy_image = enemy_image
+        self.chunk_size = chunk_size
+        self.chunk_cols = max(1, -(-self.map_width // chunk_size))
+        self.chunk_rows = max(1, -(-self.map_height // chunk_size))
+        self.active_radius = active_radius
+        self.keep_radius = active_radius + 1  # Chunks stay live a little longer so borders don't thrash
+        self.active = None  # (rows, cols) mask of live chunks, None until the first stream(): all live
+        self.focus_chunk = None
+        self.chunks = ChunkCache(max_resident_chunks)
+        self.enemy_dtype = (enemies.record_dtype if enemies is not None
+                            else np.dtype([('pos', np.float64, (2,)), ('entity', np.int64)]))
+        self.trash_dtype = self.trash_entities.record_dtype
+
+        # Enemy pathing toward the player; the NPC safezone is a no-entry region
+        self.obstacles = []  # Rects from add_obstacle, kept to re-block when the field's window moves
+        self.flow_window = pygame.Rect(0, 0, self.map_width, self.map_height)
+        self.flow_field = self._make_flow_field(self.flow_window)
         self.trash_list = []
         self.spawn_trash()
 
-    def spawn_trash(self):
+    def spawn_trash(self, num_trash=7):
+        for trash in self.trash_list:
+            trash.destroy()
         self.trash_list = []
-        num_trash = 7  # Number of trash items to spawn
+        # Frozen trash goes too, dormant chunks keep only their enemies
+        for key in self.chunks.keys():
+            enemies, trash = unpack_chunk(self.chunks.take(key), self.enemy_dtype, self.trash_dtype)
+            if len(enemies):
+                self.chunks.put(key, pack_chunk(enemies, trash[:0]))
 
         for _ in range(num_trash):
             while True:
-                x = random.uniform(0, self.map_width - self.trash_image.get_width())
-                y = random.uniform(0, self.map_height - self.trash_image.get_height())
+                x = trash_rng.uniform(0, self.map_width - self.trash_image.get_width())
+                y = trash_rng.uniform(0, self.map_height - self.trash_image.get_height())
 
                 dist_to_npc = math.hypot(x - self.npc_pos[0], y - self.npc_pos[1])
 
                 if dist_to_npc > self.safezone_radius:
-                    self.trash_list.append(Trash(self.trash_image, (x, y), (self.map_width, self.map_height)))
+                    self.trash_list.append(Trash(self.trash_image, (x, y), (self.map_width, self.map_height),
+                                                 self.grid, self.entities))
                     break
+        self._freeze_strays()
+
+    def add_obstacle(self, rect):
+        """Make a world rect impassable for enemies; the flow field rebuilds on its next update"""
+        self.obstacles.append(pygame.Rect(rect))
+        self.flow_field.block_rect(self.obstacles[-1])
+
+    def _make_flow_field(self, window):
+        flow_field = FlowField(window.size, origin=window.topleft)
+        flow_field.block_circle(self.npc_pos, self.safezone_radius)
+        for rect in self.obstacles:
+            flow_field.block_rect(rect)
+        return flow_field
+
+    # Streaming
+    def chunk_of(self, pos):
+        col = min(self.chunk_cols - 1, max(0, int(pos[0] // self.chunk_size)))
+        row = min(self.chunk_rows - 1, max(0, int(pos[1] // self.chunk_size)))
+        return col, row
+
+    def _chunk_indices(self, positions):
+        """(rows, cols) chunk index arrays for an (n, 2) position array, off-map clamped to the border"""
+        cells = (positions * (1 / self.chunk_size)).astype(np.intp)  # Clipped below, truncation is enough
+        np.clip(cells, 0, (self.chunk_cols - 1, self.chunk_rows - 1), out=cells)
+        return cells[:, 1], cells[:, 0]
+
+    def stream(self, focus):
+        """Wake chunks near focus and freeze entities standing in dormant ones; call once per tick"""
+        chunk = self.chunk_of(focus)
+        if chunk != self.focus_chunk:
+            self.focus_chunk = chunk
+            self._update_active(*chunk)
+        # Enemies spawn, get knocked back and trash relocates into dormant chunks between focus changes
+        self._freeze_strays()
+
+    def _update_active(self, col, row):
+        distance = np.maximum(np.abs(np.arange(self.chunk_rows)[:, None] - row),
+                              np.abs(np.arange(self.chunk_cols)[None, :] - col))
+        active = distance <= self.active_radius
+        if self.active is not None:
+            active |= self.active & (distance <= self.keep_radius)
+            woken = active & ~self.active
+        else:
+            woken = active & False  # First call: every entity is live already
+        for r, c in zip(*np.nonzero(woken)):
+            self._thaw((int(c), int(r)))
+        self.active = active
+        self._move_flow_window()
+
+    def _move_flow_window(self):
+        """Fit the flow field to the live chunks, its cost then follows the active area, not the map"""
+        if self.active is None:
+            window = pygame.Rect(0, 0, self.map_width, self.map_height)
+        else:
+            rows, cols = np.flatnonzero(self.active.any(axis=1)), np.flatnonzero(self.active.any(axis=0))
+            cs = self.chunk_size
+            window = pygame.Rect(cols[0] * cs, rows[0] * cs, (cols[-1] + 1 - cols[0]) * cs,
+                                 (rows[-1] + 1 - rows[0]) * cs).clip(0, 0, self.map_width, self.map_height)
+        if window != self.flow_window:
+            self.flow_window = window
+            self.flow_field = self._make_flow_field(window)
+
+    def _freeze_strays(self):
+        """Pack every live entity outside the active chunks into its chunk's frozen records"""
+        if self.active is None:
+            return
+        enemies = np.zeros(0, dtype=self.enemy_dtype)
+        swarm = self.enemies
+        if swarm is not None and swarm.count:
+            rows = np.flatnonzero(~self.active[self._chunk_indices(swarm.pos[:swarm.count])])
+            if rows.size:
+                enemies = swarm.freeze(rows)
+
+        trash = np.zeros(0, dtype=self.trash_dtype)
+        archetype = self.trash_entities
+        if archetype.count:
+            rows = np.flatnonzero(~self.active[self._chunk_indices(archetype.pos[:archetype.count])])
+            if rows.size:
+                # Row order depends on removal history (a restore rebuilds it), entity ids do not
+                rows = rows[np.argsort(archetype.entities[rows])]
+                frozen = [archetype.views[row] for row in rows.tolist()]
+                trash = archetype.freeze(rows)
+                for item in frozen:
+                    self.grid.remove(item)
+                self.trash_list = [item for item in self.trash_list if item.index >= 0]
+        if len(enemies) or len(trash):
+            self._store(enemies, trash)
+
+    def _store(self, enemies, trash):
+        """Add records to their chunks, merging with whatever those chunks already hold"""
+        enemy_keys = self._chunk_indices(enemies['pos'])
+        trash_keys = self._chunk_indices(trash['pos'])
+        keys = set(zip(enemy_keys[1].tolist(), enemy_keys[0].tolist()))
+        keys.update(zip(trash_keys[1].tolist(), trash_keys[0].tolist()))
+        for col, row in sorted(keys):
+            new_enemies = enemies[(enemy_keys[1] == col) & (enemy_keys[0] == row)]
+            new_trash = trash[(trash_keys[1] == col) & (trash_keys[0] == row)]
+            blob = self.chunks.take((col, row))
+            if blob is not None:
+                old_enemies, old_trash = unpack_chunk(blob, self.enemy_dtype, self.trash_dtype)
+                new_enemies = np.concatenate((old_enemies, new_enemies))
+                new_trash = np.concatenate((old_trash, new_trash))
+            self.chunks.put((col, row), pack_chunk(new_enemies, new_trash))
+
+    def _thaw(self, key):
+        """Bring a chunk's frozen entities back to life"""
+        blob = self.chunks.take(key)
+        if blob is None:
+            return
+        enemies, trash = unpack_chunk(blob, self.enemy_dtype, self.trash_dtype)
+        if len(enemies):
+            self.enemies.thaw(enemies, self.enemy_image)
+        self._add_trash(trash['pos'] - trash['size'] / 2, trash['entity'])
+
+    def _add_trash(self, positions, entities):
+        """Recreate trash items at top-left positions under their original entity ids"""
+        for (x, y), entity in zip(positions.tolist(), entities.tolist()):
+            self.trash_list.append(Trash(self.trash_image, (x, y), (self.map_width, self.map_height),
+                                         self.grid, self.entities, entity=entity))
+
+    def frozen_counts(self):
+        """(enemies, trash) currently frozen in dormant chunks"""
+        enemies = trash = 0
+        for key in self.chunks.keys():
+            frozen_enemies, frozen_trash = unpack_chunk(self.chunks.read(key), self.enemy_dtype, self.trash_dtype)
+            enemies += len(frozen_enemies)
+            trash += len(frozen_trash)
+        return enemies, trash
+
+    def _live_trash(self):
+        """Top-left positions and entity ids of trash_list, read straight from the columns"""
+        rows = np.fromiter((trash.index for trash in self.trash_list), np.intp, len(self.trash_list))
+        archetype = self.trash_entities
+        return archetype.pos[rows] - archetype.size[rows] / 2, archetype.entities[rows]
+
+    def snapshot(self):
+        """Live trash (top-left positions and entity ids) plus the streaming state"""
+        positions, entities = self._live_trash()
+        active = None if self.active is None else self.active.copy()
+        return (positions, entities, self.focus_chunk, active, self.chunks.snapshot())
+
+    def restore(self, state):
+        """Return trash and chunks to a snapshot(); unchanged trash items are only moved"""
+        positions, entities, focus_chunk, active, chunks = state
+        current, current_entities = self._live_trash()
+        if np.array_equal(current_entities, entities):
+            for i in np.flatnonzero((current != positions).any(axis=1)).tolist():
+                self.trash_list[i].move_to(positions[i].tolist())
+        else:
+            for trash in self.trash_list:
+                trash.destroy()
+            self.trash_list = []
+            self._add_trash(positions, entities)
+        self.chunks.restore(chunks)
+        self.focus_chunk = focus_chunk
+        self.active = None if active is None else active.copy()
+        self._move_flow_window()
 
     def draw_landfill(self, screen, camera_offset):
         pos = (self.decomposer_zone.x - camera_offset.x, self.decomposer_zone.y - camera_offset.y)
-        screen.blit(self.landfill_image, pos)
+        return screen.blit(self.landfill_image, pos)
 
     def draw_trash(self, screen, camera_offset):
-        for trash in self.trash_list:
-            trash.draw(screen, camera_offset)
+        """Draw every trash item in one batched blit from the (atlas) trash image"""
+        source, area = blit_source(self.trash_image)
+        trash = self.trash_entities
+        n = trash.count
+        # Entities store centers, the sprite goes at the top-left corner
+        dests = (trash.pos[:n] - trash.size[:n] / 2 - (camera_offset[0], camera_offset[1])).tolist()
+        return screen.blits([(source, dest, area) for dest in dests])